@@ -1,10 +1,9 @@
 """Authentication endpoints."""
 from fastapi import APIRouter, HTTPException, status, Query
-import uuid
 from typing import Optional
 
 from app.api.models import LoginRequest, LoginResponse, LogoutResponse
-from app.api.storage import users_db, current_sessions
+from app.api.storage import users_db, session_store, session_signer, SESSION_TOKENS_DEFAULT
 from app.models.user import User
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -15,13 +14,13 @@ INVALID_SESSION_MESSAGE = "Invalid session"
 
 
 def get_user_from_session(session_id: str) -> Optional[User]:
-    """Get user from session ID."""
-    user_id = current_sessions.get(session_id)
-    if user_id:
-        for user in users_db.values():
-            if user.user_id == user_id:
-                return user
-    return None
+    """Get user from session ID or signed session token."""
+    if session_signer.is_token(session_id):
+        claims = session_signer.verify(session_id)
+        if claims is None:
+            return None
+        return session_store.get_user_by_id(claims.user_id)
+    return session_store.get_user(session_id)
 
 
 @router.post("/login", response_model=LoginResponse)
@@ -43,8 +42,11 @@ async def login(request: LoginRequest):
 
         # Verify credentials
         if user.login(request.username, request.password):
-            session_id = str(uuid.uuid4())
-            current_sessions[session_id] = user.user_id
+            stateless = SESSION_TOKENS_DEFAULT if request.stateless is None else request.stateless
+            if stateless:
+                session_id = session_signer.issue(user.user_id)
+            else:
+                session_id = session_store.create_session(user)
 
             return LoginResponse(
                 success=True,
@@ -77,7 +79,10 @@ async def logout(session_id: str = Query(..., description="Session ID")):
             )
 
         user.logout()
-        current_sessions.pop(session_id, None)
+        if session_signer.is_token(session_id):
+            session_signer.revoke(session_id)
+        else:
+            session_store.end_session(session_id)
 
         return LogoutResponse(
             success=True,
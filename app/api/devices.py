@@ -1,29 +1,232 @@
 """Device management endpoints."""
-from fastapi import APIRouter, HTTPException, status, Query
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Query, Request, Header, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
 import uuid
 
 from app.api.models import (
     DeviceResponse,
+    DeviceChangesResponse,
     CreateDeviceRequest,
     BrightnessRequest,
-    ToggleResponse
+    ToggleResponse,
+    DeviceCommand,
+    BatchCommandRequest,
+    BatchCommandResult,
+    BatchCommandResponse,
+    ImportErrorItem,
+    ImportResponse,
+    RoomAssignmentRequest,
+    RoomCommandRequest,
+    RoomResponse,
+    PersistenceStatsResponse,
+    DashboardCacheStatsResponse
 )
 from app.api.storage import (
     dashboards_db,
     device_factory,
-    notification_service
+    device_hub,
+    notification_service,
+    persistence_writer,
+    scheduler
 )
 from app.api.auth import get_user_from_session
-from app.models.device import Light
+from app.api.etag import make_etag, etag_matches, not_modified, set_etag
+from app.api.fast_json import ListEncoder, json_response
+from app.api.paging import parse_cursor, set_next_cursor
+from app.models.device import Device, Light
 from app.models.dashboard import Dashboard
+from app.models.device_hub import DeviceSubscription, RESYNC
+from app.models.device_import import FORMAT_CSV, FORMAT_NDJSON, ImportStreamError, parse_records
 
 router = APIRouter(prefix="/devices", tags=["Devices"])
 
+# Fields of DeviceResponse, in order, for the pre-encoded device list
+DEVICE_RESPONSE_FIELDS = tuple(DeviceResponse.model_fields)
+DEVICE_LIST_ENCODER = ListEncoder(DeviceResponse)
+
+# Devices created and added per chunk of a bulk import
+IMPORT_BATCH_SIZE = 500
+# A progress notification is sent each time this many more devices are in
+IMPORT_PROGRESS_EVERY = 10000
+# Most per-line errors returned in an import summary
+IMPORT_MAX_ERRORS = 100
+
+# Content types mapped to bulk import formats
+IMPORT_CONTENT_TYPES = {
+    "application/x-ndjson": FORMAT_NDJSON,
+    "application/jsonl": FORMAT_NDJSON,
+    "text/csv": FORMAT_CSV,
+}
+
+
+def _get_device(dashboard: Optional[Dashboard], device_id: str) -> Device:
+    """
+    Look up a device on a dashboard for a command.
+
+    Raises:
+        HTTPException: 404 if the dashboard or device is missing
+    """
+    if not dashboard:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dashboard not found"
+        )
+
+    device = dashboard.get_device(device_id)
+
+    if not device:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Device not found"
+        )
+    return device
+
+
+def _get_light(dashboard: Optional[Dashboard], device_id: str) -> Light:
+    """
+    Look up a light on a dashboard for a light command.
+
+    Raises:
+        HTTPException: 404 if the dashboard or device is missing, 400 if
+            the device is not a light
+    """
+    device = _get_device(dashboard, device_id)
+
+    if not isinstance(device, Light):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Device is not a light"
+        )
+    return device
+
+
+def _set_brightness(device: Light, brightness: int) -> None:
+    """
+    Set a light's brightness and send a notification.
+
+    Raises:
+        HTTPException: 400 if the level is out of range
+    """
+    if not device.set_brightness(brightness):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid brightness level"
+        )
+
+    # Send notification
+    notification_service.send_notification(
+        f"Light '{device.device_name}' brightness set to {brightness}%",
+        device.device_id,
+        "brightness_changed"
+    )
+
+
+def _toggle(device: Light) -> bool:
+    """Toggle a light, send a notification and return whether it is on."""
+    is_on = device.toggle()
+
+    # Send notification
+    notification_service.send_notification(
+        f"Light '{device.device_name}' toggled {'on' if is_on else 'off'}",
+        device.device_id,
+        "device_toggled"
+    )
+    return is_on
+
+
+# Actions apply_command runs; the light actions need a Light
+LIGHT_ACTIONS = ("toggle", "set_brightness")
+COMMAND_ACTIONS = ("turn_on", "turn_off") + LIGHT_ACTIONS
+
+
+def apply_command(dashboard: Optional[Dashboard], command: DeviceCommand) -> Device:
+    """
+    Run one device command without sending a notification.
+
+    Used for batch and room commands and by scheduled tasks.
+
+    Raises:
+        HTTPException: 404 for a missing device, 400 for an unknown action,
+            an action the device does not support or a missing or invalid
+            brightness
+    """
+    if command.action == "turn_on":
+        device = _get_device(dashboard, command.device_id)
+        device.turn_on()
+        return device
+    if command.action == "turn_off":
+        device = _get_device(dashboard, command.device_id)
+        device.turn_off()
+        return device
+    if command.action == "toggle":
+        light = _get_light(dashboard, command.device_id)
+        light.toggle()
+        return light
+    if command.action == "set_brightness":
+        light = _get_light(dashboard, command.device_id)
+        if command.brightness is None or not light.set_brightness(command.brightness):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid brightness level"
+            )
+        return light
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Unknown action: {command.action}"
+    )
+
+
+def _run_commands(dashboard: Optional[Dashboard], commands: List[DeviceCommand]) -> Tuple[List[BatchCommandResult], int]:
+    """
+    Run commands in order, collecting a result for each.
+
+    Returns:
+        Tuple of (results, number of commands that succeeded)
+    """
+    results = []
+    succeeded = 0
+
+    for command in commands:
+        try:
+            device = apply_command(dashboard, command)
+        except HTTPException as e:
+            results.append(BatchCommandResult(
+                device_id=command.device_id,
+                action=command.action,
+                success=False,
+                detail=e.detail
+            ))
+            continue
+        succeeded += 1
+        results.append(BatchCommandResult(
+            device_id=command.device_id,
+            action=command.action,
+            success=True,
+            device=device.to_dict()
+        ))
+    return results, succeeded
+
 
 @router.get("", response_model=List[DeviceResponse])
-async def get_devices(session_id: str = Query(..., description="Session ID")):
-    """Get all devices for the logged-in user."""
+async def get_devices(
+    session_id: str = Query(..., description="Session ID"),
+    device_type: Optional[str] = Query(None, description="Only devices of this type"),
+    device_status: Optional[str] = Query(None, alias="status", description="Only devices with this status"),
+    is_on: Optional[bool] = Query(None, description="Only lights that are on (true) or off (false)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; the X-Next-Cursor header holds the next page's cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Get the devices of the logged-in user. Supports If-None-Match.
+
+    Filters are served from secondary indexes. With ``limit`` the list is
+    paged: while more devices remain, the X-Next-Cursor response header
+    carries the cursor for the next page.
+    """
     try:
         user = get_user_from_session(session_id)
 
@@ -38,8 +241,31 @@ async def get_devices(session_id: str = Query(..., description="Session ID")):
         if not dashboard:
             return []
 
-        devices_data = dashboard.display_devices()
-        return devices_data
+        query = (device_type, device_status, is_on, limit, cursor)
+        paged = any(value is not None for value in query)
+        etag = make_etag(dashboard.epoch, dashboard.version, *query) if paged \
+            else make_etag(dashboard.epoch, dashboard.version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        if not paged:
+            # Cached JSON shaped like List[DeviceResponse]; only devices
+            # that changed since the last poll are re-encoded.
+            full = json_response(dashboard.display_devices_json(DEVICE_RESPONSE_FIELDS))
+            set_etag(full, etag)
+            return full
+
+        devices, next_seq = dashboard.query_devices(
+            device_type=device_type,
+            status=device_status,
+            is_on=is_on,
+            after=parse_cursor(cursor, dashboard.epoch),
+            limit=limit
+        )
+        page = json_response(DEVICE_LIST_ENCODER.encode_objects(devices))
+        set_etag(page, etag)
+        set_next_cursor(page, dashboard.epoch, next_seq)
+        return page
     except HTTPException:
         raise
     except Exception as e:
@@ -49,6 +275,104 @@ async def get_devices(session_id: str = Query(..., description="Session ID")):
         )
 
 
+@router.get("/changes", response_model=DeviceChangesResponse)
+async def get_device_changes(
+    session_id: str = Query(..., description="Session ID"),
+    since: int = Query(0, ge=0, description="Dashboard version from the previous response"),
+    epoch: Optional[str] = Query(None, description="Dashboard epoch from the previous response")
+):
+    """
+    Get devices added, updated or removed since a dashboard version.
+
+    Falls back to a full snapshot when the epoch does not match (the
+    dashboard was reloaded or is served by another worker) or the change
+    log no longer reaches back to the requested version.
+    """
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        dashboard = dashboards_db.get(user.user_id)
+
+        if not dashboard:
+            return DeviceChangesResponse(epoch="", version=0, full=True)
+
+        changes = dashboard.changes_since(since) if epoch == dashboard.epoch else None
+
+        if changes is None:
+            return DeviceChangesResponse(
+                epoch=dashboard.epoch,
+                version=dashboard.version,
+                full=True,
+                devices=dashboard.display_devices()
+            )
+
+        changed, removed = changes
+        return DeviceChangesResponse(
+            epoch=dashboard.epoch,
+            version=dashboard.version,
+            full=False,
+            devices=[device.to_dict() for device in changed],
+            removed=removed
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve device changes: {str(e)}"
+        )
+
+
+@router.get("/persistence/stats", response_model=PersistenceStatsResponse)
+async def get_persistence_stats(session_id: str = Query(..., description="Session ID")):
+    """Get write-behind flush counts and latency for device state."""
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        return PersistenceStatsResponse(**persistence_writer.stats())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve persistence stats: {str(e)}"
+        )
+
+
+@router.get("/cache/stats", response_model=DashboardCacheStatsResponse)
+async def get_dashboard_cache_stats(session_id: str = Query(..., description="Session ID")):
+    """Get hit, miss and eviction counters for resident dashboards."""
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        return DashboardCacheStatsResponse(**dashboards_db.stats())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve dashboard cache stats: {str(e)}"
+        )
+
+
 @router.post("", response_model=DeviceResponse)
 async def create_device(request: CreateDeviceRequest, session_id: str = Query(..., description="Session ID")):
     """Create a new device and add to user's dashboard."""
@@ -68,6 +392,7 @@ async def create_device(request: CreateDeviceRequest, session_id: str = Query(..
         }
 
         device = device_factory.create_device(request.device_type, config)
+        device.room = request.room
 
         # Add to user's dashboard
         dashboard = dashboards_db.get(user.user_id)
@@ -104,9 +429,15 @@ async def create_device(request: CreateDeviceRequest, session_id: str = Query(..
         )
 
 
-@router.put("/{device_id}/light/brightness", response_model=DeviceResponse)
-async def set_light_brightness(device_id: str, request: BrightnessRequest, session_id: str = Query(..., description="Session ID")):
-    """Set brightness for a light device."""
+@router.post("/batch", response_model=BatchCommandResponse)
+async def run_device_commands(request: BatchCommandRequest, session_id: str = Query(..., description="Session ID")):
+    """
+    Run many device commands in one request.
+
+    Commands run in order against the user's dashboard. A failing command
+    does not stop the others; each gets its own result. One notification
+    summarizes the whole batch.
+    """
     try:
         user = get_user_from_session(session_id)
 
@@ -116,54 +447,261 @@ async def set_light_brightness(device_id: str, request: BrightnessRequest, sessi
                 detail="Invalid session. Please login."
             )
 
+        results, succeeded = _run_commands(dashboards_db.get(user.user_id), request.commands)
+        failed = len(results) - succeeded
+        if succeeded:
+            # Send notification
+            notification_service.send_notification(
+                f"Batch of {len(results)} device commands: {succeeded} succeeded, {failed} failed",
+                "",
+                "devices_batch"
+            )
+
+        return BatchCommandResponse(succeeded=succeeded, failed=failed, results=results)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to run device commands: {str(e)}"
+        )
+
+
+def _import_format(fmt: Optional[str], content_type: Optional[str]) -> str:
+    """
+    Pick the bulk import format from the query or the Content-Type.
+
+    Raises:
+        HTTPException: 415 if neither names a supported format
+    """
+    if fmt:
+        return fmt
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in IMPORT_CONTENT_TYPES:
+        return IMPORT_CONTENT_TYPES[media_type]
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Send application/x-ndjson or text/csv, or pass format"
+    )
+
+
+def _import_chunk(dashboard: Dashboard, records: List[Dict[str, Any]], lines: List[int], errors: List[ImportErrorItem]) -> Tuple[int, int]:
+    """
+    Create one chunk of imported devices and add them to the dashboard.
+
+    Returns:
+        Tuple of (devices added, records rejected)
+    """
+    devices, failures = device_factory.create_devices(records)
+    for index, detail in failures:
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append(ImportErrorItem(line=lines[index], detail=detail))
+
+    rejected = dashboard.add_devices(devices)
+    if rejected and len(errors) < IMPORT_MAX_ERRORS:
+        # Devices keep the order of their records, so map back by position
+        failed_indexes = {index for index, _ in failures}
+        created_lines = [line for index, line in enumerate(lines) if index not in failed_indexes]
+        line_of = {id(device): line for device, line in zip(devices, created_lines)}
+        for device in rejected[:IMPORT_MAX_ERRORS - len(errors)]:
+            errors.append(ImportErrorItem(line=line_of[id(device)], detail="Device already exists"))
+    return len(devices) - len(rejected), len(failures) + len(rejected)
+
+
+@router.post(
+    "/import",
+    response_model=ImportResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def import_devices(
+    request: Request,
+    session_id: str = Query(..., description="Session ID"),
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$", description="Overrides the Content-Type")
+):
+    """
+    Bulk import devices from an NDJSON or CSV upload.
+
+    Each record has device_type and device_name and optionally device_id
+    and room; CSV files start with a header row naming these columns. The
+    body is parsed as it streams in and devices are added in chunks of
+    IMPORT_BATCH_SIZE, so memory stays flat however large the file is. Bad
+    records are skipped and reported by line number. A line that cannot be
+    read (too long or not UTF-8) stops the import; devices before it are
+    kept and the response has ``complete`` set to false. Progress
+    notifications are sent every IMPORT_PROGRESS_EVERY devices.
+    """
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        import_format = _import_format(fmt, request.headers.get("content-type"))
+
         dashboard = dashboards_db.get(user.user_id)
 
         if not dashboard:
+            dashboard = Dashboard(user.user_id)
+            dashboards_db[user.user_id] = dashboard
+
+        imported = 0
+        failed = 0
+        errors: List[ImportErrorItem] = []
+        records: List[Dict[str, Any]] = []
+        lines: List[int] = []
+        next_progress = IMPORT_PROGRESS_EVERY
+        complete = True
+
+        try:
+            async for line_no, record, error in parse_records(request.stream(), import_format):
+                if record is None:
+                    failed += 1
+                    if len(errors) < IMPORT_MAX_ERRORS:
+                        errors.append(ImportErrorItem(line=line_no, detail=error))
+                    continue
+                records.append(record)
+                lines.append(line_no)
+                if len(records) < IMPORT_BATCH_SIZE:
+                    continue
+
+                added, rejected = _import_chunk(dashboard, records, lines, errors)
+                imported += added
+                failed += rejected
+                records, lines = [], []
+                if imported >= next_progress:
+                    notification_service.send_notification(
+                        f"Importing devices: {imported} added so far",
+                        "",
+                        "devices_import_progress"
+                    )
+                    next_progress = imported + IMPORT_PROGRESS_EVERY
+        except ImportStreamError as e:
+            # Earlier chunks are already added, so report them rather than
+            # failing the whole request
+            complete = False
+            failed += 1
+            errors.append(ImportErrorItem(line=e.line, detail=f"{e}; import stopped"))
+
+        if records:
+            added, rejected = _import_chunk(dashboard, records, lines, errors)
+            imported += added
+            failed += rejected
+
+        # Send notification
+        notification_service.send_notification(
+            f"Imported {imported} devices, {failed} failed",
+            "",
+            "devices_imported"
+        )
+
+        return ImportResponse(imported=imported, failed=failed, errors=errors, complete=complete)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to import devices: {str(e)}"
+        )
+
+
+@router.get("/rooms", response_model=List[RoomResponse])
+async def get_rooms(session_id: str = Query(..., description="Session ID")):
+    """Get the user's rooms with device counts and average brightness."""
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Dashboard not found"
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
             )
 
-        device = dashboard.get_device(device_id)
+        dashboard = dashboards_db.get(user.user_id)
 
-        if not device:
+        if not dashboard:
+            return []
+
+        return [RoomResponse(room=room, **rollup) for room, rollup in dashboard.get_rooms().items()]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve rooms: {str(e)}"
+        )
+
+
+@router.post("/rooms/{room}/command", response_model=BatchCommandResponse)
+async def run_room_command(room: str, request: RoomCommandRequest, session_id: str = Query(..., description="Session ID")):
+    """
+    Run one command on every device in a room.
+
+    Light actions (toggle, set_brightness) apply to the room's lights only.
+    Sends one notification for the room.
+    """
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Device not found"
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
             )
 
-        if not isinstance(device, Light):
+        dashboard = dashboards_db.get(user.user_id)
+        devices = dashboard.get_room_devices(room) if dashboard else []
+
+        if not devices:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Device is not a light"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Room not found"
             )
 
-        if device.set_brightness(request.brightness):
+        if request.action in ("toggle", "set_brightness"):
+            devices = [device for device in devices if isinstance(device, Light)]
+
+        results, succeeded = _run_commands(dashboard, [
+            DeviceCommand(device_id=device.device_id, action=request.action, brightness=request.brightness)
+            for device in devices
+        ])
+        failed = len(results) - succeeded
+        if succeeded:
             # Send notification
             notification_service.send_notification(
-                f"Light '{device.device_name}' brightness set to {request.brightness}%",
-                device.device_id,
-                "brightness_changed"
+                f"Room '{room}': {request.action} applied to {succeeded} device(s)",
+                "",
+                "room_command"
             )
 
-            return device.to_dict()
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid brightness level"
-            )
+        return BatchCommandResponse(succeeded=succeeded, failed=failed, results=results)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to set brightness: {str(e)}"
+            detail=f"Failed to run room command: {str(e)}"
         )
 
 
-@router.post("/{device_id}/toggle", response_model=ToggleResponse)
-async def toggle_device(device_id: str, session_id: str = Query(..., description="Session ID")):
-    """Toggle a light device on/off."""
+@router.put("/{device_id}/room", response_model=DeviceResponse)
+async def set_device_room(device_id: str, request: RoomAssignmentRequest, session_id: str = Query(..., description="Session ID")):
+    """Move a device into a room, or out of its room with null."""
     try:
         user = get_user_from_session(session_id)
 
@@ -174,35 +712,58 @@ async def toggle_device(device_id: str, session_id: str = Query(..., description
             )
 
         dashboard = dashboards_db.get(user.user_id)
+        device = _get_device(dashboard, device_id)
+        dashboard.assign_room(device_id, request.room)
+        return device.to_dict()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to set room: {str(e)}"
+        )
 
-        if not dashboard:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Dashboard not found"
-            )
 
-        device = dashboard.get_device(device_id)
+@router.put("/{device_id}/light/brightness", response_model=DeviceResponse)
+async def set_light_brightness(device_id: str, request: BrightnessRequest, session_id: str = Query(..., description="Session ID")):
+    """Set brightness for a light device."""
+    try:
+        user = get_user_from_session(session_id)
 
-        if not device:
+        if not user:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Device not found"
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
             )
 
-        if not isinstance(device, Light):
+        device = _get_light(dashboards_db.get(user.user_id), device_id)
+
+        _set_brightness(device, request.brightness)
+        return device.to_dict()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to set brightness: {str(e)}"
+        )
+
+
+@router.post("/{device_id}/toggle", response_model=ToggleResponse)
+async def toggle_device(device_id: str, session_id: str = Query(..., description="Session ID")):
+    """Toggle a light device on/off."""
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Device is not a light"
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
             )
 
-        is_on = device.toggle()
+        device = _get_light(dashboards_db.get(user.user_id), device_id)
 
-        # Send notification
-        notification_service.send_notification(
-            f"Light '{device.device_name}' toggled {'on' if is_on else 'off'}",
-            device.device_id,
-            "device_toggled"
-        )
+        is_on = _toggle(device)
 
         return ToggleResponse(
             device_id=device.device_id,
@@ -239,7 +800,9 @@ async def delete_device(device_id: str, session_id: str = Query(..., description
             )
 
         if dashboard.remove_device(device_id):
-            return {"success": True, "message": "Device removed successfully"}
+            # Its scheduled tasks would only fail from now on
+            cancelled = scheduler.cancel_device_tasks(device_id, user.user_id)
+            return {"success": True, "message": "Device removed successfully", "cancelled_tasks": cancelled}
         else:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -253,3 +816,130 @@ async def delete_device(device_id: str, session_id: str = Query(..., description
             detail=f"Failed to delete device: {str(e)}"
         )
 
+
+def _snapshot_message(user_id: str) -> str:
+    """Encode a full device snapshot for a WebSocket client."""
+    dashboard = dashboards_db.get(user_id)
+    if not dashboard:
+        return '{"type":"snapshot","epoch":"","version":0,"devices":[]}'
+    return (f'{{"type":"snapshot","epoch":"{dashboard.epoch}","version":{dashboard.version},'
+            f'"devices":{dashboard.display_devices_json().decode("utf-8")}}}')
+
+
+def _run_socket_command(session_id: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one command received over the device WebSocket.
+
+    Args:
+        session_id: Session the socket was opened with
+        command: Decoded message with action, device_id and optional
+            brightness and id
+
+    Returns:
+        Dict: Result message echoing the command's id
+    """
+    result: Dict[str, Any] = {"type": "result", "id": command.get("id")}
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        action = command.get("action")
+        device = _get_light(dashboards_db.get(user.user_id), str(command.get("device_id")))
+        if action == "toggle":
+            _toggle(device)
+        elif action == "set_brightness":
+            request = BrightnessRequest(brightness=command.get("brightness"))
+            _set_brightness(device, request.brightness)
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown action: {action}"
+            )
+        result.update(ok=True, device=device.to_dict())
+    except HTTPException as e:
+        result.update(ok=False, status=e.status_code, error=e.detail)
+    except ValidationError:
+        result.update(ok=False, status=status.HTTP_400_BAD_REQUEST, error="Invalid brightness level")
+    return result
+
+
+async def _push_changes(websocket: WebSocket, subscription: DeviceSubscription) -> None:
+    """Send queued device changes, or a new snapshot after an overflow."""
+    while True:
+        message = await subscription.queue.get()
+        if message is RESYNC:
+            message = _snapshot_message(subscription.user_id)
+        await websocket.send_text(message)
+
+
+async def _receive_commands(websocket: WebSocket, session_id: str, subscription: DeviceSubscription) -> None:
+    """Run commands sent by the client until it disconnects."""
+    while True:
+        text = await websocket.receive_text()
+        try:
+            command = json.loads(text)
+            if not isinstance(command, dict):
+                raise ValueError("command must be an object")
+        except ValueError:
+            await websocket.send_text(json.dumps({
+                "type": "result", "id": None, "ok": False,
+                "status": status.HTTP_400_BAD_REQUEST, "error": "Invalid JSON command"
+            }))
+            continue
+        if command.get("action") == "snapshot":
+            # Sent in order with the pushed changes
+            subscription.offer(RESYNC)
+            continue
+        result = _run_socket_command(session_id, command)
+        await websocket.send_text(json.dumps(result, separators=(",", ":")))
+        if result.get("status") == status.HTTP_401_UNAUTHORIZED:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+
+@router.websocket("/ws")
+async def device_socket(websocket: WebSocket, session_id: str = Query(..., description="Session ID")):
+    """
+    Push device state to the client instead of polling GET /devices.
+
+    Sends a ``snapshot`` message, then one ``device`` message per change
+    (op added, updated or removed, with the dashboard epoch and new
+    version). Clients ignore changes whose version is not newer than their
+    snapshot's, unless the epoch differs: the dashboard was reloaded and
+    its version restarted, so the client should ask for a new snapshot. A
+    client that falls too far behind is sent a new snapshot.
+
+    The client may send ``{"action": "toggle" | "set_brightness",
+    "device_id": ..., "brightness": ..., "id": ...}`` and receives a
+    ``result`` message with the same id, or ``{"action": "snapshot"}`` to
+    be sent a new snapshot.
+    """
+    user = get_user_from_session(session_id)
+    if not user:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = device_hub.subscribe(user.user_id)
+    tasks = []
+    try:
+        await websocket.send_text(_snapshot_message(user.user_id))
+        tasks = [
+            asyncio.create_task(_push_changes(websocket, subscription)),
+            asyncio.create_task(_receive_commands(websocket, session_id, subscription))
+        ]
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not isinstance(task.exception(), WebSocketDisconnect):
+                task.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        device_hub.unsubscribe(subscription)
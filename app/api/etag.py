@@ -0,0 +1,80 @@
+"""ETag helpers for conditional GET on polled endpoints.
+
+Polled resources carry version counters, so a route can build its ETag
+from a few integers and answer ``If-None-Match`` with 304 Not Modified
+before it serializes anything.
+"""
+from typing import Optional
+from fastapi import Response, status
+
+# Clients must revalidate on every poll, which lets browsers send
+# If-None-Match on their own and serve a 304 from their cache.
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Build a strong ETag from version components.
+
+    Args:
+        *parts: Values that together identify one representation
+
+    Returns:
+        str: Quoted entity tag
+    """
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against the current ETag.
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so
+    ``W/`` prefixed tags match too.
+
+    Args:
+        if_none_match: Raw header value, or None if absent
+        etag: Current entity tag
+
+    Returns:
+        bool: True if the client already has this representation
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Build an empty 304 response for a matching ETag.
+
+    Args:
+        etag: Current entity tag
+
+    Returns:
+        Response: 304 Not Modified carrying the ETag
+    """
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """
+    Attach the ETag and revalidation headers to a full response.
+
+    Args:
+        response: Response being returned
+        etag: Current entity tag
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,100 @@
+"""Pre-built JSON encoders for hot list endpoints.
+
+A route declared with ``response_model=List[Model]`` that returns plain
+objects has FastAPI validate and re-serialize every item. List endpoints
+whose items already have the model's shape can return a ListEncoder
+response instead: the model's fields are picked straight off each item and
+the whole list is encoded in one C-level ``json`` call. The route keeps its
+``response_model`` so the OpenAPI schema is unchanged.
+"""
+from typing import Any, Dict, Iterable, Tuple, Type
+import json
+
+from fastapi import Response
+from pydantic import BaseModel
+
+# Same output settings as FastAPI's JSONResponse
+_encode = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode
+
+
+class ListEncoder:
+    """
+    Encodes lists of dicts or objects shaped like one response model.
+
+    Optional fields an item lacks are written as the model's default,
+    mirroring how the model would fill them in. A missing required field
+    raises ValueError, as validating against the model would. Values are
+    not validated, so items must otherwise have the model's types.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        """
+        Initialize the encoder.
+
+        Args:
+            model: Response model whose fields, in order, are written
+        """
+        self.model = model
+        self.fields: Tuple[Tuple[str, bool, Any], ...] = tuple(
+            (name, True, None) if field.is_required()
+            else (name, False, field.get_default(call_default_factory=True))
+            for name, field in model.model_fields.items()
+        )
+
+    def _missing(self, name: Any) -> ValueError:
+        return ValueError(f"{self.model.__name__} item is missing required field {name}")
+
+    def encode_dicts(self, items: Iterable[Dict[str, Any]]) -> bytes:
+        """
+        Encode dicts such as ``to_dict()`` results; extra keys are dropped.
+
+        Args:
+            items: Dicts keyed by field name
+
+        Returns:
+            bytes: UTF-8 JSON array
+
+        Raises:
+            ValueError: If an item lacks a required field
+        """
+        fields = self.fields
+        try:
+            rows = [{name: item[name] if required else item.get(name, default)
+                     for name, required, default in fields} for item in items]
+        except KeyError as e:
+            raise self._missing(e) from None
+        return _encode(rows).encode("utf-8")
+
+    def encode_objects(self, items: Iterable[Any]) -> bytes:
+        """
+        Encode objects such as dataclass instances, reading fields as attributes.
+
+        Args:
+            items: Objects with the model's fields as attributes
+
+        Returns:
+            bytes: UTF-8 JSON array
+
+        Raises:
+            ValueError: If an item lacks a required field
+        """
+        fields = self.fields
+        try:
+            rows = [{name: getattr(item, name) if required else getattr(item, name, default)
+                     for name, required, default in fields} for item in items]
+        except AttributeError as e:
+            raise self._missing(repr(e.name)) from None
+        return _encode(rows).encode("utf-8")
+
+
+def json_response(content: bytes) -> Response:
+    """
+    Wrap pre-encoded JSON in a response FastAPI passes through as is.
+
+    Args:
+        content: Encoded JSON body
+
+    Returns:
+        Response: application/json response
+    """
+    return Response(content=content, media_type="application/json")
@@ -4,6 +4,7 @@ from pydantic import BaseModel, ConfigDict
 
 from app.models.integrations import IntegrationsService, IntegrationProtocol
 from app.api.storage import notification_service
+from app.api.fast_json import ListEncoder, json_response
 
 router = APIRouter(prefix="/integrations", tags=["integrations"])
 
@@ -35,6 +36,9 @@ class IntegrationStatsResponse(BaseModel):
     total_count: int
 
 
+INTEGRATION_LIST_ENCODER = ListEncoder(IntegrationResponse)
+
+
 def _to_response(integration: IntegrationProtocol) -> IntegrationResponse:
     """Convert an Integration to IntegrationResponse."""
     return IntegrationResponse.model_validate(integration)
@@ -64,7 +68,7 @@ def create_integration(request: IntegrationCreate):
 def get_integrations():
     """Get all integrations."""
     integrations = integrations_service.get_integrations()
-    return [_to_response(i) for i in integrations]
+    return json_response(INTEGRATION_LIST_ENCODER.encode_objects(integrations))
 
 
 @router.get("/stats", response_model=IntegrationStatsResponse)
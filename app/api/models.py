@@ -7,6 +7,10 @@ class LoginRequest(BaseModel):
     """Login request model."""
     username: str = Field(..., min_length=1, description="Username")
     password: str = Field(..., min_length=1, description="Password")
+    stateless: Optional[bool] = Field(
+        None,
+        description="Issue a signed session token instead of a server-side session (defaults to server setting)"
+    )
 
 
 class LoginResponse(BaseModel):
@@ -31,12 +35,57 @@ class DeviceResponse(BaseModel):
     status: str
     brightness: Optional[int] = None
     is_on: Optional[bool] = None
+    room: Optional[str] = None
+
+
+class DeviceChangesResponse(BaseModel):
+    """Device changes since a dashboard version."""
+    epoch: str = Field(..., description="Dashboard instance; send back with the next request")
+    version: int = Field(..., description="Dashboard version these changes bring the client to")
+    full: bool = Field(..., description="True if devices is a full snapshot replacing the client's list")
+    devices: List[DeviceResponse] = Field(default_factory=list, description="Devices added or updated")
+    removed: List[str] = Field(default_factory=list, description="IDs of removed devices")
 
 
 class CreateDeviceRequest(BaseModel):
     """Create device request model."""
     device_type: str = Field(..., description="Type of device (light, thermostat, security_camera)")
     device_name: str = Field(..., min_length=1, description="Name of the device")
+    room: Optional[str] = Field(None, min_length=1, description="Room to place the device in")
+
+
+class ImportErrorItem(BaseModel):
+    """A record that could not be imported."""
+    line: int
+    detail: str
+
+
+class ImportResponse(BaseModel):
+    """Bulk import summary."""
+    imported: int
+    failed: int
+    errors: List[ImportErrorItem] = Field(default_factory=list, description="First errors, by line")
+    complete: bool = Field(True, description="False if an unreadable line stopped the import; "
+                                             "devices before it were still added")
+
+
+class RoomAssignmentRequest(BaseModel):
+    """Room assignment request model."""
+    room: Optional[str] = Field(..., min_length=1, description="Room name, or null to remove the device from its room")
+
+
+class RoomCommandRequest(BaseModel):
+    """Command for every device in a room."""
+    action: str = Field(..., description="Action to perform (turn_on, turn_off, toggle, set_brightness)")
+    brightness: Optional[int] = Field(None, ge=0, le=100, description="Brightness level for set_brightness")
+
+
+class RoomResponse(BaseModel):
+    """Room response model with its rollup."""
+    room: str
+    device_count: int
+    on_count: int
+    average_brightness: Optional[float] = None
 
 
 class BrightnessRequest(BaseModel):
@@ -51,12 +100,45 @@ class ToggleResponse(BaseModel):
     status: str
 
 
+class DeviceCommand(BaseModel):
+    """One command of a batch."""
+    device_id: str = Field(..., description="ID of the device")
+    action: str = Field(..., description="Action to perform (turn_on, turn_off, toggle, set_brightness)")
+    brightness: Optional[int] = Field(None, ge=0, le=100, description="Brightness level for set_brightness")
+
+
+class BatchCommandRequest(BaseModel):
+    """Batch device command request model."""
+    commands: List[DeviceCommand] = Field(..., min_length=1, max_length=5000, description="Commands, run in order")
+
+
+class BatchCommandResult(BaseModel):
+    """Outcome of one batch command."""
+    device_id: str
+    action: str
+    success: bool
+    detail: Optional[str] = None
+    device: Optional[DeviceResponse] = None
+
+
+class BatchCommandResponse(BaseModel):
+    """Batch device command response model."""
+    succeeded: int
+    failed: int
+    results: List[BatchCommandResult]
+
+
 class ScheduleTaskRequest(BaseModel):
     """Schedule task request model."""
     device_id: str = Field(..., description="ID of the device")
-    action: str = Field(..., description="Action to perform (turn_on, turn_off, set_brightness)")
+    action: str = Field(..., description="Action to perform (turn_on, turn_off, toggle, set_brightness)")
     scheduled_time: str = Field(..., description="ISO format datetime string")
     brightness: Optional[int] = Field(None, ge=0, le=100, description="Brightness level for lights")
+    recurrence: Optional[str] = Field(
+        None,
+        description="Cron expression (minute hour day month weekday) to repeat on, e.g. '0 7 * * 1-5'; "
+                    "scheduled_time is then when occurrences start"
+    )
 
 
 class TaskResponse(BaseModel):
@@ -66,4 +148,66 @@ class TaskResponse(BaseModel):
     action: str
     scheduled_time: str
     executed: bool
-
+    brightness: Optional[int] = None
+    recurrence: Optional[str] = None
+
+
+
+class PersistenceStatsResponse(BaseModel):
+    """Write-behind persistence statistics."""
+    flush_count: int
+    records_flushed: int
+    pending_records: int
+    last_flush_ms: float
+    avg_flush_ms: float
+    max_flush_ms: float
+
+
+class ExecutorStatsResponse(BaseModel):
+    """Scheduled task executor statistics."""
+    running: bool
+    pending: int
+    next_due: Optional[str] = None
+    executed: int
+    failed: int
+    mean_lateness_seconds: float = Field(..., description="Mean of dispatch time minus scheduled time")
+    max_lateness_seconds: float
+    last_lateness_seconds: Optional[float] = None
+
+
+class LeaseStatsResponse(BaseModel):
+    """Task lease statistics of one worker."""
+    worker_id: str
+    claimed: int
+    reclaimed: int = Field(..., description="Claims of occurrences whose earlier lease expired")
+    completed: int
+    lost: int = Field(..., description="Occurrences reclaimed by another worker before this one completed them")
+    open: int = Field(..., description="Occurrences not yet done, across all workers")
+    leased: int
+
+
+class DashboardCacheStatsResponse(BaseModel):
+    """Resident dashboard cache statistics."""
+    hits: int
+    misses: int
+    evictions: int
+    resident_dashboards: int
+    resident_devices: int
+
+
+class RetentionStatsResponse(BaseModel):
+    """Resident size and archive counts of a retention buffer."""
+    resident: int
+    max_count: int
+    max_age_seconds: Optional[float] = None
+    evicted: int = Field(..., description="Items that left the buffer by count or age")
+    archived: int
+    archive_pending: int = Field(..., description="Evicted items not yet written to the archive")
+    archive_enabled: bool
+
+
+class SchedulerRetentionResponse(BaseModel):
+    """Resident scheduled task counts and executed task retention."""
+    tasks: int
+    pending: int
+    executed: Optional[RetentionStatsResponse] = None
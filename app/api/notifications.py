@@ -1,19 +1,110 @@
 """Notifications endpoints."""
-from fastapi import APIRouter, HTTPException, status, Query
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, status, Query, Response, Header
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional, Callable, AsyncIterator
+import json
 
 from app.api.storage import notification_service
 from app.api.auth import get_user_from_session
+from app.api.etag import make_etag, etag_matches, not_modified, set_etag
+from app.api.models import RetentionStatsResponse
+from app.models.notification_service import StreamObserver
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
+# Event stream settings
+SSE_HEARTBEAT_SECONDS = 15.0
+SSE_SHARED_POLL_SECONDS = 1.0  # how often other workers' events are picked up
+SSE_REPLAY_LIMIT = 100  # events read from history per query
+SSE_MAX_PENDING = 100  # buffered events per client before the oldest are dropped
+SSE_RETRY_MS = 2000
+
+
+def format_event(notification: Dict[str, Any]) -> str:
+    """Encode a notification as a Server-Sent Event carrying its ID."""
+    return f"id: {notification['id']}\ndata: {json.dumps(notification, separators=(',', ':'))}\n\n"
+
+
+async def notification_events(
+    last_event_id: Optional[int],
+    is_authorized: Callable[[], bool],
+    heartbeat: float = SSE_HEARTBEAT_SECONDS
+) -> AsyncIterator[str]:
+    """
+    Generate the notification event stream for one client.
+
+    Replays history after ``last_event_id`` and then forwards new events
+    as they are sent. Events dropped from the client's buffer, and events
+    recorded by other workers when history is shared, are re-read from
+    history by ID. The stream ends when the session is no longer valid.
+
+    Args:
+        last_event_id: ID of the last event the client has seen, or None
+            to start with the next event
+        is_authorized: Checked on every heartbeat
+        heartbeat: Seconds between keep-alive comments on an idle stream
+    """
+    observer = StreamObserver(max_pending=SSE_MAX_PENDING)
+    notification_service.subscribe(observer)
+    try:
+        latest = notification_service.latest_event_id()
+        if last_event_id is None:
+            last_event_id = latest
+        elif last_event_id > latest:
+            # IDs from an earlier history (e.g. before a restart)
+            last_event_id = max(0, latest - SSE_REPLAY_LIMIT)
+
+        shared = notification_service.backend is not None
+        timeout = min(heartbeat, SSE_SHARED_POLL_SECONDS) if shared else heartbeat
+        dropped = 0
+        idle = 0.0
+        replay = True
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+
+        while True:
+            if replay:
+                while True:
+                    batch = notification_service.events_since(last_event_id, SSE_REPLAY_LIMIT)
+                    for notification in batch:
+                        yield format_event(notification)
+                    if batch:
+                        last_event_id = batch[-1]["id"]
+                    if len(batch) < SSE_REPLAY_LIMIT:
+                        break
+                replay = False
+
+            events = await observer.next_events(timeout)
+            if observer.dropped != dropped:
+                dropped = observer.dropped
+                replay = True
+                continue
+            if not events:
+                replay = shared
+                idle += timeout
+                if idle >= heartbeat:
+                    idle = 0.0
+                    if not is_authorized():
+                        return
+                    yield ": keepalive\n\n"
+                continue
+
+            idle = 0.0
+            for event in events:
+                if event.event_id is not None and event.event_id > last_event_id:
+                    last_event_id = event.event_id
+                    yield format_event(event.to_dict())
+    finally:
+        notification_service.unsubscribe(observer)
+
 
 @router.get("", response_model=List[Dict[str, Any]])
 async def get_notifications(
+    response: Response,
     session_id: str = Query(..., description="Session ID"),
-    limit: int = Query(20, ge=1, le=100, description="Maximum number of notifications to return")
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of notifications to return"),
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get recent notifications for the logged-in user."""
+    """Get recent notifications for the logged-in user. Supports If-None-Match."""
     try:
         user = get_user_from_session(session_id)
 
@@ -23,7 +114,12 @@ async def get_notifications(
                 detail="Invalid session. Please login."
             )
 
+        etag = make_etag(notification_service.history_version(), limit)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
         notifications = notification_service.get_notifications(limit)
+        set_etag(response, etag)
         return notifications
     except HTTPException:
         raise
@@ -33,3 +129,91 @@ async def get_notifications(
             detail=f"Failed to retrieve notifications: {str(e)}"
         )
 
+
+@router.get("/archive", response_model=List[Dict[str, Any]])
+async def get_archived_notifications(
+    session_id: str = Query(..., description="Session ID"),
+    after: int = Query(0, ge=0, description="archive_id of the last notification already read"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of notifications to return")
+):
+    """Page through notifications that aged out of history, oldest first."""
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        return notification_service.get_archived_notifications(after, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve archived notifications: {str(e)}"
+        )
+
+
+@router.get("/retention", response_model=RetentionStatsResponse)
+async def get_notification_retention(session_id: str = Query(..., description="Session ID")):
+    """Get resident history size and archive counts."""
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        return RetentionStatsResponse(**notification_service.retention_stats())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve retention stats: {str(e)}"
+        )
+
+
+@router.get("/stream")
+async def stream_notifications(
+    session_id: str = Query(..., description="Session ID"),
+    last_event_id: Optional[int] = Query(None, ge=0, description="Resume after this event ID"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Stream notifications as Server-Sent Events.
+
+    Each event's ``id`` is its notification ID, so a reconnecting
+    EventSource resumes from its Last-Event-ID header without re-fetching
+    history. The ``last_event_id`` query parameter does the same for the
+    first connection.
+    """
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        resume = last_event_id
+        if last_event_id_header and last_event_id_header.isdigit():
+            resume = int(last_event_id_header)
+
+        return StreamingResponse(
+            notification_events(resume, lambda: get_user_from_session(session_id) is not None),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to open notification stream: {str(e)}"
+        )
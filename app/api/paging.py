@@ -0,0 +1,51 @@
+"""Cursor helpers for paged list endpoints.
+
+A cursor is ``<epoch>.<seq>``: the sequence number of the last item on the
+previous page, tagged with the epoch of the structure that issued it, so a
+cursor from before a reload or restart is rejected instead of skipping or
+repeating items.
+"""
+from typing import Optional
+from fastapi import HTTPException, Response, status
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def parse_cursor(cursor: Optional[str], epoch: str) -> int:
+    """
+    Decode a page cursor.
+
+    Args:
+        cursor: Cursor from the previous page, or None for the first page
+        epoch: Epoch of the structure being paged
+
+    Returns:
+        int: Sequence number to continue after; 0 for the first page
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or was issued for
+            another epoch, in which case paging restarts
+    """
+    if not cursor:
+        return 0
+    cursor_epoch, _, seq = cursor.partition(".")
+    if cursor_epoch != epoch or not seq.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid or expired cursor. Start again from the first page."
+        )
+    return int(seq)
+
+
+def set_next_cursor(response: Response, epoch: str, next_seq: Optional[int]) -> None:
+    """
+    Attach the next page's cursor while more items remain.
+
+    Args:
+        response: Response being returned
+        epoch: Epoch of the structure being paged
+        next_seq: Sequence number the next page starts after, or None
+    """
+    if next_seq is not None:
+        response.headers[NEXT_CURSOR_HEADER] = f"{epoch}.{next_seq}"
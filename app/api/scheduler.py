@@ -1,19 +1,68 @@
 """Scheduler endpoints."""
-from fastapi import APIRouter, HTTPException, status, Query
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Query, Header
+from typing import Any, Dict, List, Optional
 import uuid
 
-from app.api.models import ScheduleTaskRequest, TaskResponse
-from app.api.storage import dashboards_db, scheduler, notification_service
+from app.api.models import (
+    DeviceCommand,
+    ExecutorStatsResponse,
+    LeaseStatsResponse,
+    ScheduleTaskRequest,
+    SchedulerRetentionResponse,
+    TaskResponse
+)
+from app.api.storage import dashboards_db, scheduler, notification_service, task_leases
 from app.api.auth import get_user_from_session
+from app.api.devices import COMMAND_ACTIONS, LIGHT_ACTIONS, apply_command
+from app.api.etag import make_etag, etag_matches, not_modified, set_etag
+from app.api.fast_json import ListEncoder, json_response
+from app.api.paging import parse_cursor, set_next_cursor
+from app.models.device import Light
 from app.models.scheduler import ScheduledTask
+from app.models.task_executor import TaskExecutor
 
 router = APIRouter(prefix="/schedule", tags=["Scheduler"])
 
+TASK_LIST_ENCODER = ListEncoder(TaskResponse)
+
+
+def run_scheduled_task(task: ScheduledTask) -> bool:
+    """
+    Apply a due task's action to its device and report the outcome.
+
+    Returns:
+        bool: True if the action was applied
+    """
+    dashboard = dashboards_db.get(task.user_id) if task.user_id else None
+    command = DeviceCommand(device_id=task.device_id, action=task.action, brightness=task.brightness)
+    try:
+        device = apply_command(dashboard, command)
+    except HTTPException as e:
+        notification_service.send_notification(
+            f"Scheduled task '{task.action}' for device {task.device_id} failed: {e.detail}",
+            task.device_id,
+            "task_failed"
+        )
+        return False
+
+    notification_service.send_notification(
+        f"Scheduled task '{task.action}' ran on device '{device.device_name}'",
+        device.device_id,
+        "task_executed"
+    )
+    return True
+
+
+# Started and stopped by the application lifespan
+task_executor = TaskExecutor(scheduler, run_scheduled_task, leases=task_leases)
+
 
 @router.get("", response_model=List[TaskResponse])
-async def get_scheduled_tasks(session_id: str = Query(..., description="Session ID")):
-    """Get all scheduled tasks."""
+async def get_scheduled_tasks(
+    session_id: str = Query(..., description="Session ID"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get the caller's scheduled tasks. Supports If-None-Match."""
     try:
         user = get_user_from_session(session_id)
 
@@ -23,8 +72,14 @@ async def get_scheduled_tasks(session_id: str = Query(..., description="Session
                 detail="Invalid session. Please login."
             )
 
-        tasks = scheduler.get_scheduled_tasks()
-        return tasks
+        etag = make_etag(scheduler.epoch, user.user_id, scheduler.user_version(user.user_id))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        tasks = scheduler.get_user_tasks(user.user_id)
+        full = json_response(TASK_LIST_ENCODER.encode_objects(tasks))
+        set_etag(full, etag)
+        return full
     except HTTPException:
         raise
     except Exception as e:
@@ -63,20 +118,43 @@ async def create_scheduled_task(request: ScheduleTaskRequest, session_id: str =
                 detail="Device not found"
             )
 
+        # Checked now rather than failing each time the task runs
+        if request.action not in COMMAND_ACTIONS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown action: {request.action}"
+            )
+
+        if request.action in LIGHT_ACTIONS and not isinstance(device, Light):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Device is not a light"
+            )
+
+        if request.action == "set_brightness" and request.brightness is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="brightness is required for set_brightness"
+            )
+
         # Create task
         task_id = str(uuid.uuid4())
         task = ScheduledTask(
             task_id=task_id,
             device_id=request.device_id,
             action=request.action,
-            scheduled_time=request.scheduled_time
+            scheduled_time=request.scheduled_time,
+            brightness=request.brightness,
+            user_id=user.user_id,
+            recurrence=request.recurrence
         )
 
         scheduler.schedule_task(task)
 
         # Send notification
+        when = f"on '{task.recurrence}' from {task.scheduled_time}" if task.recurrence else f"at {request.scheduled_time}"
         notification_service.send_notification(
-            f"Task scheduled for device '{device.device_name}' at {request.scheduled_time}",
+            f"Task scheduled for device '{device.device_name}' {when}",
             device.device_id,
             "task_scheduled"
         )
@@ -84,6 +162,11 @@ async def create_scheduled_task(request: ScheduleTaskRequest, session_id: str =
         return task.to_dict()
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -91,6 +174,161 @@ async def create_scheduled_task(request: ScheduleTaskRequest, session_id: str =
         )
 
 
+@router.get("/devices/{device_id}", response_model=List[TaskResponse])
+async def get_device_tasks(
+    device_id: str,
+    session_id: str = Query(..., description="Session ID"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; the X-Next-Cursor header holds the next page's cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page")
+):
+    """Get the scheduled tasks of one device, in scheduling order."""
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        tasks, next_seq = scheduler.get_device_tasks(
+            device_id,
+            user.user_id,
+            after=parse_cursor(cursor, scheduler.epoch),
+            limit=limit
+        )
+        page = json_response(TASK_LIST_ENCODER.encode_objects(tasks))
+        set_next_cursor(page, scheduler.epoch, next_seq)
+        return page
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve device tasks: {str(e)}"
+        )
+
+
+@router.delete("/devices/{device_id}")
+async def cancel_device_tasks(device_id: str, session_id: str = Query(..., description="Session ID")):
+    """Cancel every scheduled task of one device."""
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        cancelled = scheduler.cancel_device_tasks(device_id, user.user_id)
+        return {"success": True, "cancelled": cancelled}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to cancel device tasks: {str(e)}"
+        )
+
+
+@router.get("/executor/stats", response_model=ExecutorStatsResponse)
+async def get_executor_stats(session_id: str = Query(..., description="Session ID")):
+    """Get scheduled task executor counts and lateness."""
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        return task_executor.stats()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve executor stats: {str(e)}"
+        )
+
+
+@router.get("/leases/stats", response_model=LeaseStatsResponse)
+async def get_lease_stats(session_id: str = Query(..., description="Session ID")):
+    """Get this worker's task lease counts and the shared backlog."""
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        if task_leases is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task leases are not enabled"
+            )
+        return LeaseStatsResponse(**task_leases.stats())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve lease stats: {str(e)}"
+        )
+
+
+@router.get("/archive", response_model=List[Dict[str, Any]])
+async def get_archived_tasks(
+    session_id: str = Query(..., description="Session ID"),
+    after: int = Query(0, ge=0, description="archive_id of the last task already read"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of tasks to return")
+):
+    """Page through the caller's executed tasks that left retention, oldest first."""
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        return scheduler.get_archived_tasks(user.user_id, after, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve archived tasks: {str(e)}"
+        )
+
+
+@router.get("/retention", response_model=SchedulerRetentionResponse)
+async def get_scheduler_retention(session_id: str = Query(..., description="Session ID")):
+    """Get resident task counts and executed task retention."""
+    try:
+        user = get_user_from_session(session_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session. Please login."
+            )
+
+        return SchedulerRetentionResponse(**scheduler.retention_stats())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve retention stats: {str(e)}"
+        )
+
+
 @router.delete("/{task_id}")
 async def cancel_scheduled_task(task_id: str, session_id: str = Query(..., description="Session ID")):
     """Cancel a scheduled task."""
@@ -103,7 +341,12 @@ async def cancel_scheduled_task(task_id: str, session_id: str = Query(..., descr
                 detail="Invalid session. Please login."
             )
 
-        if scheduler.cancel_task(task_id):
+        # Tasks from before tasks had owners can be cancelled by anyone
+        task = scheduler.get_task(task_id)
+        if task is not None and task.user_id not in (None, user.user_id):
+            task = None
+
+        if task is not None and scheduler.cancel_task(task_id):
             return {"success": True, "message": "Task cancelled successfully"}
         else:
             raise HTTPException(
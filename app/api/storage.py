@@ -1,30 +1,151 @@
-"""In-memory storage and initialization for the API."""
+"""Storage and initialization for the API.
+
+State lives in memory by default. Set STORAGE_URL to keep dashboards,
+scheduled tasks, notifications and token revocations in a backend:
+``sqlite:///smart_home.db`` is shared by several worker processes, and
+``journal:///var/lib/smart_home`` is a single-process snapshot + journal
+store that recovers quickly after a restart.
+"""
 from typing import Dict
+import os
+import secrets
 from app.models.user import User
 from app.models.device import Light
 from app.models.dashboard import Dashboard
 from app.models.scheduler import Scheduler
 from app.models.device_factory import DeviceFactory
 from app.models.notification_service import NotificationService
+from app.models.session_store import SessionStore
+from app.models.session_token import SessionTokenSigner, RevocationList
+from app.models.storage_backend import create_backend, MemoryBackend
+from app.models.dashboard_repository import DashboardRepository
+from app.models.write_behind import WriteBehindWriter
+from app.models.device_hub import DeviceHub
+from app.models.retention import RetentionBuffer
+from app.models.task_leases import TaskLeaseCoordinator
+
+# Session lifetime settings
+SESSION_IDLE_TTL_SECONDS = 30 * 60
+SESSION_ABSOLUTE_TTL_SECONDS = 24 * 60 * 60
+MAX_SESSIONS = 100_000
+SESSION_SWEEP_INTERVAL_SECONDS = 60.0
+
+# Signed session tokens let any worker verify a session without shared state.
+# SESSION_SECRET must be set to the same value on every worker; the random
+# fallback only works for a single process.
+SESSION_SECRET = os.environ.get("SESSION_SECRET", "").encode("utf-8") or secrets.token_bytes(32)
+SESSION_TOKENS_DEFAULT = os.environ.get("SESSION_TOKENS", "").lower() in ("1", "true", "yes")
+
+STORAGE_URL = os.environ.get("STORAGE_URL", "")
+
+# Pending scheduled tasks are kept in a min-heap ("heap") or a hierarchical
+# timing wheel ("wheel") for large numbers of short-horizon tasks.
+SCHEDULER_QUEUE = os.environ.get("SCHEDULER_QUEUE", "heap")
+
+# Workers run every due task they know of unless SCHEDULER_LEASE_DB names a
+# SQLite file they share; each task occurrence is then leased to one of them.
+SCHEDULER_LEASE_DB = os.environ.get("SCHEDULER_LEASE_DB", "")
+SCHEDULER_LEASE_SECONDS = 30.0
+
+# Device changes are written behind the request: flushed in one batch once
+# this many devices are dirty, or after the interval at the latest.
+PERSIST_MAX_BATCH = 500
+PERSIST_FLUSH_INTERVAL_SECONDS = 1.0
+
+# Dashboards are loaded on first access; idle ones are evicted once either
+# budget is exceeded so resident memory follows active users.
+MAX_RESIDENT_DASHBOARDS = int(os.environ.get("MAX_RESIDENT_DASHBOARDS", "10000"))
+MAX_RESIDENT_DEVICES = int(os.environ.get("MAX_RESIDENT_DEVICES", "1000000"))
+
+# Executed tasks and notifications are kept in ring buffers, or in the
+# shared notification log, bounded by count and age. Set
+# RETENTION_ARCHIVE_URL (e.g. sqlite:///archive.db) to move what leaves them
+# into a pageable archive instead of dropping it.
+TASK_RETENTION_COUNT = int(os.environ.get("TASK_RETENTION_COUNT", "10000"))
+TASK_RETENTION_SECONDS = float(os.environ.get("TASK_RETENTION_SECONDS", str(7 * 24 * 3600)))
+NOTIFICATION_RETENTION_COUNT = int(os.environ.get("NOTIFICATION_RETENTION_COUNT", "1000"))
+NOTIFICATION_RETENTION_SECONDS = float(os.environ.get("NOTIFICATION_RETENTION_SECONDS", str(7 * 24 * 3600)))
+RETENTION_ARCHIVE_URL = os.environ.get("RETENTION_ARCHIVE_URL", "")
+
+# Undelivered WebSocket messages per client before it is sent a fresh
+# snapshot instead
+DEVICE_PUSH_MAX_PENDING = 256
+
+storage_backend = create_backend(STORAGE_URL)
+# Only persistent backends need to carry state that is per-process otherwise
+shared_backend = None if isinstance(storage_backend, MemoryBackend) else storage_backend
 
-# In-memory storage
 users_db: Dict[str, User] = {}
-dashboards_db: Dict[str, Dashboard] = {}
-scheduler = Scheduler()
-notification_service = NotificationService()
 device_factory = DeviceFactory.get_instance()
-current_sessions: Dict[str, str] = {}  # session_id -> user_id
+persistence_writer = WriteBehindWriter(
+    storage_backend,
+    max_batch=PERSIST_MAX_BATCH,
+    flush_interval=PERSIST_FLUSH_INTERVAL_SECONDS
+)
+dashboards_db = DashboardRepository(
+    storage_backend,
+    device_factory,
+    persistence_writer,
+    max_dashboards=MAX_RESIDENT_DASHBOARDS,
+    max_devices=MAX_RESIDENT_DEVICES
+)
+device_hub = DeviceHub(max_pending=DEVICE_PUSH_MAX_PENDING)
+dashboards_db.add_change_listener(device_hub.publish)
+archive_backend = create_backend(RETENTION_ARCHIVE_URL) if RETENTION_ARCHIVE_URL else None
+scheduler = Scheduler(
+    backend=shared_backend,
+    queue=SCHEDULER_QUEUE,
+    retention=RetentionBuffer(
+        TASK_RETENTION_COUNT,
+        max_age=TASK_RETENTION_SECONDS,
+        archive=archive_backend,
+        log="task_archive",
+        partition=lambda task: task.user_id
+    )
+)
+task_leases = (
+    TaskLeaseCoordinator(SCHEDULER_LEASE_DB, lease_seconds=SCHEDULER_LEASE_SECONDS)
+    if SCHEDULER_LEASE_DB else None
+)
+notification_service = NotificationService(
+    backend=shared_backend,
+    retention=RetentionBuffer(
+        NOTIFICATION_RETENTION_COUNT,
+        max_age=NOTIFICATION_RETENTION_SECONDS,
+        archive=archive_backend,
+        log="notification_archive"
+    )
+)
+session_store = SessionStore(
+    idle_ttl=SESSION_IDLE_TTL_SECONDS,
+    absolute_ttl=SESSION_ABSOLUTE_TTL_SECONDS,
+    max_sessions=MAX_SESSIONS
+)
+session_signer = SessionTokenSigner(
+    SESSION_SECRET,
+    ttl=SESSION_ABSOLUTE_TTL_SECONDS,
+    revocations=RevocationList(backend=shared_backend)
+)
 
 
 def initialize_default_data():
     """Initialize with default user and devices."""
     default_user = User("user1", "admin", "password123")
     users_db["admin"] = default_user
+    session_store.register_user(default_user)
+    scheduler.restore()
+
+    # A shared backend may already hold the dashboard from an earlier run
+    # or from another worker.
+    if "user1" in dashboards_db:
+        return
     dashboards_db["user1"] = Dashboard("user1")
 
     # Add some default devices
     default_light1 = Light("light1", "Living Room Light")
+    default_light1.room = "Living Room"
     default_light2 = Light("light2", "Bedroom Light")
+    default_light2.room = "Bedroom"
     dashboards_db["user1"].add_device(default_light1)
     dashboards_db["user1"].add_device(default_light2)
 
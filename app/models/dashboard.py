@@ -1,19 +1,306 @@
-from typing import List, Optional, Dict, Any
-from app.models.device import Device
+from typing import List, Optional, Dict, Any, Callable, Sequence, Tuple
+from collections import deque
+import bisect
+import json
+import uuid
+from app.models.device import Device, DeviceStatus
+
+# Change operations reported to dashboard listeners
+DEVICE_ADDED = "added"
+DEVICE_UPDATED = "updated"
+DEVICE_REMOVED = "removed"
+
+DashboardListener = Callable[['Dashboard', str, Device], None]
+
+# Number of (version, device_id, op) entries kept for delta sync
+CHANGE_LOG_SIZE = 256
+
+
+def _encode(data: Dict[str, Any], fields: Optional[Tuple[str, ...]]) -> bytes:
+    """Encode one device dict the way Starlette's JSONResponse would."""
+    if fields is not None:
+        data = {field: data.get(field) for field in fields}
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class RoomRollup:
+    """Aggregates for the devices in one room, kept up to date incrementally."""
+
+    __slots__ = ("device_count", "on_count", "lights_on", "brightness_total")
+
+    def __init__(self):
+        self.device_count = 0
+        self.on_count = 0
+        self.lights_on = 0
+        self.brightness_total = 0
+
+    def add(self, is_on: bool, brightness: Optional[int], sign: int = 1) -> None:
+        """
+        Add (or with sign=-1, remove) one device's contribution.
+
+        Args:
+            is_on: Whether the device is on
+            brightness: Brightness if the device is a light that is on
+            sign: 1 to add, -1 to remove
+        """
+        self.device_count += sign
+        if is_on:
+            self.on_count += sign
+        if brightness is not None:
+            self.lights_on += sign
+            self.brightness_total += sign * brightness
+
+    def average_brightness(self) -> Optional[float]:
+        """Average brightness of the room's lights that are on, if any."""
+        if not self.lights_on:
+            return None
+        return self.brightness_total / self.lights_on
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "device_count": self.device_count,
+            "on_count": self.on_count,
+            "average_brightness": self.average_brightness()
+        }
 
 
 class Dashboard:
     """Central controller for managing user devices."""
 
-    def __init__(self, user_id: str):
+    def __init__(self, user_id: str, change_log_size: int = CHANGE_LOG_SIZE):
         """
         Initialize a dashboard for a user.
 
         Args:
             user_id: User identifier this dashboard belongs to
+            change_log_size: Most recent changes kept for changes_since()
         """
         self.user_id = user_id
         self.devices: Dict[str, Device] = {}
+        # Bumped on every device add, removal or state change. The epoch
+        # tells this instance apart from the same dashboard loaded elsewhere
+        # (another process, or after eviction), whose version restarts at 0.
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:12]
+        # One (version, device_id, op) entry per version, oldest first
+        self._change_log: deque = deque(maxlen=change_log_size)
+        self._listeners: List[DashboardListener] = []
+        # Room index and rollups, updated on every device change
+        self._rooms: Dict[str, Dict[str, Device]] = {}
+        self._rollups: Dict[str, RoomRollup] = {}
+        # Secondary indexes: (field, value) -> sorted insertion sequence
+        # numbers of the matching devices, for filtered cursor pagination
+        self._next_seq = 1
+        self._by_seq: Dict[int, Device] = {}
+        self._all_seqs: List[int] = []
+        self._field_index: Dict[Tuple[str, Any], List[int]] = {}
+        # device_id -> (seq, room, status, light is_on, on for rollups, brightness for rollups)
+        self._indexed: Dict[str, Tuple[int, Optional[str], str, Optional[bool], bool, Optional[int]]] = {}
+        # fields -> (dashboard version, encoded list, device_id -> (device, version, encoded device))
+        self._json_cache: Dict[Optional[Tuple[str, ...]],
+                               Tuple[int, bytes, Dict[str, Tuple[Device, int, bytes]]]] = {}
+
+    def add_listener(self, listener: DashboardListener) -> None:
+        """
+        Register a callback for device changes.
+
+        The callback receives the dashboard, the operation (DEVICE_ADDED,
+        DEVICE_UPDATED or DEVICE_REMOVED) and the device.
+
+        Args:
+            listener: Callback to register
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: DashboardListener) -> None:
+        """
+        Unregister a device change callback.
+
+        Args:
+            listener: Callback to remove
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, op: str, device: Device) -> None:
+        """Bump the version, log the change and report it to all listeners."""
+        self.version += 1
+        self._change_log.append((self.version, device.device_id, op))
+        for listener in self._listeners:
+            listener(self, op, device)
+
+    def _on_device_changed(self, device: Device) -> None:
+        """Forward a state change of an owned device to listeners."""
+        self._index(device)
+        self._emit(DEVICE_UPDATED, device)
+
+    @staticmethod
+    def _insert_seq(seqs: List[int], seq: int) -> None:
+        """Insert into a sorted list; new devices have the highest seq."""
+        if not seqs or seqs[-1] < seq:
+            seqs.append(seq)
+        else:
+            bisect.insort(seqs, seq)
+
+    @staticmethod
+    def _delete_seq(seqs: List[int], seq: int) -> None:
+        del seqs[bisect.bisect_left(seqs, seq)]
+
+    def _index_add(self, field: str, value: Any, seq: int) -> None:
+        if value is not None:
+            self._insert_seq(self._field_index.setdefault((field, value), []), seq)
+
+    def _index_remove(self, field: str, value: Any, seq: int) -> None:
+        if value is None:
+            return
+        seqs = self._field_index[(field, value)]
+        self._delete_seq(seqs, seq)
+        if not seqs:
+            del self._field_index[(field, value)]
+
+    def _room_remove(self, room: str, device_id: str, is_on: bool, brightness: Optional[int]) -> None:
+        members = self._rooms[room]
+        del members[device_id]
+        if members:
+            self._rollups[room].add(is_on, brightness, sign=-1)
+        else:
+            del self._rooms[room]
+            del self._rollups[room]
+
+    def _index(self, device: Device) -> None:
+        """Move a device's entries in the indexes and rollups to its current state."""
+        status = device.status
+        light_on = getattr(device, "is_on", None)
+        is_on = status != DeviceStatus.OFF.value
+        brightness = getattr(device, "brightness", None) if is_on else None
+        room = device.room
+
+        previous = self._indexed.get(device.device_id)
+        if previous is None:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._by_seq[seq] = device
+            self._all_seqs.append(seq)
+            self._index_add("device_type", device.device_type, seq)
+            self._index_add("status", status, seq)
+            self._index_add("is_on", light_on, seq)
+        else:
+            seq, old_room, old_status, old_light_on, old_is_on, old_brightness = previous
+            # Most changes (e.g. brightness) leave the field indexes alone
+            if status != old_status:
+                self._index_remove("status", old_status, seq)
+                self._index_add("status", status, seq)
+            if light_on != old_light_on:
+                self._index_remove("is_on", old_light_on, seq)
+                self._index_add("is_on", light_on, seq)
+            if old_room is not None:
+                self._room_remove(old_room, device.device_id, old_is_on, old_brightness)
+
+        if room is not None:
+            self._rooms.setdefault(room, {})[device.device_id] = device
+            self._rollups.setdefault(room, RoomRollup()).add(is_on, brightness)
+        self._indexed[device.device_id] = (seq, room, status, light_on, is_on, brightness)
+
+    def _unindex(self, device: Device) -> None:
+        """Remove a device's entries from the indexes and rollups."""
+        indexed = self._indexed.pop(device.device_id, None)
+        if indexed is None:
+            return
+        seq, room, status, light_on, is_on, brightness = indexed
+        del self._by_seq[seq]
+        self._delete_seq(self._all_seqs, seq)
+        self._index_remove("device_type", device.device_type, seq)
+        self._index_remove("status", status, seq)
+        self._index_remove("is_on", light_on, seq)
+        if room is not None:
+            self._room_remove(room, device.device_id, is_on, brightness)
+
+    def query_devices(self, device_type: Optional[str] = None, status: Optional[str] = None,
+                      is_on: Optional[bool] = None, after: int = 0,
+                      limit: Optional[int] = None) -> Tuple[List[Device], Optional[int]]:
+        """
+        Get devices matching filters, one page at a time.
+
+        The most selective of the requested indexes is walked from the
+        cursor, so a page costs O(log n + page size) for a single filter
+        regardless of how many devices come before it. Devices come back
+        in the order they were added.
+
+        Args:
+            device_type: Only devices of this type
+            status: Only devices with this status
+            is_on: Only lights that are (or are not) on
+            after: Cursor from the previous page (0 for the first page)
+            limit: Page size (None for all remaining devices)
+
+        Returns:
+            Tuple of (devices, cursor for the next page or None if this is
+            the last page)
+        """
+        filters = [(field, value) for field, value in
+                   (("device_type", device_type), ("status", status), ("is_on", is_on)) if value is not None]
+        if filters:
+            candidates = min((self._field_index.get(key, []) for key in filters), key=len)
+        else:
+            candidates = self._all_seqs
+
+        devices: List[Device] = []
+        position = bisect.bisect_right(candidates, after)
+        while position < len(candidates):
+            if limit is not None and len(devices) == limit:
+                return devices, candidates[position - 1]
+            seq = candidates[position]
+            position += 1
+            device = self._by_seq[seq]
+            if all(self._matches(device, field, value) for field, value in filters):
+                devices.append(device)
+        return devices, None
+
+    @staticmethod
+    def _matches(device: Device, field: str, value: Any) -> bool:
+        return getattr(device, field, None) == value
+
+    def assign_room(self, device_id: str, room: Optional[str]) -> bool:
+        """
+        Move a device into a room.
+
+        Args:
+            device_id: ID of the device
+            room: Room name, or None to remove the device from its room
+
+        Returns:
+            bool: True if the device exists
+        """
+        device = self.devices.get(device_id)
+        if device is None:
+            return False
+        if device.room != room:
+            device.room = room
+            device._notify_changed()
+        return True
+
+    def get_rooms(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get every room with its rollup.
+
+        Returns:
+            Dict of room name -> device_count, on_count and
+            average_brightness (of the lights that are on)
+        """
+        return {room: rollup.to_dict() for room, rollup in self._rollups.items()}
+
+    def get_room_devices(self, room: str) -> List[Device]:
+        """
+        Get the devices in a room from the room index.
+
+        Args:
+            room: Room name
+
+        Returns:
+            List of devices, empty if the room does not exist
+        """
+        return list(self._rooms.get(room, {}).values())
 
     def display_devices(self) -> List[Dict[str, Any]]:
         """
@@ -24,6 +311,76 @@ class Dashboard:
         """
         return [device.to_dict() for device in self.devices.values()]
 
+    def display_devices_json(self, fields: Optional[Sequence[str]] = None) -> bytes:
+        """
+        Display all devices as an encoded JSON array.
+
+        The encoded list is cached until the dashboard version changes, and
+        each device's encoding is cached until that device's version
+        changes, so only changed devices are re-serialized.
+
+        Args:
+            fields: Keys to include for every device, in order; keys a device
+                does not have are encoded as null. All of to_dict() if None.
+
+        Returns:
+            bytes: UTF-8 JSON list of device objects
+        """
+        key = tuple(fields) if fields is not None else None
+        cached = self._json_cache.get(key)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+
+        previous = cached[2] if cached is not None else {}
+        encoded: Dict[str, Tuple[Device, int, bytes]] = {}
+        for device_id, device in self.devices.items():
+            entry = previous.get(device_id)
+            if entry is None or entry[0] is not device or entry[1] != device.version:
+                entry = (device, device.version, _encode(device.to_dict(), key))
+            encoded[device_id] = entry
+        body = b"[" + b",".join(entry[2] for entry in encoded.values()) + b"]"
+        self._json_cache[key] = (self.version, body, encoded)
+        return body
+
+    def changes_since(self, version: int) -> Optional[Tuple[List[Device], List[str]]]:
+        """
+        Get the devices that changed after a version.
+
+        Cost is proportional to the number of changes, not devices.
+
+        Args:
+            version: Dashboard version the caller is up to date with
+
+        Returns:
+            Tuple of (devices added or updated, IDs of removed devices), or
+            None if the change log no longer reaches back to that version
+            and the caller needs a full snapshot
+        """
+        if version > self.version or version < 0:
+            return None
+        if version == self.version:
+            return [], []
+        if not self._change_log or self._change_log[0][0] > version + 1:
+            return None
+
+        # Walk back from the newest entry; the first op seen for a device
+        # is its latest.
+        latest: Dict[str, str] = {}
+        for entry_version, device_id, op in reversed(self._change_log):
+            if entry_version <= version:
+                break
+            latest.setdefault(device_id, op)
+
+        changed: List[Device] = []
+        removed: List[str] = []
+        for device_id, op in latest.items():
+            device = self.devices.get(device_id)
+            if op == DEVICE_REMOVED or device is None:
+                removed.append(device_id)
+            else:
+                changed.append(device)
+        return changed, removed
+
     def refresh_status(self) -> List[Dict[str, Any]]:
         """
         Refresh and return the status of all devices.
@@ -48,8 +405,23 @@ class Dashboard:
             return False
 
         self.devices[device.device_id] = device
+        device._on_change = self._on_device_changed
+        self._index(device)
+        self._emit(DEVICE_ADDED, device)
         return True
 
+    def add_devices(self, devices: List[Device]) -> List[Device]:
+        """
+        Add a chunk of devices.
+
+        Args:
+            devices: Device instances to add
+
+        Returns:
+            List of devices that were not added because their ID exists
+        """
+        return [device for device in devices if not self.add_device(device)]
+
     def remove_device(self, device_id: str) -> bool:
         """
         Remove a device from the dashboard.
@@ -60,10 +432,13 @@ class Dashboard:
         Returns:
             bool: True if removed successfully, False if device not found
         """
-        if device_id in self.devices:
-            del self.devices[device_id]
-            return True
-        return False
+        device = self.devices.pop(device_id, None)
+        if device is None:
+            return False
+        device._on_change = None
+        self._unindex(device)
+        self._emit(DEVICE_REMOVED, device)
+        return True
 
     def get_device(self, device_id: str) -> Optional[Device]:
         """
@@ -0,0 +1,249 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict
+import threading
+
+from app.models.dashboard import Dashboard, DashboardListener, DEVICE_ADDED, DEVICE_REMOVED
+from app.models.device import Device
+from app.models.device_factory import DeviceFactory
+from app.models.storage_backend import StorageBackend
+from app.models.write_behind import WriteBehindWriter
+
+
+class DashboardRepository:
+    """
+    Dashboards persisted in a StorageBackend and loaded on demand.
+
+    Behaves like the ``Dict[str, Dashboard]`` it replaces (``get``, ``[]``,
+    ``in``). Each user's devices are stored as records in their own
+    namespace. A Dashboard object is built the first time it is requested
+    and kept in an LRU cache until it is evicted to stay within the resident
+    dashboard and device budgets, or until the namespace version shows that
+    another process changed it. Device changes are handed to a
+    WriteBehindWriter, and a dashboard with unflushed changes is written
+    back before it is evicted.
+    """
+
+    INDEX_NAMESPACE = "dashboards"
+
+    def __init__(self, backend: StorageBackend, factory: DeviceFactory,
+                 writer: Optional[WriteBehindWriter] = None,
+                 max_dashboards: Optional[int] = None, max_devices: Optional[int] = None):
+        """
+        Initialize the repository.
+
+        Args:
+            backend: Backend holding dashboard state
+            factory: Factory used to rebuild devices from records
+            writer: Write-behind writer for device changes; one flushing to
+                ``backend`` is created if not given
+            max_dashboards: Most dashboards kept resident (None for no limit)
+            max_devices: Most devices kept resident across all resident
+                dashboards, as a memory budget (None for no limit)
+        """
+        self.backend = backend
+        self.factory = factory
+        self.writer = writer or WriteBehindWriter(backend)
+        self.writer.add_flush_listener(self._on_flushed)
+        self.max_dashboards = max_dashboards
+        self.max_devices = max_devices
+        self._lock = threading.Lock()
+        # user_id -> (namespace version, dashboard), least recently used first
+        self._cache: "OrderedDict[str, Tuple[int, Dashboard]]" = OrderedDict()
+        self._resident_devices = 0
+        # Users with queued changes made through an evicted dashboard object
+        self._foreign_writes: Set[str] = set()
+        self._change_listeners: List[DashboardListener] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def add_change_listener(self, listener: DashboardListener) -> None:
+        """
+        Register a callback for device changes on any dashboard.
+
+        Unlike Dashboard.add_listener this survives dashboards being
+        evicted and reloaded.
+
+        Args:
+            listener: Callback receiving (dashboard, op, device)
+        """
+        self._change_listeners.append(listener)
+
+    @staticmethod
+    def _namespace(user_id: str) -> str:
+        return f"dashboard:{user_id}"
+
+    def _drop(self, user_id: str) -> Optional[Dashboard]:
+        """Remove a dashboard from the cache. Caller holds the lock."""
+        cached = self._cache.pop(user_id, None)
+        if cached is None:
+            return None
+        self._resident_devices -= len(cached[1].devices)
+        return cached[1]
+
+    def _over_budget(self, incoming_devices: int, incoming_dashboards: int) -> bool:
+        """Check whether admitting dashboards/devices would exceed a budget."""
+        if self.max_dashboards is not None and len(self._cache) + incoming_dashboards > self.max_dashboards:
+            return True
+        if self.max_devices is not None and self._resident_devices + incoming_devices > self.max_devices:
+            return True
+        return False
+
+    def _make_room(self, incoming_devices: int, incoming_dashboards: int = 1) -> None:
+        """Evict least recently used dashboards until the newcomers fit."""
+        while True:
+            with self._lock:
+                if not self._cache or not self._over_budget(incoming_devices, incoming_dashboards):
+                    return
+                user_id = next(iter(self._cache))
+                if not self.writer.has_pending(self._namespace(user_id)):
+                    # Still-running requests may hold the object; its listener
+                    # stays attached so their changes are persisted anyway.
+                    self._drop(user_id)
+                    self.evictions += 1
+                    continue
+            # Write back before evicting; the next pass finds it clean.
+            # Flushing outside the lock lets the flush listener take it.
+            self.writer.flush()
+
+    def _attach(self, dashboard: Dashboard, version: int) -> None:
+        """Make a dashboard resident and start persisting its changes."""
+        dashboard.add_listener(self._on_dashboard_change)
+        self._make_room(len(dashboard.devices))
+        with self._lock:
+            previous = self._drop(dashboard.user_id)
+            self._cache[dashboard.user_id] = (version, dashboard)
+            self._resident_devices += len(dashboard.devices)
+        if previous is not None and previous is not dashboard:
+            previous.remove_listener(self._on_dashboard_change)
+
+    def _load(self, user_id: str, version: int) -> Dashboard:
+        """Build a dashboard from its stored device records."""
+        dashboard = Dashboard(user_id)
+        for record in self.backend.items(self._namespace(user_id)).values():
+            dashboard.add_device(self.factory.create_from_dict(record))
+        self._attach(dashboard, version)
+        return dashboard
+
+    def _on_dashboard_change(self, dashboard: Dashboard, op: str, device: Device) -> None:
+        """Queue a single device change for the next flush."""
+        namespace = self._namespace(dashboard.user_id)
+        if op == DEVICE_REMOVED:
+            self.writer.mark_deleted(namespace, device.device_id)
+        else:
+            self.writer.mark_dirty(namespace, device.device_id, device)
+        with self._lock:
+            cached = self._cache.get(dashboard.user_id)
+            if cached is not None and cached[1] is dashboard:
+                if op in (DEVICE_ADDED, DEVICE_REMOVED):
+                    self._resident_devices += 1 if op == DEVICE_ADDED else -1
+            else:
+                # A request still holds an evicted object; any resident copy
+                # lacks this change, so rebuild it once the change is flushed
+                self._foreign_writes.add(dashboard.user_id)
+                self._drop(dashboard.user_id)
+        if op == DEVICE_ADDED:
+            self._make_room(0, 0)
+        for listener in self._change_listeners:
+            listener(dashboard, op, device)
+
+    def _on_flushed(self, versions: Dict[str, int]) -> None:
+        """Advance cached versions past our own flushed writes."""
+        prefix = self._namespace("")
+        with self._lock:
+            for namespace, version in versions.items():
+                if not namespace.startswith(prefix):
+                    continue
+                user_id = namespace[len(prefix):]
+                if user_id in self._foreign_writes:
+                    # Written through another object than the cached one
+                    self._foreign_writes.discard(user_id)
+                    self._drop(user_id)
+                    continue
+                cached = self._cache.get(user_id)
+                if cached is None:
+                    continue
+                if cached[0] == version - 1:
+                    self._cache[user_id] = (version, cached[1])
+                else:
+                    # Another process wrote in between; rebuild on next access
+                    self._drop(user_id)
+
+    def get(self, user_id: str, default: Optional[Dashboard] = None) -> Optional[Dashboard]:
+        """
+        Get a user's dashboard, loading it from the backend if not resident.
+
+        Args:
+            user_id: Owner of the dashboard
+            default: Value returned when the user has no dashboard
+
+        Returns:
+            Dashboard if it exists, default otherwise
+        """
+        namespace = self._namespace(user_id)
+        version = self.backend.version(namespace)
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None and (cached[0] == version or self.writer.has_pending(namespace)):
+                # Unflushed local changes win over a newer stored version
+                self._cache.move_to_end(user_id)
+                self.hits += 1
+                return cached[1]
+        if self.writer.has_pending(namespace):
+            # Changes made through an evicted object are still queued;
+            # write them so the rebuilt dashboard includes them
+            self.writer.flush()
+            version = self.backend.version(namespace)
+        if version == 0 and self.backend.get(self.INDEX_NAMESPACE, user_id) is None:
+            return default
+        self.misses += 1
+        return self._load(user_id, version)
+
+    def __getitem__(self, user_id: str) -> Dashboard:
+        dashboard = self.get(user_id)
+        if dashboard is None:
+            raise KeyError(user_id)
+        return dashboard
+
+    def __setitem__(self, user_id: str, dashboard: Dashboard) -> None:
+        """Store a dashboard and queue all of its devices for writing."""
+        self.backend.put(self.INDEX_NAMESPACE, user_id, {"user_id": user_id})
+        namespace = self._namespace(user_id)
+        for device_id, device in dashboard.devices.items():
+            self.writer.mark_dirty(namespace, device_id, device)
+        self._attach(dashboard, self.backend.version(namespace))
+
+    def __contains__(self, user_id: str) -> bool:
+        """Check whether a user has a dashboard without loading it."""
+        return (user_id in self._cache
+                or self.backend.version(self._namespace(user_id)) > 0
+                or self.backend.get(self.INDEX_NAMESPACE, user_id) is not None)
+
+    def __len__(self) -> int:
+        return len(self.backend.items(self.INDEX_NAMESPACE))
+
+    def flush(self) -> int:
+        """
+        Write all pending device changes now.
+
+        Returns:
+            int: Number of records written
+        """
+        return self.writer.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get residency counters.
+
+        Returns:
+            Dict with hits, misses, evictions and resident dashboard and
+            device counts
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "resident_dashboards": len(self._cache),
+            "resident_devices": self._resident_devices
+        }
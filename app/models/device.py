@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 from abc import ABC, abstractmethod
 from enum import Enum
 
@@ -11,7 +11,19 @@ class DeviceStatus(str, Enum):
 
 
 class Device(ABC):
-    """Base class for all smart home devices."""
+    """
+    Base class for all smart home devices.
+
+    Devices use ``__slots__`` instead of a per-instance ``__dict__`` to keep
+    the per-device footprint small for very large fleets. Subclasses that
+    add attributes should declare their own ``__slots__``.
+
+    ``version`` is bumped by every state-changing method so cached
+    serializations can tell whether they are stale. Code that assigns
+    attributes directly bypasses it.
+    """
+
+    __slots__ = ("device_id", "device_name", "device_type", "status", "room", "version", "_on_change")
 
     def __init__(self, device_id: str, device_name: str, device_type: str):
         """
@@ -26,14 +38,27 @@ class Device(ABC):
         self.device_name = device_name
         self.device_type = device_type
         self.status = DeviceStatus.OFF.value
+        # Room the device belongs to; see Dashboard.assign_room
+        self.room: Optional[str] = None
+        self.version = 0
+        # Set by the owning Dashboard to hear about state changes
+        self._on_change: Optional[Callable[['Device'], None]] = None
+
+    def _notify_changed(self) -> None:
+        """Bump the version and tell the owner (if any) that the state changed."""
+        self.version += 1
+        if self._on_change is not None:
+            self._on_change(self)
 
     def turn_on(self) -> None:
         """Turn the device on."""
         self.status = DeviceStatus.ON.value
+        self._notify_changed()
 
     def turn_off(self) -> None:
         """Turn the device off."""
         self.status = DeviceStatus.OFF.value
+        self._notify_changed()
 
     def get_status(self) -> str:
         """
@@ -55,6 +80,7 @@ class Device(ABC):
             for key, value in config.items():
                 if hasattr(self, key):
                     setattr(self, key, value)
+            self._notify_changed()
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -67,7 +93,8 @@ class Device(ABC):
             "device_id": self.device_id,
             "device_name": self.device_name,
             "device_type": self.device_type,
-            "status": self.status
+            "status": self.status,
+            "room": self.room
         }
 
 
@@ -75,21 +102,23 @@ class Device(ABC):
 class Light(Device):
     """Light device with brightness control."""
 
+    __slots__ = ("brightness", "is_on")
+
     def __init__(self, device_id: str, device_name: str):
         super().__init__(device_id, device_name, "light")
         self.brightness: int = 0
         self.is_on: bool = False
 
     def turn_on(self) -> None:
-        super().turn_on()
         self.is_on = True
         if self.brightness == 0:
             self.brightness = 100
+        super().turn_on()
 
     def turn_off(self) -> None:
-        super().turn_off()
         self.is_on = False
         self.brightness = 0
+        super().turn_off()
 
     def set_brightness(self, level: int) -> bool:
         if 0 <= level <= 100:
@@ -100,6 +129,7 @@ class Light(Device):
             else:
                 self.is_on = False
                 self.status = DeviceStatus.OFF.value
+            self._notify_changed()
             return True
         return False
 
@@ -125,6 +155,8 @@ class Light(Device):
 class Thermostat(Device):
     """Thermostat device for temperature control."""
 
+    __slots__ = ("temperature", "target_temperature")
+
     def __init__(self, device_id: str, device_name: str):
         super().__init__(device_id, device_name, "thermostat")
         self.temperature: float = 20.0
@@ -133,6 +165,7 @@ class Thermostat(Device):
     def set_temperature(self, temp: float) -> bool:
         if 10.0 <= temp <= 35.0:
             self.target_temperature = temp
+            self._notify_changed()
             return True
         return False
 
@@ -148,6 +181,8 @@ class Thermostat(Device):
 class SecurityCamera(Device):
     """Security camera device."""
 
+    __slots__ = ("recording", "resolution")
+
     def __init__(self, device_id: str, device_name: str = "Security Camera", resolution: str = "1080p"):
         super().__init__(device_id, device_name, device_type="security_camera")
         self.recording: bool = False
@@ -160,12 +195,14 @@ class SecurityCamera(Device):
             return
         self.recording = True
         self.status = DeviceStatus.RECORDING.value
+        self._notify_changed()
 
     def stop_recording(self) -> None:
         if not self.recording:
             return
         self.recording = False
         self.status = DeviceStatus.ON.value
+        self._notify_changed()
 
     def capture_image(self) -> Optional[str]:
         if self.status != DeviceStatus.ON.value and self.status != DeviceStatus.RECORDING.value:
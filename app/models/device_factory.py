@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Any, Type, Callable
+from typing import Optional, Dict, Any, Type, Callable, List, Tuple
 from app.models.device import Device, Light, Thermostat, SecurityCamera
 import uuid
 
@@ -82,6 +82,63 @@ class DeviceFactory:
         device = device_class(device_id, device_name)
         return device
 
+    def create_devices(self, configs: List[Dict[str, Any]]) -> Tuple[List[Device], List[Tuple[int, str]]]:
+        """
+        Create many devices in one call, e.g. for a bulk import.
+
+        Each config holds ``device_type`` and ``device_name`` and optionally
+        ``device_id`` (generated if missing) and ``room``. A bad config does
+        not stop the others.
+
+        Args:
+            configs: Device configurations
+
+        Returns:
+            Tuple of (created devices in order, (index, error) for each
+            config that could not be used)
+        """
+        devices: List[Device] = []
+        errors: List[Tuple[int, str]] = []
+        registry = self._device_registry
+        for index, config in enumerate(configs):
+            device_type = str(config.get("device_type", "")).lower()
+            device_class = registry.get(device_type)
+            if device_class is None:
+                errors.append((index, f"Unknown device type: {device_type}"))
+                continue
+            device_name = config.get("device_name")
+            if not isinstance(device_name, str) or not device_name:
+                errors.append((index, "device_name is required"))
+                continue
+            device = device_class(str(config.get("device_id") or uuid.uuid4()), device_name)
+            room = config.get("room")
+            if room is not None:
+                device.room = str(room)
+            devices.append(device)
+        return devices, errors
+
+    def create_from_dict(self, data: Dict[str, Any]) -> Device:
+        """
+        Recreate a device from its to_dict() representation.
+
+        Args:
+            data: Dictionary produced by Device.to_dict()
+
+        Returns:
+            Device: Device with its saved state restored
+
+        Raises:
+            ValueError: If device type is unknown
+        """
+        device = self.create_device(data["device_type"], {
+            "device_id": data["device_id"],
+            "device_name": data["device_name"]
+        })
+        for key, value in data.items():
+            if key not in ("device_id", "device_name", "device_type") and hasattr(device, key):
+                setattr(device, key, value)
+        return device
+
     def configure_device(self, device: Device, config: Optional[Dict[str, Any]] = None) -> None:
         """
         Configure a device with custom settings.
@@ -0,0 +1,151 @@
+from typing import Any, Dict, Optional, Set
+import asyncio
+import json
+
+from app.models.dashboard import Dashboard, DEVICE_REMOVED
+from app.models.device import Device
+
+# Queued in place of messages when a subscriber fell too far behind
+RESYNC = None
+
+
+class DeviceSubscription:
+    """One connected client's queue of pending device messages."""
+
+    __slots__ = ("user_id", "queue", "dropped")
+
+    def __init__(self, user_id: str, max_pending: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.dropped = 0
+
+    def offer(self, message: Optional[str]) -> None:
+        """
+        Queue a message without blocking.
+
+        When the queue is full the pending messages are discarded and
+        replaced by RESYNC, so the client gets a fresh snapshot instead of
+        an unbounded backlog.
+
+        Args:
+            message: Encoded message, or RESYNC
+        """
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait(RESYNC)
+
+
+class DeviceHub:
+    """
+    Fans device changes out to the WebSocket clients of each user.
+
+    Registered as a dashboard change listener. Each change is encoded once
+    and the same string is queued for every subscription of the dashboard's
+    owner. Publishing is safe from any thread: changes made off the event
+    loop are handed over with call_soon_threadsafe.
+    """
+
+    def __init__(self, max_pending: int = 256):
+        """
+        Initialize the hub.
+
+        Args:
+            max_pending: Most undelivered messages per subscription before
+                it is reset to a snapshot
+        """
+        self.max_pending = max_pending
+        self._subscriptions: Dict[str, Set[DeviceSubscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, user_id: str) -> DeviceSubscription:
+        """
+        Start receiving a user's device changes. Call from the event loop.
+
+        Args:
+            user_id: Owner of the dashboard to follow
+
+        Returns:
+            DeviceSubscription whose queue receives encoded messages
+        """
+        self._loop = asyncio.get_running_loop()
+        subscription = DeviceSubscription(user_id, self.max_pending)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: DeviceSubscription) -> None:
+        """
+        Stop delivering to a subscription.
+
+        Args:
+            subscription: Subscription returned by subscribe()
+        """
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self) -> int:
+        """Number of open subscriptions across all users."""
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def publish(self, dashboard: Dashboard, op: str, device: Device) -> None:
+        """
+        Dashboard listener: push one device change to the owner's clients.
+
+        Args:
+            dashboard: Dashboard that changed
+            op: DEVICE_ADDED, DEVICE_UPDATED or DEVICE_REMOVED
+            device: Device that changed
+        """
+        if dashboard.user_id not in self._subscriptions:
+            return
+        message = self.encode_change(dashboard, op, device)
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._deliver(dashboard.user_id, message)
+        elif self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, dashboard.user_id, message)
+
+    def _deliver(self, user_id: str, message: str) -> None:
+        """Queue a message for every subscription of a user."""
+        subscriptions = self._subscriptions.get(user_id)
+        if not subscriptions:
+            return
+        self.published += 1
+        for subscription in subscriptions:
+            subscription.offer(message)
+        self.delivered += len(subscriptions)
+
+    @staticmethod
+    def encode_change(dashboard: Dashboard, op: str, device: Device) -> str:
+        """
+        Encode a device change message.
+
+        Args:
+            dashboard: Dashboard that changed
+            op: Change operation
+            device: Device that changed
+
+        Returns:
+            str: JSON text with the dashboard's epoch and new version and
+            the device's state, or only its ID if it was removed
+        """
+        message: Dict[str, Any] = {
+            "type": "device", "op": op, "epoch": dashboard.epoch, "version": dashboard.version
+        }
+        if op == DEVICE_REMOVED:
+            message["device_id"] = device.device_id
+        else:
+            message["device"] = device.to_dict()
+        return json.dumps(message, separators=(",", ":"))
@@ -0,0 +1,113 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import csv
+import json
+
+# Upload formats accepted by parse_records
+FORMAT_NDJSON = "ndjson"
+FORMAT_CSV = "csv"
+
+# Longest line accepted; guards the partial-line buffer
+MAX_LINE_BYTES = 64 * 1024
+
+ImportRecord = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+class ImportStreamError(ValueError):
+    """A line that cannot be read, so the rest of the upload cannot be either."""
+
+    def __init__(self, line: int, detail: str):
+        """
+        Initialize the error.
+
+        Args:
+            line: 1-based number of the unreadable line
+            detail: What is wrong with it
+        """
+        super().__init__(f"Line {line} {detail}")
+        self.line = line
+
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Split a byte stream into decoded lines as it arrives.
+
+    Only the current partial line is buffered, so memory does not grow with
+    the size of the upload.
+
+    Args:
+        chunks: Body chunks in order
+
+    Yields:
+        Tuple of (1-based line number, line without its line ending)
+
+    Raises:
+        ImportStreamError: If a line is longer than MAX_LINE_BYTES or not UTF-8
+    """
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line_no += 1
+            if len(raw) > MAX_LINE_BYTES:
+                raise ImportStreamError(line_no, f"is longer than {MAX_LINE_BYTES} bytes")
+            yield line_no, _decode(raw, line_no)
+        if len(buffer) > MAX_LINE_BYTES:
+            raise ImportStreamError(line_no + 1, f"is longer than {MAX_LINE_BYTES} bytes")
+    if buffer:
+        yield line_no + 1, _decode(buffer, line_no + 1)
+
+
+def _decode(raw: bytes, line_no: int) -> str:
+    try:
+        # utf-8-sig drops a byte order mark at the start of the file
+        return raw.decode("utf-8-sig" if line_no == 1 else "utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        raise ImportStreamError(line_no, "is not valid UTF-8")
+
+
+async def parse_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[ImportRecord]:
+    """
+    Parse device records from an NDJSON or CSV upload incrementally.
+
+    NDJSON has one JSON object per line. CSV starts with a header row
+    naming the columns (device_type, device_name and optionally device_id
+    and room) and has one record per line; quoted fields may not contain
+    line breaks. Blank lines are skipped and empty CSV cells are omitted.
+
+    Args:
+        chunks: Body chunks in order
+        fmt: FORMAT_NDJSON or FORMAT_CSV
+
+    Yields:
+        Tuple of (line number, record, None) or (line number, None, error)
+        for a line that could not be parsed
+
+    Raises:
+        ImportStreamError: If a line cannot be read at all
+    """
+    header: Optional[List[str]] = None
+    async for line_no, line in read_lines(chunks):
+        if not line.strip():
+            continue
+        if fmt == FORMAT_NDJSON:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_no, None, "Invalid JSON"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, "Expected a JSON object"
+                continue
+            yield line_no, record, None
+            continue
+
+        row = next(csv.reader([line]))
+        if header is None:
+            header = [column.strip() for column in row]
+            continue
+        if len(row) != len(header):
+            yield line_no, None, f"Expected {len(header)} columns, got {len(row)}"
+            continue
+        yield line_no, {column: value for column, value in zip(header, row) if value != ""}, None
@@ -0,0 +1,377 @@
+from typing import Any, Dict, List, Optional, Tuple
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+from app.models.storage_backend import Record, StorageBackend, entries_after, trim_entries
+
+SNAPSHOT_MAGIC = b"SHSNAP01"
+SNAPSHOT_FILE = "snapshot.bin"
+JOURNAL_FILE = "journal.bin"
+
+# Snapshot header: magic, last journal sequence covered, next log ID
+_SNAPSHOT_HEADER = struct.Struct("<8sQQ")
+# Snapshot section: kind, name length, version, blob length
+_SECTION_HEADER = struct.Struct("<BHQI")
+# Journal frame: payload length, CRC32 of payload
+_FRAME_HEADER = struct.Struct("<II")
+
+_SECTION_NAMESPACE = 1
+_SECTION_LOG = 2
+
+_OP_WRITE = "w"   # [seq, op, puts, deletes]
+_OP_APPEND = "a"  # [seq, op, log, log_id, record]
+_OP_TRIM = "t"    # [seq, op, log, through_id]
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+class JournalBackend(StorageBackend):
+    """
+    In-memory backend made durable by a snapshot plus an append-only journal.
+
+    Every write is appended to ``journal.bin`` as a CRC-checked binary frame
+    before it is applied in memory. Compaction writes the full state to
+    ``snapshot.bin`` (one section per namespace or log) and truncates the
+    journal. On startup the snapshot is memory-mapped and only indexed;
+    each namespace is decoded the first time it is touched, so recovery
+    cost is dominated by replaying the journal tail rather than by the
+    total amount of state.
+    """
+
+    def __init__(self, directory: str, compact_threshold_bytes: int = 64 * 1024 * 1024,
+                 sync: bool = False):
+        """
+        Open or create the store and recover its state.
+
+        Args:
+            directory: Directory holding the snapshot and journal files
+            compact_threshold_bytes: Journal size that triggers compaction
+                in the background compactor
+            sync: fsync the journal after every write (survives power loss,
+                at the cost of write latency)
+        """
+        self.directory = directory
+        self.compact_threshold_bytes = compact_threshold_bytes
+        self.sync = sync
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._namespaces: Dict[str, Dict[str, Record]] = {}
+        self._versions: Dict[str, int] = {}
+        self._logs: Dict[str, List[Tuple[int, Record]]] = {}
+        # Sections of the mapped snapshot not decoded yet: name -> (offset, length)
+        self._raw_namespaces: Dict[str, Tuple[int, int]] = {}
+        self._raw_logs: Dict[str, Tuple[int, int]] = {}
+        # Journal changes to sections not decoded yet, applied on first use
+        self._deferred: Dict[str, List[Tuple[Dict[str, Record], List[str]]]] = {}
+        self._deferred_logs: Dict[str, List[Tuple[int, Record]]] = {}
+        self._snapshot_file = None
+        self._snapshot_map: Optional[mmap.mmap] = None
+        self._seq = 0
+        self._next_log_id = 1
+        self._compactor: Optional[threading.Thread] = None
+        self._stop_compactor = threading.Event()
+
+        self._load_snapshot()
+        self.replayed_entries = self._replay_journal()
+        self._journal = open(self._path(JOURNAL_FILE), "ab")
+        self.compactions = 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # Recovery
+
+    def _load_snapshot(self) -> None:
+        """Map the snapshot and index its sections without decoding them."""
+        path = self._path(SNAPSHOT_FILE)
+        if not os.path.exists(path) or os.path.getsize(path) < _SNAPSHOT_HEADER.size:
+            return
+        self._snapshot_file = open(path, "rb")
+        self._snapshot_map = mmap.mmap(self._snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = self._snapshot_map
+        magic, self._seq, self._next_log_id = _SNAPSHOT_HEADER.unpack_from(view, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a snapshot file: {path}")
+        offset = _SNAPSHOT_HEADER.size
+        end = len(view)
+        while offset < end:
+            kind, name_len, version, blob_len = _SECTION_HEADER.unpack_from(view, offset)
+            offset += _SECTION_HEADER.size
+            name = view[offset:offset + name_len].decode("utf-8")
+            offset += name_len
+            if kind == _SECTION_NAMESPACE:
+                self._raw_namespaces[name] = (offset, blob_len)
+            else:
+                self._raw_logs[name] = (offset, blob_len)
+            self._versions[name if kind == _SECTION_NAMESPACE else f"log:{name}"] = version
+            offset += blob_len
+
+    def _replay_journal(self) -> int:
+        """Apply journal entries newer than the snapshot; drop a torn tail."""
+        path = self._path(JOURNAL_FILE)
+        if not os.path.exists(path):
+            return 0
+        replayed = 0
+        good_end = 0
+        # Frames are read one at a time, so memory does not grow with the
+        # size of the journal
+        with open(path, "rb") as journal:
+            while True:
+                header = journal.read(_FRAME_HEADER.size)
+                if len(header) < _FRAME_HEADER.size:
+                    break
+                length, crc = _FRAME_HEADER.unpack(header)
+                payload = journal.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                entry = json.loads(payload)
+                if entry[0] > self._seq:
+                    self._apply(entry)
+                    self._seq = entry[0]
+                    replayed += 1
+                good_end = journal.tell()
+            size = journal.seek(0, os.SEEK_END)
+        if good_end < size:
+            # A crash mid-write leaves a partial frame; cut it off
+            with open(path, "r+b") as journal:
+                journal.truncate(good_end)
+        return replayed
+
+    def _namespace(self, namespace: str) -> Dict[str, Record]:
+        """Get a namespace's records, decoding them from the snapshot if needed."""
+        records = self._namespaces.get(namespace)
+        if records is None:
+            raw = self._raw_namespaces.pop(namespace, None)
+            if raw is not None:
+                offset, length = raw
+                records = json.loads(self._snapshot_map[offset:offset + length])
+                for puts, deletes in self._deferred.pop(namespace, ()):
+                    records.update(puts)
+                    for key in deletes:
+                        records.pop(key, None)
+            else:
+                records = {}
+            self._namespaces[namespace] = records
+        return records
+
+    def _log(self, log: str) -> List[Tuple[int, Record]]:
+        """Get a log's entries, decoding them from the snapshot if needed."""
+        entries = self._logs.get(log)
+        if entries is None:
+            raw = self._raw_logs.pop(log, None)
+            if raw is not None:
+                offset, length = raw
+                entries = [tuple(entry) for entry in json.loads(self._snapshot_map[offset:offset + length])]
+                entries.extend(self._deferred_logs.pop(log, ()))
+            else:
+                entries = []
+            self._logs[log] = entries
+        return entries
+
+    def _bump(self, namespace: str) -> int:
+        version = self._versions.get(namespace, 0) + 1
+        self._versions[namespace] = version
+        return version
+
+    def _apply(self, entry: List[Any]) -> Dict[str, int]:
+        """Apply one journal entry to the in-memory state."""
+        versions: Dict[str, int] = {}
+        if entry[1] == _OP_WRITE:
+            puts, deletes = entry[2], entry[3]
+            for namespace in set(puts) | set(deletes):
+                if namespace in self._raw_namespaces:
+                    # Keep replay cheap: decode the section only when read
+                    self._deferred.setdefault(namespace, []).append(
+                        (puts.get(namespace, {}), deletes.get(namespace, []))
+                    )
+                else:
+                    records = self._namespace(namespace)
+                    records.update(puts.get(namespace, {}))
+                    for key in deletes.get(namespace, ()):
+                        records.pop(key, None)
+                versions[namespace] = self._bump(namespace)
+        elif entry[1] == _OP_APPEND:
+            log, log_id, record = entry[2], entry[3], entry[4]
+            if log in self._raw_logs:
+                self._deferred_logs.setdefault(log, []).append((log_id, record))
+            else:
+                self._log(log).append((log_id, record))
+            self._next_log_id = max(self._next_log_id, log_id + 1)
+            self._bump(f"log:{log}")
+        elif entry[1] == _OP_TRIM:
+            trim_entries(self._log(entry[2]), entry[3])
+            self._bump(f"log:{entry[2]}")
+        return versions
+
+    def _commit(self, entry: List[Any]) -> Dict[str, int]:
+        """Journal an entry, then apply it."""
+        self._seq += 1
+        entry[0] = self._seq
+        payload = _encode(entry)
+        self._journal.write(_FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._journal.flush()
+        if self.sync:
+            os.fsync(self._journal.fileno())
+        return self._apply(entry)
+
+    # StorageBackend
+
+    def get(self, namespace: str, key: str) -> Optional[Record]:
+        with self._lock:
+            return self._namespace(namespace).get(key)
+
+    def items(self, namespace: str) -> Dict[str, Record]:
+        with self._lock:
+            return dict(self._namespace(namespace))
+
+    def put_many(self, namespace: str, records: Dict[str, Record]) -> int:
+        return self.write_batch({namespace: records}, {})[namespace]
+
+    def delete(self, namespace: str, key: str) -> int:
+        return self.write_batch({}, {namespace: [key]})[namespace]
+
+    def write_batch(self, puts: Dict[str, Dict[str, Record]],
+                    deletes: Dict[str, List[str]]) -> Dict[str, int]:
+        with self._lock:
+            return self._commit([0, _OP_WRITE, puts, deletes])
+
+    def version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    def append(self, log: str, record: Record) -> int:
+        with self._lock:
+            log_id = self._next_log_id
+            self._commit([0, _OP_APPEND, log, log_id, record])
+            return log_id
+
+    def tail(self, log: str, limit: int) -> List[Tuple[int, Record]]:
+        with self._lock:
+            return self._log(log)[-limit:]
+
+    def read_after(self, log: str, after_id: int, limit: int) -> List[Tuple[int, Record]]:
+        with self._lock:
+            return entries_after(self._log(log), after_id, limit)
+
+    def trim(self, log: str, through_id: int) -> List[Tuple[int, Record]]:
+        with self._lock:
+            entries = self._log(log)
+            removed = entries[:bisect.bisect_right(entries, through_id, key=lambda entry: entry[0])]
+            if removed:
+                self._commit([0, _OP_TRIM, log, through_id])
+            return removed
+
+    def log_size(self, log: str) -> int:
+        with self._lock:
+            return len(self._log(log))
+
+    # Compaction
+
+    def journal_size(self) -> int:
+        """Current size of the journal in bytes."""
+        return self._journal.tell()
+
+    def compact(self) -> None:
+        """
+        Write a new snapshot of the full state and truncate the journal.
+
+        Sections that were never decoded since the last snapshot are copied
+        byte for byte from the mapped file. The snapshot is written to a
+        temporary file and renamed into place, so a crash at any point
+        leaves either the old or the new snapshot plus a journal that
+        replays correctly on top of it.
+        """
+        with self._lock:
+            # Sections with deferred journal changes cannot be copied verbatim
+            for namespace in list(self._deferred):
+                self._namespace(namespace)
+            for log in list(self._deferred_logs):
+                self._log(log)
+            tmp_path = self._path(SNAPSHOT_FILE + ".tmp")
+            new_raw_namespaces: Dict[str, Tuple[int, int]] = {}
+            new_raw_logs: Dict[str, Tuple[int, int]] = {}
+            with open(tmp_path, "wb") as out:
+                out.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, self._seq, self._next_log_id))
+
+                def section(kind: int, name: str, version: int, blob) -> Tuple[int, int]:
+                    encoded_name = name.encode("utf-8")
+                    out.write(_SECTION_HEADER.pack(kind, len(encoded_name), version, len(blob)))
+                    out.write(encoded_name)
+                    offset = out.tell()
+                    out.write(blob)
+                    return offset, len(blob)
+
+                for name, (offset, length) in self._raw_namespaces.items():
+                    new_raw_namespaces[name] = section(
+                        _SECTION_NAMESPACE, name, self._versions.get(name, 0),
+                        self._snapshot_map[offset:offset + length]
+                    )
+                for name, records in self._namespaces.items():
+                    section(_SECTION_NAMESPACE, name, self._versions.get(name, 0), _encode(records))
+                for name, (offset, length) in self._raw_logs.items():
+                    new_raw_logs[name] = section(
+                        _SECTION_LOG, name, self._versions.get(f"log:{name}", 0),
+                        self._snapshot_map[offset:offset + length]
+                    )
+                for name, entries in self._logs.items():
+                    section(_SECTION_LOG, name, self._versions.get(f"log:{name}", 0), _encode(entries))
+                out.flush()
+                os.fsync(out.fileno())
+
+            self._close_snapshot()
+            os.replace(tmp_path, self._path(SNAPSHOT_FILE))
+            self._journal.close()
+            self._journal = open(self._path(JOURNAL_FILE), "wb")
+
+            if new_raw_namespaces or new_raw_logs:
+                self._snapshot_file = open(self._path(SNAPSHOT_FILE), "rb")
+                self._snapshot_map = mmap.mmap(self._snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._raw_namespaces = new_raw_namespaces
+            self._raw_logs = new_raw_logs
+            self.compactions += 1
+
+    def _close_snapshot(self) -> None:
+        if self._snapshot_map is not None:
+            self._snapshot_map.close()
+            self._snapshot_map = None
+        if self._snapshot_file is not None:
+            self._snapshot_file.close()
+            self._snapshot_file = None
+
+    def start(self, interval: float = 30.0) -> None:
+        """
+        Start a background thread that compacts once the journal is large.
+
+        Args:
+            interval: Seconds between journal size checks
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._stop_compactor.clear()
+
+        def run() -> None:
+            while not self._stop_compactor.wait(interval):
+                if self.journal_size() >= self.compact_threshold_bytes:
+                    self.compact()
+
+        self._compactor = threading.Thread(target=run, name="journal-compactor", daemon=True)
+        self._compactor.start()
+
+    def stop(self) -> None:
+        """Stop the background compactor."""
+        self._stop_compactor.set()
+        if self._compactor is not None:
+            self._compactor.join(timeout=5.0)
+            self._compactor = None
+
+    def close(self) -> None:
+        self.stop()
+        with self._lock:
+            self._journal.close()
+            self._close_snapshot()
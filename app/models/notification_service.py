@@ -1,7 +1,21 @@
-from typing import List, Protocol, Dict, Any
-from queue import Queue
-from datetime import datetime
+from typing import List, Protocol, Dict, Any, Optional
+from collections import deque
+import asyncio
+import uuid
+from datetime import datetime, timedelta
 from abc import ABC, abstractmethod
+from app.models.storage_backend import StorageBackend
+from app.models.retention import RetentionBuffer
+
+# Log name used when history is kept in a shared storage backend
+NOTIFICATION_LOG = "notifications"
+
+# Events kept in process-local history when no retention is configured
+DEFAULT_HISTORY_SIZE = 1000
+
+# The shared log is trimmed each time this fraction of the count limit has
+# been appended, so it exceeds the limit by at most that much
+LOG_TRIM_FRACTION = 0.1
 
 
 class Observer(ABC):
@@ -36,6 +50,8 @@ class Event:
         self.message = message
         self.data = data or {}
         self.timestamp = datetime.now().isoformat()
+        # Sequence ID assigned when the event is recorded
+        self.event_id: Optional[int] = None
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -44,23 +60,104 @@ class Event:
         Returns:
             Dict containing event data
         """
-        return {
+        data = {
             "event_type": self.event_type,
             "device_id": self.device_id,
             "message": self.message,
             "data": self.data,
             "timestamp": self.timestamp
         }
+        if self.event_id is not None:
+            data["id"] = self.event_id
+        return data
+
+
+class StreamObserver(Observer):
+    """
+    Observer that buffers events for one streaming client.
+
+    Created on the event loop that consumes it; update() may be called from
+    any thread. The buffer holds at most ``max_pending`` events and drops
+    the oldest when full. ``dropped`` counts them, so the consumer can
+    re-read the gap from history by event ID.
+    """
+
+    def __init__(self, max_pending: int = 100):
+        """
+        Initialize the observer.
+
+        Args:
+            max_pending: Most undelivered events kept
+        """
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending: deque = deque()
+        self._ready = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+    def update(self, event: 'Event') -> None:
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._push(event)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._push, event)
+
+    def _push(self, event: 'Event') -> None:
+        if len(self._pending) >= self.max_pending:
+            self._pending.popleft()
+            self.dropped += 1
+        self._pending.append(event)
+        self._ready.set()
+
+    async def next_events(self, timeout: float) -> List['Event']:
+        """
+        Wait for buffered events.
+
+        Args:
+            timeout: Seconds to wait when nothing is buffered
+
+        Returns:
+            List of events, oldest first; empty if the timeout passed
+        """
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._ready.clear()
+        events = list(self._pending)
+        self._pending.clear()
+        return events
 
 
 class NotificationService:
     """Service for managing notifications using Observer pattern."""
 
-    def __init__(self):
-        """Initialize the notification service."""
+    def __init__(self, backend: Optional[StorageBackend] = None,
+                 retention: Optional[RetentionBuffer] = None):
+        """
+        Initialize the notification service.
+
+        Args:
+            backend: Shared backend for history; when set, every process
+                sees the same notifications instead of its own list
+            retention: Count and age limits of the history, archiving
+                events that leave it; defaults to the newest
+                DEFAULT_HISTORY_SIZE. With a backend its limits are applied
+                to the shared log instead of its own buffer.
+        """
         self.subscribers: List[Observer] = []
-        self.notifications: Queue = Queue()
-        self.notification_history: List[Event] = []  # Store all notifications
+        self.notification_history = retention if retention is not None else RetentionBuffer(DEFAULT_HISTORY_SIZE)
+        self.backend = backend
+        self._trim_every = max(1, int(self.notification_history.max_count * LOG_TRIM_FRACTION))
+        self._appended = 0
+        # Bumped for every event recorded by this instance; the epoch is
+        # unique to this instance because versions restart at 0.
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:12]
 
     def subscribe(self, observer: Observer) -> None:
         """
@@ -109,9 +206,9 @@ class NotificationService:
         Args:
             event: Event to notify subscribers about
         """
-        self.notifications.put(event)
-        self.notification_history.append(event)  # Keep in history
-        for subscriber in self.subscribers:
+        self._record(event)
+        # Copy: streaming clients subscribe and unsubscribe concurrently
+        for subscriber in tuple(self.subscribers):
             subscriber.update(event)
 
     def send_notification(self, message: str, device_id: str = "", event_type: str = "general") -> None:
@@ -124,8 +221,101 @@ class NotificationService:
             event_type: Type of event
         """
         event = self._create_event(event_type, device_id, message)
-        self.notifications.put(event)
-        self.notification_history.append(event)  # Keep in history
+        self.notify(event)
+
+    def _record(self, event: Event) -> None:
+        """
+        Keep an event in history.
+
+        Args:
+            event: Event to record
+        """
+        self.version += 1
+        if self.backend is not None:
+            event.event_id = self.backend.append(NOTIFICATION_LOG, event.to_dict())
+            self._appended += 1
+            if self._appended >= self._trim_every:
+                self._appended = 0
+                self.trim_log()
+        else:
+            event.event_id = self.version
+            self.notification_history.append(event)
+            self.notification_history.expire()
+
+    def trim_log(self, now: Optional[datetime] = None) -> int:
+        """
+        Apply the retention limits to the shared log.
+
+        Events beyond the count limit or older than the age limit are
+        removed from the log and archived. Another process may trim the
+        same events concurrently; each is removed, and archived, once.
+
+        Args:
+            now: Time to measure age from; defaults to the retention clock
+
+        Returns:
+            int: Number of events removed by this call
+        """
+        if self.backend is None:
+            return 0
+        retention = self.notification_history
+        kept = self.backend.tail(NOTIFICATION_LOG, retention.max_count)
+        through_id = kept[0][0] - 1 if len(kept) == retention.max_count else 0
+        if retention.max_age is not None:
+            cutoff = (now or retention.clock()) - timedelta(seconds=retention.max_age)
+            for log_id, record in kept:
+                if datetime.fromisoformat(record["timestamp"]) >= cutoff:
+                    break
+                through_id = log_id
+        if not through_id:
+            return 0
+        removed = self.backend.trim(NOTIFICATION_LOG, through_id)
+        retention.evict_records([record for _, record in removed])
+        return len(removed)
+
+    def latest_event_id(self) -> int:
+        """
+        Get the ID of the newest recorded event.
+
+        Returns:
+            int: Event ID, or 0 if nothing was recorded
+        """
+        if self.backend is not None:
+            newest = self.backend.tail(NOTIFICATION_LOG, 1)
+            return newest[0][0] if newest else 0
+        return self.version
+
+    def events_since(self, after_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get the events recorded after an event ID.
+
+        Args:
+            after_id: ID of the last event the caller has seen
+            limit: Maximum number of events to return
+
+        Returns:
+            List of notification dictionaries, oldest first
+        """
+        if self.backend is not None:
+            return [{**record, "id": log_id}
+                    for log_id, record in self.backend.read_after(NOTIFICATION_LOG, after_id, limit)]
+        events = self.notification_history.items_after(after_id, lambda event: event.event_id, limit)
+        return [event.to_dict() for event in events]
+
+    def history_version(self) -> str:
+        """
+        Get a token that changes whenever the history changes.
+
+        With a shared backend this is the newest log sequence id, which also
+        covers events recorded by other processes; otherwise it is this
+        instance's epoch and version.
+
+        Returns:
+            str: Opaque history version
+        """
+        if self.backend is not None:
+            return f"log{self.latest_event_id()}"
+        return f"{self.epoch}.{self.version}"
 
     def get_notifications(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -137,10 +327,41 @@ class NotificationService:
         Returns:
             List of notification dictionaries (most recent first)
         """
-        # Return the most recent notifications from history
-        recent_notifications = self.notification_history[-limit:] if len(self.notification_history) > limit else self.notification_history
+        if self.backend is not None:
+            return [{**record, "id": log_id}
+                    for log_id, record in reversed(self.backend.tail(NOTIFICATION_LOG, limit))]
+
         # Reverse to show newest first
-        recent_notifications = list(reversed(recent_notifications))
-        
-        return [notification.to_dict() for notification in recent_notifications if isinstance(notification, Event)]
+        recent_notifications = reversed(self.notification_history.tail(limit))
+        return [notification.to_dict() for notification in recent_notifications]
+
+    def get_archived_notifications(self, after_id: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Page through notifications that aged out of history.
+
+        Args:
+            after_id: Archive ID of the last notification already read
+            limit: Maximum number of notifications to return
+
+        Returns:
+            List of notification dictionaries with their ``archive_id``,
+            oldest first
+        """
+        return [{**record, "archive_id": archive_id}
+                for archive_id, record in self.notification_history.read_archive(after_id, limit)]
+
+    def retention_stats(self) -> Dict[str, Any]:
+        """
+        Get the resident size and archive counts of history.
+
+        With a backend, ``resident`` is the size of the shared log and the
+        eviction counts cover the events this process trimmed from it.
+
+        Returns:
+            Dict of retention statistics
+        """
+        stats = self.notification_history.stats()
+        if self.backend is not None:
+            stats["resident"] = self.backend.log_size(NOTIFICATION_LOG)
+        return stats
 
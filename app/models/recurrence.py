@@ -0,0 +1,150 @@
+from typing import FrozenSet, List, Optional, Tuple
+from datetime import datetime, timedelta
+import bisect
+
+# Shorthands accepted in place of the five fields
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+
+# (name, lowest, highest) of each field, in expression order
+_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day of month", 1, 31),
+    ("month", 1, 12),
+    ("day of week", 0, 7),
+)
+
+# Give up looking for a match this far ahead (covers leap days)
+_SEARCH_YEARS = 8
+
+
+def _parse_field(text: str, name: str, low: int, high: int) -> Tuple[List[int], bool]:
+    """
+    Parse one cron field into its sorted values.
+
+    Returns:
+        Tuple of (values, True if the field was ``*``)
+
+    Raises:
+        ValueError: If the field is malformed or out of range
+    """
+    values = set()
+    for part in text.split(","):
+        base, _, step_text = part.partition("/")
+        step = 1
+        if step_text:
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise ValueError(f"Invalid step in {name} field: {part}")
+            step = int(step_text)
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start_text, _, end_text = base.partition("-")
+            if not (start_text.isdigit() and end_text.isdigit()):
+                raise ValueError(f"Invalid range in {name} field: {part}")
+            start, end = int(start_text), int(end_text)
+        elif base.isdigit():
+            start = int(base)
+            end = high if step_text else start
+        else:
+            raise ValueError(f"Invalid {name} field: {part}")
+        if not low <= start <= end <= high:
+            raise ValueError(f"{name.capitalize()} out of range: {part}")
+        values.update(range(start, end + 1, step))
+    return sorted(values), text == "*"
+
+
+class CronRule:
+    """
+    A parsed five-field cron expression: minute hour day-of-month month
+    day-of-week.
+
+    Fields accept ``*``, numbers, ranges, lists and ``/`` steps; day of
+    week counts from Sunday as 0 (7 is also Sunday). As in cron, when both
+    day fields are restricted a day matching either one matches. Times are
+    naive local datetimes, like scheduled task deadlines.
+    """
+
+    __slots__ = ("expression", "_minutes", "_hours", "_days", "_months", "_weekdays",
+                 "_any_day", "_any_weekday")
+
+    def __init__(self, expression: str):
+        """
+        Parse a cron expression.
+
+        Args:
+            expression: Five space-separated fields or an alias such as
+                ``@daily``
+
+        Raises:
+            ValueError: If the expression is invalid
+        """
+        self.expression = expression
+        fields = CRON_ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != len(_FIELDS):
+            raise ValueError("Cron expression needs 5 fields: minute hour day month weekday")
+        parsed = [_parse_field(text, *spec) for text, spec in zip(fields, _FIELDS)]
+        self._minutes = parsed[0][0]
+        self._hours = parsed[1][0]
+        self._days: FrozenSet[int] = frozenset(parsed[2][0])
+        self._months: FrozenSet[int] = frozenset(parsed[3][0])
+        self._weekdays: FrozenSet[int] = frozenset(day % 7 for day in parsed[4][0])
+        self._any_day = parsed[2][1]
+        self._any_weekday = parsed[4][1]
+
+    def _day_matches(self, when: datetime) -> bool:
+        in_days = when.day in self._days
+        # datetime counts Monday as 0; cron counts Sunday as 0
+        in_weekdays = (when.weekday() + 1) % 7 in self._weekdays
+        if self._any_day or self._any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, after: datetime, inclusive: bool = False) -> Optional[datetime]:
+        """
+        Find the next time the rule matches.
+
+        Whole fields are skipped at a time (months, then days, hours and
+        minutes), so the cost does not depend on how far away the match is
+        in minutes.
+
+        Args:
+            after: Naive local time to search from
+            inclusive: Whether ``after`` itself may match
+
+        Returns:
+            datetime of the next match, or None if none exists (e.g. 30 February)
+        """
+        when = after.replace(second=0, microsecond=0)
+        if when < after or not inclusive:
+            when += timedelta(minutes=1)
+        limit = after.year + _SEARCH_YEARS
+
+        while when.year <= limit:
+            if when.month not in self._months:
+                year, month = (when.year + 1, 1) if when.month == 12 else (when.year, when.month + 1)
+                when = datetime(year, month, 1)
+                continue
+            if not self._day_matches(when):
+                when = datetime(when.year, when.month, when.day) + timedelta(days=1)
+                continue
+            index = bisect.bisect_left(self._hours, when.hour)
+            if index == len(self._hours):
+                when = datetime(when.year, when.month, when.day) + timedelta(days=1)
+                continue
+            if self._hours[index] != when.hour:
+                when = when.replace(hour=self._hours[index], minute=0)
+            index = bisect.bisect_left(self._minutes, when.minute)
+            if index == len(self._minutes):
+                when = when.replace(minute=0) + timedelta(hours=1)
+                continue
+            return when.replace(minute=self._minutes[index])
+        return None
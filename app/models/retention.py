@@ -0,0 +1,317 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import bisect
+import threading
+
+from app.models.storage_backend import Record, StorageBackend
+
+
+class RingBuffer:
+    """
+    Fixed-capacity FIFO over a preallocated list.
+
+    Appending to a full buffer overwrites the oldest item and returns it.
+    Items are indexed oldest first in O(1), so the buffer can be bisected
+    like a sorted list.
+    """
+
+    __slots__ = ("capacity", "_items", "_start", "_size")
+
+    def __init__(self, capacity: int):
+        """
+        Initialize an empty buffer.
+
+        Args:
+            capacity: Most items held
+
+        Raises:
+            ValueError: If the capacity is below 1
+        """
+        if capacity < 1:
+            raise ValueError("Ring buffer capacity must be at least 1")
+        self.capacity = capacity
+        self._items: List[Any] = [None] * capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("ring buffer index out of range")
+        return self._items[(self._start + index) % self.capacity]
+
+    def __iter__(self):
+        return iter(self.slice(0, self._size))
+
+    def append(self, item: Any) -> Optional[Any]:
+        """
+        Add an item as the newest.
+
+        Args:
+            item: Item to add; must not be None
+
+        Returns:
+            The oldest item if the buffer was full, None otherwise
+        """
+        end = (self._start + self._size) % self.capacity
+        evicted = self._items[end] if self._size == self.capacity else None
+        self._items[end] = item
+        if evicted is None:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+        return evicted
+
+    def popleft(self) -> Any:
+        """
+        Remove and return the oldest item.
+
+        Raises:
+            IndexError: If the buffer is empty
+        """
+        if not self._size:
+            raise IndexError("pop from an empty ring buffer")
+        item = self._items[self._start]
+        self._items[self._start] = None
+        self._start = (self._start + 1) % self.capacity
+        self._size -= 1
+        return item
+
+    def slice(self, start: int, stop: int) -> List[Any]:
+        """
+        Copy out items ``start`` to ``stop``, oldest first, in at most two
+        list slices.
+
+        Args:
+            start: Index of the first item
+            stop: Index after the last item
+
+        Returns:
+            List of items
+        """
+        start, stop = max(0, start), min(self._size, stop)
+        if start >= stop:
+            return []
+        first, last = self._start + start, self._start + stop
+        if last <= self.capacity:
+            return self._items[first:last]
+        if first >= self.capacity:
+            return self._items[first - self.capacity:last - self.capacity]
+        return self._items[first:] + self._items[:last - self.capacity]
+
+    def clear(self) -> None:
+        """Remove every item."""
+        self._items = [None] * self.capacity
+        self._start = 0
+        self._size = 0
+
+
+class RetentionBuffer:
+    """
+    Keeps the newest items within a count limit and an optional age limit.
+
+    Items live in a RingBuffer, oldest first, stamped with the time they
+    were added. An item leaves when a new one arrives at the count limit,
+    or on expire() once it has been kept longer than the age limit. Items that leave are handed back to
+    the caller and, if there is an archive, appended to one of its logs in
+    batches, where they stay readable page by page. A partition function
+    splits the archive into one log per partition (e.g. per user), so
+    reading one partition's page does not skip over everyone else's.
+    """
+
+    def __init__(self, max_count: int, max_age: Optional[float] = None,
+                 archive: Optional[StorageBackend] = None, log: str = "archive",
+                 partition: Optional[Callable[[Any], Optional[str]]] = None,
+                 archive_batch: int = 100, clock: Callable[[], datetime] = datetime.now):
+        """
+        Initialize the buffer.
+
+        Args:
+            max_count: Most items kept
+            max_age: Seconds an item is kept, or None for no age limit
+            archive: Backend whose log receives items that leave, or None
+                to drop them
+            log: Name of the archive log, or prefix of the partition logs
+            partition: Partition an item is archived under, or None for
+                one archive log
+            archive_batch: Items gathered before they are written together
+            clock: Current time, used when add and expire times are not given
+        """
+        self.max_count = max_count
+        self.max_age = max_age
+        self.archive = archive
+        self.log = log
+        self.partition = partition
+        self.archive_batch = archive_batch
+        self.clock = clock
+        self._ring = RingBuffer(max_count)
+        self._pending: Dict[str, List[Record]] = {}
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.archived = 0
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def append(self, item: Any, now: Optional[datetime] = None) -> List[Any]:
+        """
+        Keep an item as the newest.
+
+        Args:
+            item: Item with a ``to_dict()`` method for the archive
+            now: Time the item is added; defaults to the clock
+
+        Returns:
+            List holding the oldest item if it was pushed out, else empty
+        """
+        with self._lock:
+            evicted = self._ring.append((now or self.clock(), item))
+            if evicted is None:
+                return []
+            self._evict([evicted[1]])
+            return [evicted[1]]
+
+    def expire(self, now: Optional[datetime] = None) -> List[Any]:
+        """
+        Remove items older than the age limit.
+
+        Args:
+            now: Time to measure age from; defaults to the clock
+
+        Returns:
+            List of removed items, oldest first
+        """
+        if self.max_age is None:
+            return []
+        cutoff = (now or self.clock()) - timedelta(seconds=self.max_age)
+        with self._lock:
+            ring = self._ring
+            expired = []
+            while ring and ring[0][0] < cutoff:
+                expired.append(ring.popleft()[1])
+            if expired:
+                self._evict(expired)
+            return expired
+
+    def evict_records(self, records: List[Record]) -> None:
+        """
+        Count records trimmed from history kept elsewhere, such as a shared
+        log, as evicted and queue them for the unpartitioned archive log.
+
+        Args:
+            records: Records that left history, oldest first
+        """
+        with self._lock:
+            self.evicted += len(records)
+            if self.archive is None:
+                return
+            self._queue([(self.log, record) for record in records])
+
+    def _evict(self, items: List[Any]) -> None:
+        """Count items that left and queue them for the archive."""
+        self.evicted += len(items)
+        if self.archive is None:
+            return
+        self._queue([(self._log_of(None if self.partition is None else self.partition(item)), item.to_dict())
+                     for item in items])
+
+    def _queue(self, records: List[Tuple[str, Record]]) -> None:
+        """Queue (log, record) pairs, writing them once a batch is full."""
+        for log, record in records:
+            self._pending.setdefault(log, []).append(record)
+        self._pending_count += len(records)
+        if self._pending_count >= self.archive_batch:
+            self._flush()
+
+    def _log_of(self, partition: Optional[str]) -> str:
+        return self.log if partition is None else f"{self.log}:{partition}"
+
+    def _flush(self) -> None:
+        for log, records in self._pending.items():
+            self.archive.append_many(log, records)
+        self.archived += self._pending_count
+        self._pending = {}
+        self._pending_count = 0
+
+    def flush(self) -> None:
+        """Write items waiting for the archive."""
+        if self.archive is None:
+            return
+        with self._lock:
+            self._flush()
+
+    def tail(self, limit: int) -> List[Any]:
+        """
+        Get the newest items.
+
+        Args:
+            limit: Most items to return
+
+        Returns:
+            List of items, oldest first
+        """
+        with self._lock:
+            entries = self._ring.slice(len(self._ring) - limit, len(self._ring))
+        return [item for _, item in entries]
+
+    def items_after(self, value: Any, key: Callable[[Any], Any], limit: int) -> List[Any]:
+        """
+        Binary-search for the items following a key value.
+
+        Args:
+            value: Return only items whose key is greater
+            key: Sort key the items are in increasing order of
+            limit: Most items to return
+
+        Returns:
+            List of items, oldest first
+        """
+        with self._lock:
+            start = bisect.bisect_right(self._ring, value, key=lambda entry: key(entry[1]))
+            entries = self._ring.slice(start, start + limit)
+        return [item for _, item in entries]
+
+    def read_archive(self, after_id: int = 0, limit: int = 100,
+                     partition: Optional[str] = None) -> List[Tuple[int, Record]]:
+        """
+        Page through archived items.
+
+        Args:
+            after_id: Archive ID of the last item already read
+            limit: Most items to return
+            partition: Partition to read, when the archive is partitioned
+
+        Returns:
+            List of (archive ID, record), oldest first; empty without an archive
+        """
+        if self.archive is None:
+            return []
+        self.flush()
+        return self.archive.read_after(self._log_of(partition), after_id, limit)
+
+    def clear(self) -> None:
+        """Drop resident items without archiving them."""
+        with self._lock:
+            self._ring.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get resident size and eviction counts.
+
+        Returns:
+            Dict with the limits, resident and archived counts
+        """
+        return {
+            "resident": len(self._ring),
+            "max_count": self.max_count,
+            "max_age_seconds": self.max_age,
+            "evicted": self.evicted,
+            "archived": self.archived,
+            "archive_pending": self._pending_count,
+            "archive_enabled": self.archive is not None
+        }
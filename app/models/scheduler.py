@@ -1,12 +1,63 @@
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import Callable, List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta
+import bisect
+import heapq
+import itertools
 import uuid
+from app.models.storage_backend import StorageBackend
+from app.models.recurrence import CronRule
+from app.models.retention import RetentionBuffer
+
+# Backend namespace holding scheduled tasks when persistence is enabled
+TASK_NAMESPACE = "scheduled_tasks"
+
+# Deadline ticks of the timing wheel count from here
+_EPOCH = datetime(1970, 1, 1)
+
+# Called with each newly scheduled task
+ScheduleListener = Callable[["ScheduledTask"], None]
+
+# Called with the IDs of cancelled tasks
+CancelListener = Callable[[List[str]], None]
+
+
+def parse_task_time(scheduled_time: str) -> Optional[datetime]:
+    """
+    Parse a scheduled time string to a naive local datetime.
+
+    Times with an offset are converted to local time so every deadline
+    compares against ``datetime.now()``.
+
+    Args:
+        scheduled_time: ISO format time string
+
+    Returns:
+        Parsed datetime object if valid, None otherwise
+    """
+    try:
+        parsed = datetime.fromisoformat(scheduled_time)
+    except (TypeError, ValueError):
+        # Invalid time format
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
 
 
 class ScheduledTask:
-    """Represents a scheduled task for a device."""
+    """
+    Represents a scheduled task for a device.
+
+    A recurring task is stored once with a cron rule; only its next
+    occurrence is queued, and the one after is computed when it fires.
+    """
 
-    def __init__(self, task_id: str, device_id: str, action: str, scheduled_time: str):
+    __slots__ = ("task_id", "device_id", "action", "scheduled_time", "brightness", "user_id",
+                 "recurrence", "rule", "due_at", "last_due_at", "executed", "created_at")
+
+    def __init__(self, task_id: str, device_id: str, action: str, scheduled_time: str,
+                 brightness: Optional[int] = None, user_id: Optional[str] = None,
+                 recurrence: Optional[str] = None):
         """
         Initialize a scheduled task.
 
@@ -14,15 +65,57 @@ class ScheduledTask:
             task_id: Unique identifier for the task
             device_id: ID of the device to control
             action: Action to perform (e.g., 'turn_on', 'turn_off', 'set_brightness')
-            scheduled_time: ISO format time string when task should execute
+            scheduled_time: ISO format time string when task should execute;
+                for a recurring task, the time from which occurrences start
+            brightness: Brightness level for 'set_brightness'
+            user_id: Owner of the dashboard holding the device
+            recurrence: Cron expression to repeat on, e.g. '0 7 * * 1-5'
+
+        Raises:
+            ValueError: If the recurrence is not a valid cron expression or
+                has no occurrence from scheduled_time on
         """
         self.task_id = task_id
         self.device_id = device_id
         self.action = action
         self.scheduled_time = scheduled_time
+        self.brightness = brightness
+        self.user_id = user_id
+        self.recurrence = recurrence
+        self.rule: Optional[CronRule] = CronRule(recurrence) if recurrence else None
+        # Parsed once; None if scheduled_time is invalid, so it never runs
+        self.due_at: Optional[datetime] = parse_task_time(scheduled_time)
+        if self.rule is not None and self.due_at is not None:
+            self.due_at = self.rule.next_after(self.due_at, inclusive=True)
+            if self.due_at is None:
+                raise ValueError(f"Recurrence '{recurrence}' has no occurrence after {scheduled_time}")
+            self.scheduled_time = self.due_at.isoformat()
+        # Occurrence that fired last, for lateness
+        self.last_due_at: Optional[datetime] = None
         self.executed = False
         self.created_at = datetime.now().isoformat()
 
+    def fire(self, now: datetime) -> None:
+        """
+        Record that the task ran.
+
+        A one-shot task becomes executed. A recurring task moves on to its
+        first occurrence after now, so missed occurrences run only once,
+        and becomes executed only when its rule has no further matches.
+
+        Args:
+            now: Time the task ran
+        """
+        self.last_due_at = self.due_at
+        if self.rule is None:
+            self.executed = True
+            return
+        self.due_at = self.rule.next_after(max(self.due_at, now))
+        if self.due_at is None:
+            self.executed = True
+        else:
+            self.scheduled_time = self.due_at.isoformat()
+
     def to_dict(self) -> Dict[str, Any]:
         """
         Convert task to dictionary representation.
@@ -35,17 +128,552 @@ class ScheduledTask:
             "device_id": self.device_id,
             "action": self.action,
             "scheduled_time": self.scheduled_time,
+            "brightness": self.brightness,
+            "user_id": self.user_id,
+            "recurrence": self.recurrence,
+            "last_due_at": self.last_due_at.isoformat() if self.last_due_at else None,
             "executed": self.executed,
             "created_at": self.created_at
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ScheduledTask':
+        """
+        Recreate a task from its to_dict() representation.
+
+        Args:
+            data: Dictionary produced by to_dict()
+
+        Returns:
+            ScheduledTask with its saved state restored
+        """
+        task = cls(
+            data["task_id"],
+            data["device_id"],
+            data["action"],
+            data["scheduled_time"],
+            brightness=data.get("brightness"),
+            user_id=data.get("user_id"),
+            recurrence=data.get("recurrence")
+        )
+        if data.get("last_due_at"):
+            task.last_due_at = parse_task_time(data["last_due_at"])
+        task.executed = data.get("executed", False)
+        task.created_at = data.get("created_at", task.created_at)
+        return task
 
-class Scheduler:
-    """Manages scheduled tasks for devices."""
+
+class HeapTaskQueue:
+    """
+    Min-heap of pending tasks ordered by deadline.
+
+    Cancelled tasks are removed lazily: their heap entry is marked dead and
+    skipped when it reaches the top, so cancel is O(1) and taking k due
+    tasks costs O(k log n). The heap is rebuilt once dead entries
+    outnumber live ones.
+    """
 
     def __init__(self):
-        """Initialize the scheduler with an empty task list."""
-        self.tasks: List[ScheduledTask] = []
+        """Initialize an empty queue."""
+        # Entries are [due_at, sequence, task]; task is None once cancelled
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def push(self, task: ScheduledTask) -> None:
+        """
+        Queue a task by its deadline, replacing any queued task with its ID.
+
+        Args:
+            task: Task with a parsed due_at
+        """
+        self.discard(task.task_id)
+        entry = [task.due_at, next(self._sequence), task]
+        self._entries[task.task_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def discard(self, task_id: str) -> bool:
+        """
+        Remove a queued task.
+
+        Args:
+            task_id: ID of the task to remove
+
+        Returns:
+            bool: True if the task was queued
+        """
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return False
+        entry[2] = None
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [entry for entry in self._heap if entry[2] is not None]
+            heapq.heapify(self._heap)
+        return True
+
+    def pop_due(self, now: datetime) -> List[ScheduledTask]:
+        """
+        Remove and return the tasks due at or before a time, earliest first.
+
+        Args:
+            now: Current time
+
+        Returns:
+            List of due tasks
+        """
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] <= now:
+            task = heapq.heappop(heap)[2]
+            if task is not None:
+                del self._entries[task.task_id]
+                due.append(task)
+        return due
+
+    def next_due(self) -> Optional[datetime]:
+        """
+        Get the earliest pending deadline.
+
+        Returns:
+            datetime of the next due task, or None if nothing is queued
+        """
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+
+class TimingWheelTaskQueue:
+    """
+    Hierarchical timing wheel of pending tasks.
+
+    Time is cut into ticks. Level 0 has one slot per tick of the current
+    block of ``2**slot_bits`` ticks, and each slot of a higher level spans
+    a whole block of the level below. A task goes into the lowest level
+    whose block it shares with the current tick, so insert and cancel are
+    O(1) dict operations. As the current tick advances, its level-0 slot
+    expires and, at block boundaries, the matching higher-level slot is
+    cascaded down; runs of empty ticks are skipped. Tasks beyond the top
+    level wait in an overflow heap until they come within range.
+    """
+
+    def __init__(self, tick: float = 1.0, slot_bits: int = 6, levels: int = 4,
+                 now: Optional[datetime] = None):
+        """
+        Initialize an empty wheel.
+
+        Args:
+            tick: Tick length in seconds
+            slot_bits: Log2 of the slots per level
+            levels: Number of levels; the wheel covers
+                ``2**(slot_bits * levels)`` ticks ahead
+            now: Time of the current tick; defaults to now
+        """
+        self.tick = tick
+        self._tick_delta = timedelta(seconds=tick)
+        self._bits = slot_bits
+        self._mask = (1 << slot_bits) - 1
+        self._levels = levels
+        # Slots map task_id to (deadline tick, task)
+        self._wheels: List[List[Dict[str, Tuple[int, ScheduledTask]]]] = [
+            [{} for _ in range(1 << slot_bits)] for _ in range(levels)
+        ]
+        self._sizes = [0] * levels
+        # task_id -> (level, slot); level == levels means the overflow heap
+        self._where: Dict[str, Tuple[int, int]] = {}
+        # Entries are [due_at, sequence, task]; task is None once cancelled
+        self._overflow: List[list] = []
+        self._overflow_entries: Dict[str, list] = {}
+        self._sequence = itertools.count()
+        self._current = self._tick_of(now or datetime.now())
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def _tick_of(self, when: datetime) -> int:
+        return (when - _EPOCH) // self._tick_delta
+
+    def _place(self, deadline: int, task: ScheduledTask) -> None:
+        """Put a task in the slot for its deadline tick."""
+        current = self._current
+        bits = self._bits
+        if deadline <= current:
+            deadline = current
+            level = 0
+        else:
+            level = ((deadline ^ current).bit_length() - 1) // bits
+        if level >= self._levels:
+            entry = [task.due_at, next(self._sequence), task]
+            self._overflow_entries[task.task_id] = entry
+            heapq.heappush(self._overflow, entry)
+            self._where[task.task_id] = (self._levels, 0)
+            return
+        slot = (deadline >> (bits * level)) & self._mask
+        self._wheels[level][slot][task.task_id] = (deadline, task)
+        self._sizes[level] += 1
+        self._where[task.task_id] = (level, slot)
+
+    def push(self, task: ScheduledTask) -> None:
+        """
+        Queue a task by its deadline, replacing any queued task with its ID.
+
+        Args:
+            task: Task with a parsed due_at
+        """
+        if task.task_id in self._where:
+            self.discard(task.task_id)
+        self._place((task.due_at - _EPOCH) // self._tick_delta, task)
+
+    def discard(self, task_id: str) -> bool:
+        """
+        Remove a queued task.
+
+        Args:
+            task_id: ID of the task to remove
+
+        Returns:
+            bool: True if the task was queued
+        """
+        location = self._where.pop(task_id, None)
+        if location is None:
+            return False
+        level, slot = location
+        if level == self._levels:
+            self._overflow_entries.pop(task_id)[2] = None
+        else:
+            del self._wheels[level][slot][task_id]
+            self._sizes[level] -= 1
+        return True
+
+    def _live_overflow(self) -> Optional[list]:
+        """Top overflow entry, dropping cancelled ones."""
+        overflow = self._overflow
+        while overflow and overflow[0][2] is None:
+            heapq.heappop(overflow)
+        return overflow[0] if overflow else None
+
+    def _advance(self, target: int) -> None:
+        """Move the current tick towards target, skipping empty ticks."""
+        old = self._current
+        level = next((level for level, size in enumerate(self._sizes) if size), None)
+        if level == 0:
+            new = old + 1
+        elif level is None:
+            entry = self._live_overflow()
+            new = target if entry is None else min(target, self._tick_of(entry[0]))
+        else:
+            span = 1 << (self._bits * level)
+            new = min(target, (old // span + 1) * span)
+        self._current = new
+
+        # Cascade the slots whose block was entered, top level first
+        for level in range(self._levels - 1, 0, -1):
+            shift = self._bits * level
+            if new >> shift == old >> shift:
+                continue
+            slot = self._wheels[level][(new >> shift) & self._mask]
+            if slot:
+                self._sizes[level] -= len(slot)
+                self._wheels[level][(new >> shift) & self._mask] = {}
+                for deadline, task in slot.values():
+                    self._place(deadline, task)
+
+        top_shift = self._bits * self._levels
+        entry = self._live_overflow()
+        while entry is not None and self._tick_of(entry[0]) >> top_shift <= new >> top_shift:
+            heapq.heappop(self._overflow)
+            task = entry[2]
+            del self._overflow_entries[task.task_id]
+            self._place(self._tick_of(task.due_at), task)
+            entry = self._live_overflow()
+
+    def pop_due(self, now: datetime) -> List[ScheduledTask]:
+        """
+        Remove and return the tasks due at or before a time, earliest first.
+
+        Args:
+            now: Current time
+
+        Returns:
+            List of due tasks
+        """
+        target = self._tick_of(now)
+        due: List[ScheduledTask] = []
+        while self._current < target:
+            index = self._current & self._mask
+            slot = self._wheels[0][index]
+            if slot:
+                for task_id, (_, task) in slot.items():
+                    del self._where[task_id]
+                    due.append(task)
+                self._sizes[0] -= len(slot)
+                self._wheels[0][index] = {}
+            self._advance(target)
+
+        # Tasks of the current tick may not all be due yet
+        slot = self._wheels[0][self._current & self._mask]
+        for task_id, (_, task) in list(slot.items()):
+            if task.due_at <= now:
+                del slot[task_id]
+                del self._where[task_id]
+                self._sizes[0] -= 1
+                due.append(task)
+        due.sort(key=lambda task: task.due_at)
+        return due
+
+    def next_due(self) -> Optional[datetime]:
+        """
+        Get the earliest pending deadline.
+
+        Returns:
+            datetime of the next due task, or None if nothing is queued
+        """
+        current = self._current
+        for level, size in enumerate(self._sizes):
+            if not size:
+                continue
+            wheel = self._wheels[level]
+            start = (current >> (self._bits * level)) & self._mask
+            # Level 0 includes the current tick's slot
+            for index in range(start if level == 0 else start + 1, self._mask + 1):
+                if wheel[index]:
+                    return min(task.due_at for _, task in wheel[index].values())
+        entry = self._live_overflow()
+        return entry[0] if entry is not None else None
+
+
+# Task queue implementations selectable by name
+TASK_QUEUES: Dict[str, Callable[[], Any]] = {
+    "heap": HeapTaskQueue,
+    "wheel": TimingWheelTaskQueue,
+}
+
+
+class SchedulerShard:
+    """
+    One user's scheduled tasks.
+
+    Tasks are kept by ID in scheduling order and by sequence number, each
+    device keeps the sorted sequence numbers of its tasks, and pending
+    tasks are queued by deadline. ``head`` is the deadline this shard was
+    last entered under in the scheduler's heap of shard heads.
+    """
+
+    def __init__(self, queue: Any):
+        """
+        Initialize an empty shard.
+
+        Args:
+            queue: Pending task queue, e.g. a HeapTaskQueue
+        """
+        self.tasks: Dict[str, ScheduledTask] = {}
+        self.seqs: Dict[str, int] = {}
+        self.by_seq: Dict[int, ScheduledTask] = {}
+        self.device_index: Dict[str, List[int]] = {}
+        self.queue = queue
+        self.head: Optional[datetime] = None
+        # Bumped whenever one of this shard's tasks changes
+        self.version = 0
+
+    def add(self, task: ScheduledTask, seq: int) -> None:
+        """Track and index a task and queue it if it is still pending."""
+        self.tasks[task.task_id] = task
+        self.seqs[task.task_id] = seq
+        self.by_seq[seq] = task
+        # Sequence numbers only grow, so appending keeps the list sorted
+        self.device_index.setdefault(task.device_id, []).append(seq)
+        if not task.executed and task.due_at is not None:
+            self.queue.push(task)
+
+    def remove(self, task_id: str) -> Optional[ScheduledTask]:
+        """Forget a task, unindex it and drop it from the queue."""
+        task = self.tasks.pop(task_id, None)
+        if task is None:
+            return None
+        seq = self.seqs.pop(task_id)
+        del self.by_seq[seq]
+        seqs = self.device_index[task.device_id]
+        del seqs[bisect.bisect_left(seqs, seq)]
+        if not seqs:
+            del self.device_index[task.device_id]
+        self.queue.discard(task_id)
+        return task
+
+
+class Scheduler:
+    """
+    Manages scheduled tasks for devices.
+
+    Tasks are partitioned into one SchedulerShard per user, so listing,
+    paging or cancelling a user's tasks only touches that user's shard.
+    Each shard queues its pending tasks by deadline in a min-heap or, for
+    many short-lived tasks, a timing wheel.
+
+    Due tasks are found through a heap of shard heads: every shard with
+    pending tasks is entered under its earliest deadline, and only shards
+    whose head is due are visited. Entries are replaced rather than
+    updated; one whose deadline no longer matches its shard's head is
+    stale and skipped.
+
+    Executed tasks stay listed until the retention buffer, if any, lets
+    them go; they are then forgotten and archived.
+    """
+
+    def __init__(self, backend: Optional[StorageBackend] = None, queue: str = "heap",
+                 retention: Optional[RetentionBuffer] = None):
+        """
+        Initialize the scheduler with no tasks.
+
+        Args:
+            backend: Optional backend that tasks are persisted to
+            queue: Name of the pending task queue in TASK_QUEUES
+            retention: Bounds how many executed tasks are kept, and for how
+                long; None keeps them all
+
+        Raises:
+            ValueError: If the queue name is unknown
+        """
+        if queue not in TASK_QUEUES:
+            raise ValueError(f"Unknown task queue: {queue}")
+        self._queue_factory = TASK_QUEUES[queue]
+        self._shards: Dict[Optional[str], SchedulerShard] = {}
+        self._owners: Dict[str, Optional[str]] = {}
+        self._heads: List[list] = []
+        self._next_seq = itertools.count(1)
+        self._listeners: List[ScheduleListener] = []
+        self._cancel_listeners: List[CancelListener] = []
+        self.backend = backend
+        self.retention = retention
+        # Bumped whenever the task list or a task changes; the epoch is
+        # unique to this instance because versions restart at 0.
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:12]
+
+    def restore(self) -> int:
+        """
+        Load persisted tasks from the backend.
+
+        Returns:
+            int: Number of tasks restored
+        """
+        if self.backend is None:
+            return 0
+        records = self.backend.items(TASK_NAMESPACE)
+        self._shards = {}
+        self._owners = {}
+        self._heads = []
+        tasks = [ScheduledTask.from_dict(record) for record in records.values()]
+        for task in tasks:
+            self._add(task)
+        if self.retention is not None:
+            self.retention.clear()
+            executed = [task for task in tasks if task.executed]
+            executed.sort(key=lambda task: task.last_due_at or _EPOCH)
+            self._retire(executed, datetime.now())
+        self.version += 1
+        return len(self._owners)
+
+    def add_listener(self, listener: ScheduleListener) -> None:
+        """
+        Register a callback for newly scheduled tasks.
+
+        Args:
+            listener: Callback to register
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: ScheduleListener) -> None:
+        """
+        Unregister a schedule listener.
+
+        Args:
+            listener: Callback to remove
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def add_cancel_listener(self, listener: CancelListener) -> None:
+        """
+        Register a callback for cancelled tasks.
+
+        Args:
+            listener: Callback to register
+        """
+        if listener not in self._cancel_listeners:
+            self._cancel_listeners.append(listener)
+
+    def _push_head(self, user_id: Optional[str], shard: SchedulerShard, due_at: datetime) -> None:
+        """Enter a shard in the heads heap under a new, earlier deadline."""
+        shard.head = due_at
+        heapq.heappush(self._heads, [due_at, next(self._next_seq), user_id])
+        # Stale entries only leave the heap when they reach the top, so
+        # rebuild it once they outnumber the shards.
+        if len(self._heads) > 2 * len(self._shards) + 64:
+            self._heads = [
+                [shard.head, next(self._next_seq), key]
+                for key, shard in self._shards.items() if shard.head is not None
+            ]
+            heapq.heapify(self._heads)
+
+    def _reset_head(self, user_id: Optional[str], shard: SchedulerShard) -> None:
+        """Re-enter a shard under its current earliest deadline, if any."""
+        due_at = shard.queue.next_due()
+        if due_at is None:
+            shard.head = None
+        else:
+            self._push_head(user_id, shard, due_at)
+
+    def _add(self, task: ScheduledTask) -> None:
+        """Add a task to its owner's shard, replacing one with the same ID."""
+        if task.task_id in self._owners:
+            self._remove(task.task_id)
+        shard = self._shards.get(task.user_id)
+        if shard is None:
+            shard = self._shards[task.user_id] = SchedulerShard(self._queue_factory())
+        shard.add(task, next(self._next_seq))
+        shard.version += 1
+        self._owners[task.task_id] = task.user_id
+        if (not task.executed and task.due_at is not None
+                and (shard.head is None or task.due_at < shard.head)):
+            self._push_head(task.user_id, shard, task.due_at)
+
+    def _remove(self, task_id: str) -> Optional[ScheduledTask]:
+        """Remove a task from its owner's shard."""
+        if task_id not in self._owners:
+            return None
+        user_id = self._owners.pop(task_id)
+        shard = self._shards[user_id]
+        task = shard.remove(task_id)
+        shard.version += 1
+        if task.due_at is not None and task.due_at == shard.head:
+            self._reset_head(user_id, shard)
+        return task
+
+    def _retire(self, executed: List[ScheduledTask], now: datetime) -> None:
+        """Hand executed tasks to retention and forget the ones it lets go."""
+        if self.retention is None:
+            return
+        released: List[ScheduledTask] = []
+        for task in executed:
+            released.extend(self.retention.append(task, now))
+        released.extend(self.retention.expire(now))
+        # Released tasks may have been cancelled or replaced meanwhile
+        task_ids = [task.task_id for task in released if self.get_task(task.task_id) is task]
+        for task_id in task_ids:
+            self._remove(task_id)
+        if task_ids:
+            self.version += 1
+            if self.backend is not None:
+                self.backend.write_batch({}, {TASK_NAMESPACE: task_ids})
+
+    def _persist(self, task: ScheduledTask) -> None:
+        """Write a task to the backend, if one is configured."""
+        if self.backend is not None:
+            self.backend.put(TASK_NAMESPACE, task.task_id, task.to_dict())
 
     def schedule_task(self, task: ScheduledTask) -> bool:
         """
@@ -57,7 +685,11 @@ class Scheduler:
         Returns:
             bool: True if scheduled successfully
         """
-        self.tasks.append(task)
+        self._add(task)
+        self.version += 1
+        self._persist(task)
+        for listener in self._listeners:
+            listener(task)
         return True
 
     def cancel_task(self, task_id: str) -> bool:
@@ -70,46 +702,197 @@ class Scheduler:
         Returns:
             bool: True if cancelled successfully, False if not found
         """
-        initial_length = len(self.tasks)
-        self.tasks = [t for t in self.tasks if t.task_id != task_id]
-        return len(self.tasks) < initial_length
+        if self._remove(task_id) is None:
+            return False
+        self.version += 1
+        if self.backend is not None:
+            self.backend.delete(TASK_NAMESPACE, task_id)
+        for listener in self._cancel_listeners:
+            listener([task_id])
+        return True
 
-    def _parse_task_time(self, scheduled_time: str) -> Optional[datetime]:
+    def cancel_device_tasks(self, device_id: str, user_id: Optional[str] = None) -> int:
         """
-        Parse a scheduled time string to a datetime object.
+        Cancel every task for one device.
 
         Args:
-            scheduled_time: ISO format time string
+            device_id: ID of the device
+            user_id: Owner of the device's dashboard
 
         Returns:
-            Parsed datetime object if valid, None otherwise
+            int: Number of tasks cancelled
         """
-        try:
-            return datetime.fromisoformat(scheduled_time)
-        except ValueError:
-            # Invalid time format
-            return None
+        shard = self._shards.get(user_id)
+        seqs = shard.device_index.get(device_id) if shard is not None else None
+        if not seqs:
+            return 0
+        task_ids = [shard.by_seq[seq].task_id for seq in seqs]
+        for task_id in task_ids:
+            shard.remove(task_id)
+            del self._owners[task_id]
+        shard.version += 1
+        self._reset_head(user_id, shard)
+        self.version += 1
+        if self.backend is not None:
+            self.backend.write_batch({}, {TASK_NAMESPACE: task_ids})
+        for listener in self._cancel_listeners:
+            listener(task_ids)
+        return len(task_ids)
 
-    def execute_tasks(self) -> List[ScheduledTask]:
+    def get_device_tasks(self, device_id: str, user_id: Optional[str] = None, after: int = 0,
+                         limit: Optional[int] = None) -> Tuple[List[ScheduledTask], Optional[int]]:
         """
-        Execute tasks that are due (simplified - just returns tasks).
-        In production, this would check scheduled_time and execute actions.
+        Get one device's tasks in scheduling order, a page at a time.
+
+        Costs O(log k + page size) for a device with k tasks.
+
+        Args:
+            device_id: ID of the device
+            user_id: Owner of the device's dashboard
+            after: Cursor from the previous page; 0 starts at the beginning
+            limit: Most tasks to return, or None for all remaining
 
         Returns:
-            List of tasks that should be executed
+            Tuple of (tasks, cursor for the next page or None if this was
+            the last page)
         """
-        current_time = datetime.now()
-        due_tasks = []
+        shard = self._shards.get(user_id)
+        seqs = shard.device_index.get(device_id, []) if shard is not None else []
+        start = bisect.bisect_right(seqs, after)
+        end = len(seqs) if limit is None else min(len(seqs), start + limit)
+        tasks = [shard.by_seq[seq] for seq in seqs[start:end]]
+        next_seq = seqs[end - 1] if end < len(seqs) else None
+        return tasks, next_seq
 
-        for task in self.tasks:
-            if not task.executed:
-                task_time = self._parse_task_time(task.scheduled_time)
-                if task_time and task_time <= current_time:
-                    task.executed = True
-                    due_tasks.append(task)
+    def execute_tasks(self, now: Optional[datetime] = None) -> List[ScheduledTask]:
+        """
+        Mark the tasks that are due as executed.
+
+        Only shards whose earliest deadline has passed are visited.
+        Recurring tasks are queued again for their next occurrence; tasks
+        that are done go to retention, which may let older ones go.
+
+        Args:
+            now: Time to compare deadlines against; defaults to now
 
+        Returns:
+            List of tasks that became due, earliest first
+        """
+        now = now or datetime.now()
+        due_tasks: List[ScheduledTask] = []
+        executed: List[ScheduledTask] = []
+        # _reset_head may rebuild the heap, so always go through self._heads
+        while self._heads and self._heads[0][0] <= now:
+            due_at, _, user_id = heapq.heappop(self._heads)
+            shard = self._shards.get(user_id)
+            if shard is None or shard.head != due_at:
+                continue
+            shard_tasks = shard.queue.pop_due(now)
+            for task in shard_tasks:
+                task.fire(now)
+                if task.executed:
+                    executed.append(task)
+                else:
+                    shard.queue.push(task)
+                self._persist(task)
+            if shard_tasks:
+                shard.version += 1
+                due_tasks.extend(shard_tasks)
+            self._reset_head(user_id, shard)
+        if due_tasks:
+            self.version += 1
+            due_tasks.sort(key=lambda task: task.last_due_at)
+        self._retire(executed, now)
         return due_tasks
 
+    def next_due(self) -> Optional[datetime]:
+        """
+        Get the deadline of the next pending task.
+
+        Returns:
+            datetime of the earliest pending task, or None if there is none
+        """
+        heads = self._heads
+        while heads:
+            due_at, _, user_id = heads[0]
+            shard = self._shards.get(user_id)
+            if shard is not None and shard.head == due_at:
+                return due_at
+            heapq.heappop(heads)
+        return None
+
+    def pending_count(self) -> int:
+        """Number of tasks waiting to run."""
+        return sum(len(shard.queue) for shard in self._shards.values())
+
+    def get_tasks(self) -> List[ScheduledTask]:
+        """
+        Get every user's scheduled tasks as objects, in scheduling order.
+
+        Returns:
+            List of ScheduledTask instances
+        """
+        shards = [shard.by_seq.items() for shard in self._shards.values()]
+        return [task for _, task in heapq.merge(*shards)]
+
+    def get_user_tasks(self, user_id: Optional[str]) -> List[ScheduledTask]:
+        """
+        Get one user's scheduled tasks, in scheduling order.
+
+        Args:
+            user_id: Owner of the tasks
+
+        Returns:
+            List of ScheduledTask instances
+        """
+        shard = self._shards.get(user_id)
+        return list(shard.tasks.values()) if shard is not None else []
+
+    def user_version(self, user_id: Optional[str]) -> int:
+        """
+        Get the version of one user's tasks, bumped whenever they change.
+
+        Args:
+            user_id: Owner of the tasks
+
+        Returns:
+            int: Version counter; 0 if the user never had tasks
+        """
+        shard = self._shards.get(user_id)
+        return shard.version if shard is not None else 0
+
+    def get_archived_tasks(self, user_id: Optional[str], after_id: int = 0,
+                           limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Page through one user's executed tasks that left retention.
+
+        Args:
+            user_id: Owner of the tasks
+            after_id: Archive ID of the last task already read
+            limit: Most tasks to return
+
+        Returns:
+            List of task dictionaries with their ``archive_id``, oldest first
+        """
+        if self.retention is None:
+            return []
+        return [{**record, "archive_id": archive_id}
+                for archive_id, record in self.retention.read_archive(after_id, limit, partition=user_id)]
+
+    def retention_stats(self) -> Dict[str, Any]:
+        """
+        Get resident task counts and executed task retention statistics.
+
+        Returns:
+            Dict with resident and pending task counts and, if retention is
+            configured, its statistics under ``executed``
+        """
+        return {
+            "tasks": len(self._owners),
+            "pending": self.pending_count(),
+            "executed": self.retention.stats() if self.retention is not None else None
+        }
+
     def get_scheduled_tasks(self) -> List[Dict[str, Any]]:
         """
         Get all scheduled tasks.
@@ -117,7 +900,7 @@ class Scheduler:
         Returns:
             List of task dictionaries
         """
-        return [task.to_dict() for task in self.tasks]
+        return [task.to_dict() for task in self.get_tasks()]
 
     def get_task(self, task_id: str) -> Optional[ScheduledTask]:
         """
@@ -129,7 +912,6 @@ class Scheduler:
         Returns:
             ScheduledTask if found, None otherwise
         """
-        for task in self.tasks:
-            if task.task_id == task_id:
-                return task
-        return None
\ No newline at end of file
+        if task_id not in self._owners:
+            return None
+        return self._shards[self._owners[task_id]].tasks.get(task_id)
@@ -0,0 +1,204 @@
+from typing import Callable, Deque, Dict, Optional, Tuple
+from collections import OrderedDict, deque
+import threading
+import time
+import uuid
+
+from app.models.user import User
+
+
+class Session:
+    """A single login session bound to a user."""
+
+    __slots__ = ("session_id", "user", "created_at", "last_seen")
+
+    def __init__(self, session_id: str, user: User, created_at: float):
+        """
+        Initialize a session.
+
+        Args:
+            session_id: Opaque session identifier handed to the client
+            user: User the session belongs to
+            created_at: Clock reading when the session was created
+        """
+        self.session_id = session_id
+        self.user = user
+        self.created_at = created_at
+        self.last_seen = created_at
+
+
+class SessionStore:
+    """
+    Session store keyed by session ID with a user_id index.
+
+    Lookups are O(1) regardless of how many users exist. Sessions expire
+    after ``idle_ttl`` seconds without use or ``absolute_ttl`` seconds after
+    creation, whichever comes first, and the least recently used session is
+    evicted once ``max_sessions`` is reached.
+    """
+
+    def __init__(self, idle_ttl: float = 1800.0, absolute_ttl: float = 86400.0,
+                 max_sessions: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the session store.
+
+        Args:
+            idle_ttl: Seconds a session may stay unused before it expires
+            absolute_ttl: Seconds after creation when a session always expires
+            max_sessions: Maximum number of live sessions kept
+            clock: Monotonic clock used for expiry (injectable for tests)
+        """
+        self.idle_ttl = idle_ttl
+        self.absolute_ttl = absolute_ttl
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Ordered from least to most recently used
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        # (created_at, session_id) in creation order, for absolute expiry sweeps
+        self._created: Deque[Tuple[float, str]] = deque()
+        self._users_by_id: Dict[str, User] = {}
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
+
+    def register_user(self, user: User) -> None:
+        """
+        Add a user to the user_id index.
+
+        Args:
+            user: User to index
+        """
+        self._users_by_id[user.user_id] = user
+
+    def get_user_by_id(self, user_id: str) -> Optional[User]:
+        """
+        Get a user by user ID.
+
+        Args:
+            user_id: ID of the user to retrieve
+
+        Returns:
+            User if indexed, None otherwise
+        """
+        return self._users_by_id.get(user_id)
+
+    def create_session(self, user: User) -> str:
+        """
+        Create a new session for a user.
+
+        Args:
+            user: Authenticated user
+
+        Returns:
+            str: New session ID
+        """
+        session_id = str(uuid.uuid4())
+        now = self._clock()
+        with self._lock:
+            self._users_by_id.setdefault(user.user_id, user)
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+            self._sessions[session_id] = Session(session_id, user, now)
+            self._created.append((now, session_id))
+        return session_id
+
+    def _is_expired(self, session: Session, now: float) -> bool:
+        """Check whether a session has passed its idle or absolute deadline."""
+        return (now - session.last_seen >= self.idle_ttl
+                or now - session.created_at >= self.absolute_ttl)
+
+    def get_user(self, session_id: str) -> Optional[User]:
+        """
+        Resolve a session ID to its user and refresh the idle timer.
+
+        Args:
+            session_id: Session ID to look up
+
+        Returns:
+            User if the session is live, None otherwise
+        """
+        now = self._clock()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if self._is_expired(session, now):
+                del self._sessions[session_id]
+                return None
+            session.last_seen = now
+            self._sessions.move_to_end(session_id)
+            return session.user
+
+    def end_session(self, session_id: str) -> bool:
+        """
+        Remove a session.
+
+        Args:
+            session_id: Session ID to remove
+
+        Returns:
+            bool: True if the session existed, False otherwise
+        """
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def sweep_expired(self) -> int:
+        """
+        Drop all expired sessions.
+
+        Idle-expired sessions sit at the LRU end of the session map and
+        absolute-expired ones at the front of the creation log, so a sweep
+        only touches sessions that are actually removed.
+
+        Returns:
+            int: Number of sessions removed
+        """
+        now = self._clock()
+        removed = 0
+        with self._lock:
+            while self._sessions:
+                session_id, session = next(iter(self._sessions.items()))
+                if now - session.last_seen < self.idle_ttl:
+                    break
+                del self._sessions[session_id]
+                removed += 1
+            while self._created and now - self._created[0][0] >= self.absolute_ttl:
+                _, session_id = self._created.popleft()
+                if self._sessions.pop(session_id, None) is not None:
+                    removed += 1
+            # Creation entries for sessions that already ended are dropped here
+            # so the log does not outgrow the live session count.
+            if len(self._created) > 2 * len(self._sessions) + 1024:
+                self._created = deque(
+                    entry for entry in self._created if entry[1] in self._sessions
+                )
+        return removed
+
+    def start_sweeper(self, interval: float = 60.0) -> None:
+        """
+        Start a daemon thread that sweeps expired sessions periodically.
+
+        Args:
+            interval: Seconds between sweeps
+        """
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._stop_sweeper.clear()
+
+        def run() -> None:
+            while not self._stop_sweeper.wait(interval):
+                self.sweep_expired()
+
+        self._sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper thread if it is running."""
+        self._stop_sweeper.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=1.0)
+            self._sweeper = None
+
+    def __len__(self) -> int:
+        """Number of sessions currently held (including not yet swept)."""
+        return len(self._sessions)
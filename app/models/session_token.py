@@ -0,0 +1,206 @@
+from typing import Callable, Dict, Optional
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+
+from app.models.storage_backend import StorageBackend
+
+
+class TokenClaims:
+    """Verified contents of a signed session token."""
+
+    __slots__ = ("user_id", "expires_at", "token_id")
+
+    def __init__(self, user_id: str, expires_at: float, token_id: str):
+        """
+        Initialize token claims.
+
+        Args:
+            user_id: ID of the user the token was issued to
+            expires_at: Unix timestamp after which the token is invalid
+            token_id: Unique token ID, used for revocation
+        """
+        self.user_id = user_id
+        self.expires_at = expires_at
+        self.token_id = token_id
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class RevocationList:
+    """
+    Set of revoked token IDs.
+
+    Entries are only needed until the token would have expired anyway, so
+    the list is pruned as it is written and stays small. With a shared
+    backend, a logout on one worker is honoured by all of them.
+    """
+
+    NAMESPACE = "revoked_tokens"
+
+    def __init__(self, clock: Callable[[], float] = time.time, backend: Optional[StorageBackend] = None):
+        """
+        Initialize an empty revocation list.
+
+        Args:
+            clock: Wall clock returning Unix time (injectable for tests)
+            backend: Optional shared backend holding the revoked token IDs
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._revoked: Dict[str, float] = {}  # token_id -> expires_at
+        self.backend = backend
+
+    def revoke(self, token_id: str, expires_at: float) -> None:
+        """
+        Revoke a token until its expiry.
+
+        Args:
+            token_id: ID of the token to revoke
+            expires_at: Expiry of the token
+        """
+        now = self._clock()
+        if self.backend is not None:
+            self.backend.put(self.NAMESPACE, token_id, {"expires_at": expires_at})
+            for tid, record in self.backend.items(self.NAMESPACE).items():
+                if record["expires_at"] <= now:
+                    self.backend.delete(self.NAMESPACE, tid)
+            return
+        with self._lock:
+            self._revoked[token_id] = expires_at
+            expired = [tid for tid, exp in self._revoked.items() if exp <= now]
+            for tid in expired:
+                del self._revoked[tid]
+
+    def is_revoked(self, token_id: str) -> bool:
+        """
+        Check whether a token has been revoked.
+
+        Args:
+            token_id: ID of the token to check
+
+        Returns:
+            bool: True if revoked, False otherwise
+        """
+        if self.backend is not None:
+            return self.backend.get(self.NAMESPACE, token_id) is not None
+        return token_id in self._revoked
+
+    def __len__(self) -> int:
+        if self.backend is not None:
+            return len(self.backend.items(self.NAMESPACE))
+        return len(self._revoked)
+
+
+class SessionTokenSigner:
+    """
+    Issues and verifies stateless HMAC-SHA256 signed session tokens.
+
+    A token is ``<payload>.<signature>`` where the payload is base64url JSON
+    carrying the user ID, expiry and a token ID. Any process that holds the
+    same secret can verify a token without a session store lookup.
+    """
+
+    def __init__(self, secret: bytes, ttl: float = 86400.0,
+                 revocations: Optional[RevocationList] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize the signer.
+
+        Args:
+            secret: Shared HMAC key; must be identical on every worker
+            ttl: Token lifetime in seconds
+            revocations: Revocation list consulted on verify
+            clock: Wall clock returning Unix time (injectable for tests)
+        """
+        self._secret = secret
+        self.ttl = ttl
+        self.revocations = revocations if revocations is not None else RevocationList(clock)
+        self._clock = clock
+
+    def _sign(self, payload: str) -> str:
+        digest = hmac.new(self._secret, payload.encode("utf-8"), hashlib.sha256).digest()
+        return _b64encode(digest)
+
+    @staticmethod
+    def is_token(value: str) -> bool:
+        """
+        Check whether a session value is shaped like a signed token.
+
+        Args:
+            value: Session value sent by a client
+
+        Returns:
+            bool: True if it should be verified as a token
+        """
+        return "." in value
+
+    def issue(self, user_id: str) -> str:
+        """
+        Issue a token for a user.
+
+        Args:
+            user_id: ID of the authenticated user
+
+        Returns:
+            str: Signed token
+        """
+        claims = {
+            "uid": user_id,
+            "exp": int(self._clock() + self.ttl),
+            "jti": uuid.uuid4().hex
+        }
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token: str) -> Optional[TokenClaims]:
+        """
+        Verify a token's signature, expiry and revocation status.
+
+        Args:
+            token: Token to verify
+
+        Returns:
+            TokenClaims if the token is valid, None otherwise
+        """
+        payload, _, signature = token.partition(".")
+        if not payload or not signature:
+            return None
+        if not hmac.compare_digest(signature.encode("utf-8"), self._sign(payload).encode("ascii")):
+            return None
+        try:
+            data = json.loads(_b64decode(payload))
+            claims = TokenClaims(str(data["uid"]), float(data["exp"]), str(data["jti"]))
+        except (ValueError, KeyError, TypeError):
+            return None
+        if claims.expires_at <= self._clock():
+            return None
+        if self.revocations.is_revoked(claims.token_id):
+            return None
+        return claims
+
+    def revoke(self, token: str) -> bool:
+        """
+        Revoke a valid token so it is rejected until it expires.
+
+        Args:
+            token: Token to revoke
+
+        Returns:
+            bool: True if the token was valid and is now revoked
+        """
+        claims = self.verify(token)
+        if claims is None:
+            return False
+        self.revocations.revoke(claims.token_id, claims.expires_at)
+        return True
@@ -0,0 +1,642 @@
+from typing import Any, Dict, List, Optional, Tuple
+from abc import ABC, abstractmethod
+import bisect
+import json
+import sqlite3
+import threading
+
+Record = Dict[str, Any]
+
+
+def entries_after(entries: List[Tuple[int, Record]], after_id: int, limit: int) -> List[Tuple[int, Record]]:
+    """
+    Binary-search an in-memory log for the entries following an ID.
+
+    Args:
+        entries: (sequence_id, record) pairs in increasing ID order
+        after_id: Return only entries with a greater ID
+        limit: Maximum number of entries to return
+
+    Returns:
+        List of (sequence_id, record), oldest first
+    """
+    start = bisect.bisect_right(entries, after_id, key=lambda entry: entry[0])
+    return entries[start:start + limit]
+
+
+def trim_entries(entries: List[Tuple[int, Record]], through_id: int) -> List[Tuple[int, Record]]:
+    """
+    Remove the leading entries of an in-memory log, up to an ID.
+
+    Args:
+        entries: (sequence_id, record) pairs in increasing ID order; trimmed
+            in place
+        through_id: Remove entries with this ID or a smaller one
+
+    Returns:
+        List of the removed entries, oldest first
+    """
+    end = bisect.bisect_right(entries, through_id, key=lambda entry: entry[0])
+    removed = entries[:end]
+    del entries[:end]
+    return removed
+
+
+class StorageBackend(ABC):
+    """
+    Interface for shared state storage.
+
+    State is kept as JSON-serializable records grouped into namespaces of
+    key -> record. Every namespace carries a version counter that increases
+    on each write, so readers can tell cheaply whether anything changed.
+    Append-only logs (e.g. notification history) are kept separately and
+    hand out increasing sequence IDs.
+    """
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Record]:
+        """
+        Get a single record.
+
+        Args:
+            namespace: Namespace to read from
+            key: Record key
+
+        Returns:
+            Record if found, None otherwise
+        """
+
+    @abstractmethod
+    def items(self, namespace: str) -> Dict[str, Record]:
+        """
+        Get all records in a namespace.
+
+        Args:
+            namespace: Namespace to read
+
+        Returns:
+            Dict mapping key to record
+        """
+
+    @abstractmethod
+    def put_many(self, namespace: str, records: Dict[str, Record]) -> int:
+        """
+        Insert or replace several records in one transaction.
+
+        Args:
+            namespace: Namespace to write to
+            records: Dict mapping key to record
+
+        Returns:
+            int: Namespace version after the write
+        """
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> int:
+        """
+        Delete a record if present.
+
+        Args:
+            namespace: Namespace to delete from
+            key: Record key
+
+        Returns:
+            int: Namespace version after the write
+        """
+
+    @abstractmethod
+    def version(self, namespace: str) -> int:
+        """
+        Get the current version of a namespace.
+
+        Args:
+            namespace: Namespace to check
+
+        Returns:
+            int: Version counter, 0 if the namespace was never written
+        """
+
+    @abstractmethod
+    def append(self, log: str, record: Record) -> int:
+        """
+        Append a record to a log.
+
+        Args:
+            log: Log name
+            record: Record to append
+
+        Returns:
+            int: Sequence ID assigned to the record
+        """
+
+    @abstractmethod
+    def tail(self, log: str, limit: int) -> List[Tuple[int, Record]]:
+        """
+        Get the most recent records of a log.
+
+        Args:
+            log: Log name
+            limit: Maximum number of records to return
+
+        Returns:
+            List of (sequence_id, record), oldest first
+        """
+
+    @abstractmethod
+    def read_after(self, log: str, after_id: int, limit: int) -> List[Tuple[int, Record]]:
+        """
+        Get the records of a log that follow a sequence ID.
+
+        Args:
+            log: Log name
+            after_id: Return only records with a greater sequence ID
+            limit: Maximum number of records to return
+
+        Returns:
+            List of (sequence_id, record), oldest first
+        """
+
+    @abstractmethod
+    def trim(self, log: str, through_id: int) -> List[Tuple[int, Record]]:
+        """
+        Remove the oldest records of a log, up to a sequence ID.
+
+        Args:
+            log: Log name
+            through_id: Remove records with this sequence ID or a smaller one
+
+        Returns:
+            List of the removed (sequence_id, record), oldest first; a record
+            removed concurrently by another process is returned to only one
+        """
+
+    @abstractmethod
+    def log_size(self, log: str) -> int:
+        """
+        Count the records of a log.
+
+        Args:
+            log: Log name
+
+        Returns:
+            int: Number of records held
+        """
+
+    def put(self, namespace: str, key: str, record: Record) -> int:
+        """
+        Insert or replace a single record.
+
+        Args:
+            namespace: Namespace to write to
+            key: Record key
+            record: Record to store
+
+        Returns:
+            int: Namespace version after the write
+        """
+        return self.put_many(namespace, {key: record})
+
+    def append_many(self, log: str, records: List[Record]) -> List[int]:
+        """
+        Append several records to a log.
+
+        Backends that support transactions commit them together; this
+        default appends them one by one.
+
+        Args:
+            log: Log name
+            records: Records to append, in order
+
+        Returns:
+            List of the sequence IDs assigned, in order
+        """
+        return [self.append(log, record) for record in records]
+
+    def write_batch(self, puts: Dict[str, Dict[str, Record]],
+                    deletes: Dict[str, List[str]]) -> Dict[str, int]:
+        """
+        Apply writes to several namespaces, bumping each version once.
+
+        Backends that support transactions apply the whole batch atomically;
+        this default applies it namespace by namespace.
+
+        Args:
+            puts: Namespace -> (key -> record) to insert or replace
+            deletes: Namespace -> keys to delete
+
+        Returns:
+            Dict mapping each touched namespace to its new version
+        """
+        versions: Dict[str, int] = {}
+        for namespace in set(puts) | set(deletes):
+            for key in deletes.get(namespace, ()):
+                self.delete(namespace, key)
+            versions[namespace] = self.put_many(namespace, puts.get(namespace, {}))
+        return versions
+
+    def start(self) -> None:
+        """Start background maintenance, if the backend has any."""
+
+    def stop(self) -> None:
+        """Stop background maintenance started by start()."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class MemoryBackend(StorageBackend):
+    """Process-local backend; the default when no shared storage is configured."""
+
+    def __init__(self):
+        """Initialize empty namespaces and logs."""
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, Dict[str, Record]] = {}
+        self._versions: Dict[str, int] = {}
+        self._logs: Dict[str, List[Tuple[int, Record]]] = {}
+        self._next_log_id = 1
+
+    def _bump(self, namespace: str) -> int:
+        version = self._versions.get(namespace, 0) + 1
+        self._versions[namespace] = version
+        return version
+
+    def get(self, namespace: str, key: str) -> Optional[Record]:
+        return self._namespaces.get(namespace, {}).get(key)
+
+    def items(self, namespace: str) -> Dict[str, Record]:
+        return dict(self._namespaces.get(namespace, {}))
+
+    def put_many(self, namespace: str, records: Dict[str, Record]) -> int:
+        with self._lock:
+            self._namespaces.setdefault(namespace, {}).update(records)
+            return self._bump(namespace)
+
+    def delete(self, namespace: str, key: str) -> int:
+        with self._lock:
+            self._namespaces.get(namespace, {}).pop(key, None)
+            return self._bump(namespace)
+
+    def write_batch(self, puts: Dict[str, Dict[str, Record]],
+                    deletes: Dict[str, List[str]]) -> Dict[str, int]:
+        versions: Dict[str, int] = {}
+        with self._lock:
+            for namespace in set(puts) | set(deletes):
+                records = self._namespaces.setdefault(namespace, {})
+                records.update(puts.get(namespace, {}))
+                for key in deletes.get(namespace, ()):
+                    records.pop(key, None)
+                versions[namespace] = self._bump(namespace)
+        return versions
+
+    def version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    def append(self, log: str, record: Record) -> int:
+        with self._lock:
+            log_id = self._next_log_id
+            self._next_log_id += 1
+            self._logs.setdefault(log, []).append((log_id, record))
+            self._bump(f"log:{log}")
+            return log_id
+
+    def tail(self, log: str, limit: int) -> List[Tuple[int, Record]]:
+        return self._logs.get(log, [])[-limit:]
+
+    def read_after(self, log: str, after_id: int, limit: int) -> List[Tuple[int, Record]]:
+        return entries_after(self._logs.get(log, []), after_id, limit)
+
+    def trim(self, log: str, through_id: int) -> List[Tuple[int, Record]]:
+        with self._lock:
+            return trim_entries(self._logs.get(log, []), through_id)
+
+    def log_size(self, log: str) -> int:
+        return len(self._logs.get(log, []))
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Backend stored in a SQLite database in WAL mode.
+
+    WAL lets many reader processes proceed while one writer commits, so
+    several API workers can share one database file. Each thread gets its
+    own connection.
+    """
+
+    BUSY_TIMEOUT_MS = 5000
+
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) the database.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS versions (
+                namespace TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                log TEXT NOT NULL,
+                value TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS logs_by_name ON logs (log, id);
+            """
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, conn: sqlite3.Connection, namespace: str) -> int:
+        conn.execute(
+            "INSERT INTO versions (namespace, version) VALUES (?, 1) "
+            "ON CONFLICT(namespace) DO UPDATE SET version = version + 1",
+            (namespace,)
+        )
+        return conn.execute("SELECT version FROM versions WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+    def get(self, namespace: str, key: str) -> Optional[Record]:
+        row = self._connection().execute(
+            "SELECT value FROM records WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def items(self, namespace: str) -> Dict[str, Record]:
+        rows = self._connection().execute(
+            "SELECT key, value FROM records WHERE namespace = ?", (namespace,)
+        )
+        return {key: json.loads(value) for key, value in rows}
+
+    def put_many(self, namespace: str, records: Dict[str, Record]) -> int:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO records (namespace, key, value) VALUES (?, ?, ?)",
+                [(namespace, key, json.dumps(record)) for key, record in records.items()]
+            )
+            version = self._bump(conn, namespace)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return version
+
+    def delete(self, namespace: str, key: str) -> int:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM records WHERE namespace = ? AND key = ?", (namespace, key))
+            version = self._bump(conn, namespace)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return version
+
+    def write_batch(self, puts: Dict[str, Dict[str, Record]],
+                    deletes: Dict[str, List[str]]) -> Dict[str, int]:
+        conn = self._connection()
+        versions: Dict[str, int] = {}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO records (namespace, key, value) VALUES (?, ?, ?)",
+                [(namespace, key, json.dumps(record))
+                 for namespace, records in puts.items() for key, record in records.items()]
+            )
+            conn.executemany(
+                "DELETE FROM records WHERE namespace = ? AND key = ?",
+                [(namespace, key) for namespace, keys in deletes.items() for key in keys]
+            )
+            for namespace in set(puts) | set(deletes):
+                versions[namespace] = self._bump(conn, namespace)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return versions
+
+    def version(self, namespace: str) -> int:
+        row = self._connection().execute(
+            "SELECT version FROM versions WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def append(self, log: str, record: Record) -> int:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute("INSERT INTO logs (log, value) VALUES (?, ?)", (log, json.dumps(record)))
+            self._bump(conn, f"log:{log}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.lastrowid
+
+    def append_many(self, log: str, records: List[Record]) -> List[int]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            log_ids = [
+                conn.execute("INSERT INTO logs (log, value) VALUES (?, ?)", (log, json.dumps(record))).lastrowid
+                for record in records
+            ]
+            self._bump(conn, f"log:{log}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return log_ids
+
+    def tail(self, log: str, limit: int) -> List[Tuple[int, Record]]:
+        rows = self._connection().execute(
+            "SELECT id, value FROM logs WHERE log = ? ORDER BY id DESC LIMIT ?", (log, limit)
+        ).fetchall()
+        return [(log_id, json.loads(value)) for log_id, value in reversed(rows)]
+
+    def read_after(self, log: str, after_id: int, limit: int) -> List[Tuple[int, Record]]:
+        rows = self._connection().execute(
+            "SELECT id, value FROM logs WHERE log = ? AND id > ? ORDER BY id LIMIT ?", (log, after_id, limit)
+        ).fetchall()
+        return [(log_id, json.loads(value)) for log_id, value in rows]
+
+    def trim(self, log: str, through_id: int) -> List[Tuple[int, Record]]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, value FROM logs WHERE log = ? AND id <= ? ORDER BY id", (log, through_id)
+            ).fetchall()
+            if rows:
+                conn.execute("DELETE FROM logs WHERE log = ? AND id <= ?", (log, through_id))
+                self._bump(conn, f"log:{log}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [(log_id, json.loads(value)) for log_id, value in rows]
+
+    def log_size(self, log: str) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM logs WHERE log = ?", (log,)).fetchone()[0]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class CachedBackend(StorageBackend):
+    """
+    Per-process read cache in front of a shared backend.
+
+    Each read first checks the namespace version (a single indexed lookup)
+    and only goes to the backend when another process has written since the
+    cache was filled. Writes from this process keep the cache warm.
+    """
+
+    def __init__(self, backend: StorageBackend):
+        """
+        Wrap a backend with a read cache.
+
+        Args:
+            backend: Backend holding the shared state
+        """
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, Tuple[int, Dict[str, Record]]] = {}
+        self._tails: Dict[Tuple[str, int], Tuple[int, List[Tuple[int, Record]]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, namespace: str) -> Dict[str, Record]:
+        version = self.backend.version(namespace)
+        cached = self._namespaces.get(namespace)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        records = self.backend.items(namespace)
+        with self._lock:
+            self._namespaces[namespace] = (version, records)
+        return records
+
+    def _after_write(self, namespace: str, version: int, apply) -> int:
+        with self._lock:
+            cached = self._namespaces.get(namespace)
+            if cached is not None and cached[0] == version - 1:
+                # Nobody else wrote in between, so patch the cache in place
+                apply(cached[1])
+                self._namespaces[namespace] = (version, cached[1])
+            else:
+                self._namespaces.pop(namespace, None)
+        return version
+
+    def get(self, namespace: str, key: str) -> Optional[Record]:
+        return self._load(namespace).get(key)
+
+    def items(self, namespace: str) -> Dict[str, Record]:
+        return dict(self._load(namespace))
+
+    def put_many(self, namespace: str, records: Dict[str, Record]) -> int:
+        version = self.backend.put_many(namespace, records)
+        return self._after_write(namespace, version, lambda cache: cache.update(records))
+
+    def delete(self, namespace: str, key: str) -> int:
+        version = self.backend.delete(namespace, key)
+        return self._after_write(namespace, version, lambda cache: cache.pop(key, None))
+
+    def write_batch(self, puts: Dict[str, Dict[str, Record]],
+                    deletes: Dict[str, List[str]]) -> Dict[str, int]:
+        versions = self.backend.write_batch(puts, deletes)
+        for namespace, version in versions.items():
+            def apply(cache: Dict[str, Record], namespace: str = namespace) -> None:
+                cache.update(puts.get(namespace, {}))
+                for key in deletes.get(namespace, ()):
+                    cache.pop(key, None)
+            self._after_write(namespace, version, apply)
+        return versions
+
+    def version(self, namespace: str) -> int:
+        return self.backend.version(namespace)
+
+    def append(self, log: str, record: Record) -> int:
+        return self.backend.append(log, record)
+
+    def append_many(self, log: str, records: List[Record]) -> List[int]:
+        return self.backend.append_many(log, records)
+
+    def tail(self, log: str, limit: int) -> List[Tuple[int, Record]]:
+        version = self.backend.version(f"log:{log}")
+        cached = self._tails.get((log, limit))
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        entries = self.backend.tail(log, limit)
+        self._tails[(log, limit)] = (version, entries)
+        return entries
+
+    def read_after(self, log: str, after_id: int, limit: int) -> List[Tuple[int, Record]]:
+        return self.backend.read_after(log, after_id, limit)
+
+    def trim(self, log: str, through_id: int) -> List[Tuple[int, Record]]:
+        return self.backend.trim(log, through_id)
+
+    def log_size(self, log: str) -> int:
+        return self.backend.log_size(log)
+
+    def start(self) -> None:
+        self.backend.start()
+
+    def stop(self) -> None:
+        self.backend.stop()
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def create_backend(url: str) -> StorageBackend:
+    """
+    Create a storage backend from a URL.
+
+    Args:
+        url: Empty or ``memory://`` for process-local storage,
+            ``sqlite:///path/to/file.db`` for a shared SQLite database, or
+            ``journal:///path/to/dir`` for a single-process snapshot+journal
+
+    Returns:
+        StorageBackend: Configured backend
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if not url or url == "memory://":
+        return MemoryBackend()
+    if url.startswith("sqlite:///"):
+        return CachedBackend(SQLiteBackend(url[len("sqlite:///"):]))
+    if url.startswith("journal:///"):
+        # Imported here because journal_backend builds on this module
+        from app.models.journal_backend import JournalBackend
+        return JournalBackend(url[len("journal:///"):])
+    raise ValueError(f"Unsupported storage URL: {url}")
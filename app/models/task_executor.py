@@ -0,0 +1,177 @@
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime
+import asyncio
+
+from app.models.scheduler import Scheduler, ScheduledTask
+from app.models.task_leases import TaskLeaseCoordinator
+
+# Runs one due task; returns True if its action was applied
+TaskDispatcher = Callable[[ScheduledTask], bool]
+
+
+class TaskExecutor:
+    """
+    Runs scheduled tasks when they fall due.
+
+    An asyncio task sleeps until the scheduler's next deadline. Scheduling
+    a task that is due before the current deadline wakes it early, so
+    there is no fixed-interval polling. Lateness, the time between a
+    task's deadline and its dispatch, is recorded for every run.
+
+    With a lease coordinator several processes share the work: scheduled
+    tasks are offered to it, and each process only runs the occurrences it
+    wins a lease for. The local scheduler still tracks which of its tasks
+    are due, so its task list stays current.
+    """
+
+    def __init__(self, scheduler: Scheduler, dispatch: TaskDispatcher,
+                 clock: Callable[[], datetime] = datetime.now, max_sleep: float = 300.0,
+                 leases: Optional[TaskLeaseCoordinator] = None):
+        """
+        Initialize the executor.
+
+        Args:
+            scheduler: Scheduler whose tasks are run
+            dispatch: Applies a due task's action
+            clock: Current local time; the scheduler's deadlines are naive
+                local datetimes
+            max_sleep: Longest wait in seconds before deadlines are
+                re-checked, which bounds the effect of wall clock jumps
+            leases: Coordinator shared with other processes, or None to run
+                every due task here
+        """
+        self.scheduler = scheduler
+        self.dispatch = dispatch
+        self.clock = clock
+        self.max_sleep = max_sleep
+        self.leases = leases
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._deadline: Optional[datetime] = None
+        self.executed = 0
+        self.failed = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self.last_lateness: Optional[float] = None
+        if leases is not None:
+            # Registered first, so a woken executor finds the occurrence
+            scheduler.add_listener(leases.offer)
+            scheduler.add_cancel_listener(leases.withdraw)
+        scheduler.add_listener(self._on_scheduled)
+
+    def start(self) -> None:
+        """Start running due tasks. Call from the event loop."""
+        if self._runner is not None and not self._runner.done():
+            return
+        if self.leases is not None:
+            # Tasks restored from storage were never offered by this process
+            self.leases.offer_many(self.scheduler.get_tasks())
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._runner = self._loop.create_task(self._run(), name="task-executor")
+
+    async def stop(self) -> None:
+        """Stop the executor and wait for it to finish."""
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+
+    def _on_scheduled(self, task: ScheduledTask) -> None:
+        """Scheduler listener: wake the executor for an earlier deadline."""
+        if task.due_at is None or self._wake is None:
+            return
+        if self._deadline is not None and task.due_at >= self._deadline:
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._wake.set()
+        elif self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self) -> None:
+        """Sleep until the next deadline or a wake-up, then run due tasks."""
+        while True:
+            self.run_due()
+            timeout = self.max_sleep
+            if self.leases is None:
+                self._deadline = self.scheduler.next_due()
+            else:
+                # Other processes offer occurrences without waking this one
+                self._deadline = self.leases.next_due()
+                timeout = min(timeout, self.leases.poll_interval)
+            if self._deadline is not None:
+                timeout = min(timeout, max(0.0, (self._deadline - self.clock()).total_seconds()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def run_due(self) -> List[ScheduledTask]:
+        """
+        Dispatch every task that is due now.
+
+        Returns:
+            List of tasks that were dispatched
+        """
+        now = self.clock()
+        due_tasks = self.scheduler.execute_tasks(now)
+        if self.leases is None:
+            for task in due_tasks:
+                self._dispatch(task)
+            return due_tasks
+
+        done, expired = [], []
+        for lease in self.leases.claim(now):
+            # Once a lease runs out another process may be running the task
+            if not self.leases.holds(lease):
+                expired.append(lease)
+                continue
+            self._dispatch(lease.task)
+            done.append(lease)
+        self.leases.complete(done, now)
+        self.leases.release(expired)
+        return [lease.task for lease in done]
+
+    def _dispatch(self, task: ScheduledTask) -> None:
+        """Run one due task, recording its lateness and outcome."""
+        lateness = max(0.0, (self.clock() - task.last_due_at).total_seconds())
+        self.total_lateness += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        self.last_lateness = lateness
+        try:
+            applied = self.dispatch(task)
+        except Exception:
+            applied = False
+        if applied:
+            self.executed += 1
+        else:
+            self.failed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get execution and lateness statistics.
+
+        Returns:
+            Dict with run counts and lateness in seconds
+        """
+        runs = self.executed + self.failed
+        return {
+            "running": self._runner is not None and not self._runner.done(),
+            "pending": self.scheduler.pending_count(),
+            "next_due": self._deadline.isoformat() if self._deadline else None,
+            "executed": self.executed,
+            "failed": self.failed,
+            "mean_lateness_seconds": self.total_lateness / runs if runs else 0.0,
+            "max_lateness_seconds": self.max_lateness,
+            "last_lateness_seconds": self.last_lateness
+        }
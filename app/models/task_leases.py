@@ -0,0 +1,333 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from datetime import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.models.scheduler import ScheduledTask
+
+
+class TaskLease:
+    """One occurrence of a scheduled task, claimed by a worker until ``lease_until``."""
+
+    __slots__ = ("task", "due", "lease_until")
+
+    def __init__(self, task: ScheduledTask, due: float, lease_until: float):
+        """
+        Initialize a lease.
+
+        Args:
+            task: Task as it was offered; ``last_due_at`` is the occurrence
+            due: Occurrence deadline as a POSIX timestamp
+            lease_until: Wall clock time the lease expires
+        """
+        self.task = task
+        self.due = due
+        self.lease_until = lease_until
+
+
+class TaskLeaseCoordinator:
+    """
+    Hands out due task occurrences to worker processes sharing one SQLite file.
+
+    Each occurrence a worker learns of, a newly scheduled task or the next
+    occurrence of a recurring one, is offered as a row keyed by task ID and
+    deadline, so the same offer from several workers collapses into one
+    row. claim() leases a batch of due, unleased rows to this worker in one
+    transaction, and complete() marks them done only while this worker
+    still owns them. A worker that crashes leaves its leases to expire,
+    after which other workers claim the rows again.
+
+    An occurrence runs exactly once as long as its worker checks holds()
+    before running it and completes it within the lease; one whose worker
+    dies or stalls mid-run is run again elsewhere. Done rows are kept for
+    ``keep_done`` seconds so late offers of the same occurrence are still
+    ignored.
+    """
+
+    BUSY_TIMEOUT_MS = 5000
+
+    def __init__(self, path: str, worker_id: Optional[str] = None, lease_seconds: float = 30.0,
+                 batch_size: int = 100, poll_interval: float = 1.0, keep_done: float = 7 * 24 * 3600,
+                 clock: Callable[[], float] = time.time):
+        """
+        Open (and create if needed) the lease database.
+
+        Args:
+            path: Path of the SQLite database file shared by the workers
+            worker_id: Name recorded as lease owner; defaults to the pid and
+                a random suffix
+            lease_seconds: How long a claim lasts; must exceed the time to
+                run one batch
+            batch_size: Most occurrences claimed at once
+            poll_interval: Longest wait before checking for occurrences
+                offered by other workers
+            keep_done: Seconds done occurrences are remembered
+            clock: Wall clock shared by the workers, for lease expiry
+        """
+        self.path = path
+        self.worker_id = worker_id or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.keep_done = keep_done
+        self.clock = clock
+        self._local = threading.local()
+        self._last_purge = 0.0
+        self.claimed = 0
+        self.reclaimed = 0
+        self.completed = 0
+        self.lost = 0
+        conn = self._connection()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS task_runs (
+                task_id TEXT NOT NULL,
+                due REAL NOT NULL,
+                payload TEXT NOT NULL,
+                owner TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                done_at REAL,
+                PRIMARY KEY (task_id, due)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS task_runs_open ON task_runs (due) WHERE done_at IS NULL;
+            CREATE INDEX IF NOT EXISTS task_runs_done ON task_runs (done_at) WHERE done_at IS NOT NULL;
+            """
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, work: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run ``work`` in an IMMEDIATE transaction and return its result."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def offer(self, task: ScheduledTask) -> None:
+        """
+        Offer a task's next occurrence; usable as a scheduler listener.
+
+        Args:
+            task: Newly scheduled task
+        """
+        self.offer_many([task])
+
+    def offer_many(self, tasks: Iterable[ScheduledTask]) -> int:
+        """
+        Offer the next occurrence of each pending task.
+
+        Executed tasks and tasks without a valid time are skipped, and an
+        occurrence that was already offered is left as it is.
+
+        Args:
+            tasks: Tasks to offer
+
+        Returns:
+            int: Number of occurrences that were new
+        """
+        rows = [(task.task_id, task.due_at.timestamp(), json.dumps(task.to_dict()))
+                for task in tasks if not task.executed and task.due_at is not None]
+        if not rows:
+            return 0
+
+        def insert(conn: sqlite3.Connection) -> int:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO task_runs (task_id, due, payload) VALUES (?, ?, ?)", rows)
+            return conn.total_changes - before
+        return self._write(insert)
+
+    def withdraw(self, task_ids: List[str]) -> None:
+        """
+        Drop the occurrences of cancelled tasks that have not run yet; usable
+        as a scheduler cancel listener.
+
+        Args:
+            task_ids: IDs of the cancelled tasks
+        """
+        self._write(lambda conn: conn.executemany(
+            "DELETE FROM task_runs WHERE task_id = ? AND done_at IS NULL", [(task_id,) for task_id in task_ids]
+        ))
+
+    def claim(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> List[TaskLease]:
+        """
+        Lease a batch of due occurrences nobody holds, earliest first.
+
+        Occurrences whose lease expired, because their worker crashed or
+        stalled, are claimed again.
+
+        Args:
+            now: Local time that deadlines are compared with; defaults to now
+            limit: Most occurrences to claim; defaults to batch_size
+
+        Returns:
+            List of leases held by this worker
+        """
+        due_before = (now or datetime.now()).timestamp()
+        lease_until = 0.0
+
+        def lease(conn: sqlite3.Connection) -> List[Any]:
+            nonlocal lease_until
+            # Read the clock once the write lock is held, so time spent
+            # waiting for it does not eat into the lease
+            wall = self.clock()
+            lease_until = wall + self.lease_seconds
+            rows = conn.execute(
+                "SELECT task_id, due, payload, attempts FROM task_runs "
+                "WHERE done_at IS NULL AND due <= ? AND (lease_until IS NULL OR lease_until < ?) "
+                "ORDER BY due LIMIT ?",
+                (due_before, wall, limit or self.batch_size)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE task_runs SET owner = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE task_id = ? AND due = ?",
+                [(self.worker_id, lease_until, task_id, due) for task_id, due, _, _ in rows]
+            )
+            return rows
+        rows = self._write(lease)
+
+        leases = []
+        for _, due, payload, attempts in rows:
+            task = ScheduledTask.from_dict(json.loads(payload))
+            task.last_due_at = datetime.fromtimestamp(due)
+            leases.append(TaskLease(task, due, lease_until))
+            if attempts:
+                self.reclaimed += 1
+        self.claimed += len(leases)
+        return leases
+
+    def holds(self, lease: TaskLease) -> bool:
+        """
+        Check that enough of a lease is left to run its occurrence.
+
+        Half the lease must remain, which leaves the other half to run the
+        occurrence and complete it before another worker may claim it.
+
+        Args:
+            lease: Lease returned by claim()
+
+        Returns:
+            bool: True if the occurrence may be run
+        """
+        return self.clock() + self.lease_seconds / 2 < lease.lease_until
+
+    def release(self, leases: List[TaskLease]) -> None:
+        """
+        Give back leases without running their occurrences, so any worker
+        can claim them straight away.
+
+        Args:
+            leases: Leases returned by claim()
+        """
+        if not leases:
+            return
+        self._write(lambda conn: conn.executemany(
+            "UPDATE task_runs SET owner = NULL, lease_until = NULL "
+            "WHERE task_id = ? AND due = ? AND owner = ? AND done_at IS NULL",
+            [(lease.task.task_id, lease.due, self.worker_id) for lease in leases]
+        ))
+
+    def complete(self, leases: List[TaskLease], now: Optional[datetime] = None) -> int:
+        """
+        Mark leased occurrences done and offer recurring tasks' next ones.
+
+        An occurrence another worker has claimed since, after this worker's
+        lease expired, is left alone and counted as lost.
+
+        Args:
+            leases: Leases returned by claim()
+            now: Local time the occurrences ran; defaults to now
+
+        Returns:
+            int: Number of occurrences completed by this worker
+        """
+        if not leases:
+            return 0
+        now = now or datetime.now()
+        wall = self.clock()
+
+        def finish(conn: sqlite3.Connection) -> int:
+            completed = 0
+            for lease in leases:
+                cursor = conn.execute(
+                    "UPDATE task_runs SET done_at = ?, lease_until = NULL "
+                    "WHERE task_id = ? AND due = ? AND owner = ? AND done_at IS NULL",
+                    (wall, lease.task.task_id, lease.due, self.worker_id)
+                )
+                if not cursor.rowcount:
+                    continue
+                completed += 1
+                task = lease.task
+                task.due_at = task.last_due_at
+                task.fire(now)
+                if not task.executed:
+                    conn.execute(
+                        "INSERT OR IGNORE INTO task_runs (task_id, due, payload) VALUES (?, ?, ?)",
+                        (task.task_id, task.due_at.timestamp(), json.dumps(task.to_dict()))
+                    )
+            if wall - self._last_purge > 60.0:
+                conn.execute("DELETE FROM task_runs WHERE done_at < ?", (wall - self.keep_done,))
+                self._last_purge = wall
+            return completed
+        completed = self._write(finish)
+        self.completed += completed
+        self.lost += len(leases) - completed
+        return completed
+
+    def next_due(self) -> Optional[datetime]:
+        """
+        Get the earliest deadline among occurrences nobody holds.
+
+        Returns:
+            datetime of the next claimable occurrence, or None if there is none
+        """
+        row = self._connection().execute(
+            "SELECT MIN(due) FROM task_runs WHERE done_at IS NULL AND (lease_until IS NULL OR lease_until < ?)",
+            (self.clock(),)
+        ).fetchone()
+        return datetime.fromtimestamp(row[0]) if row[0] is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get this worker's lease counts and the shared backlog.
+
+        Returns:
+            Dict of lease statistics
+        """
+        open_count, leased = self._connection().execute(
+            "SELECT COUNT(*), COUNT(lease_until > ? OR NULL) FROM task_runs WHERE done_at IS NULL",
+            (self.clock(),)
+        ).fetchone()
+        return {
+            "worker_id": self.worker_id,
+            "claimed": self.claimed,
+            "reclaimed": self.reclaimed,
+            "completed": self.completed,
+            "lost": self.lost,
+            "open": open_count,
+            "leased": leased
+        }
+
+    def close(self) -> None:
+        """Close this thread's database connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
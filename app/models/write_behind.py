@@ -0,0 +1,219 @@
+from typing import Any, Callable, Dict, List, Optional, Protocol, Set
+import threading
+import time
+
+from app.models.storage_backend import Record, StorageBackend
+
+
+class Serializable(Protocol):
+    """Anything that can produce a record for the backend."""
+
+    def to_dict(self) -> Record:
+        ...
+
+
+FlushListener = Callable[[Dict[str, int]], None]
+
+
+class WriteBehindWriter:
+    """
+    Batches record writes and flushes them to a backend in the background.
+
+    Callers only mark objects dirty, which is a dictionary insert, so no
+    disk I/O happens on the request path. A flusher thread writes every
+    dirty object's latest state in one backend transaction when
+    ``max_batch`` objects are dirty or ``flush_interval`` seconds have
+    passed, whichever comes first. Several changes to the same object
+    between flushes cost one write.
+    """
+
+    def __init__(self, backend: StorageBackend, max_batch: int = 500, flush_interval: float = 1.0):
+        """
+        Initialize the writer.
+
+        Args:
+            backend: Backend that receives the flushed records
+            max_batch: Dirty object count that triggers an early flush
+            flush_interval: Maximum seconds a change waits before flushing
+        """
+        self.backend = backend
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # namespace -> key -> object to serialize (None marks a deletion)
+        self._dirty: Dict[str, Dict[str, Optional[Serializable]]] = {}
+        self._dirty_count = 0
+        self._inflight: Set[str] = set()
+        self._listeners: List[FlushListener] = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.flush_count = 0
+        self.records_flushed = 0
+        self.total_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+
+    def add_flush_listener(self, listener: FlushListener) -> None:
+        """
+        Register a callback run after each flush.
+
+        Args:
+            listener: Callback receiving namespace -> new version
+        """
+        self._listeners.append(listener)
+
+    def mark_dirty(self, namespace: str, key: str, obj: Serializable) -> None:
+        """
+        Schedule an object to be written on the next flush.
+
+        Args:
+            namespace: Backend namespace
+            key: Record key
+            obj: Object whose to_dict() is written at flush time
+        """
+        self._mark(namespace, key, obj)
+
+    def mark_deleted(self, namespace: str, key: str) -> None:
+        """
+        Schedule a record deletion for the next flush.
+
+        Args:
+            namespace: Backend namespace
+            key: Record key
+        """
+        self._mark(namespace, key, None)
+
+    def _mark(self, namespace: str, key: str, obj: Optional[Serializable]) -> None:
+        with self._lock:
+            pending = self._dirty.setdefault(namespace, {})
+            if key not in pending:
+                self._dirty_count += 1
+            pending[key] = obj
+            full = self._dirty_count >= self.max_batch
+        if full:
+            if self.is_running():
+                self._wakeup.set()
+            else:
+                self.flush()
+
+    def has_pending(self, namespace: str) -> bool:
+        """
+        Check whether a namespace has writes not yet in the backend.
+
+        Args:
+            namespace: Namespace to check
+
+        Returns:
+            bool: True if a write is queued or being flushed
+        """
+        return namespace in self._dirty or namespace in self._inflight
+
+    def pending_count(self) -> int:
+        """Number of dirty records waiting for the next flush."""
+        return self._dirty_count
+
+    def flush(self) -> int:
+        """
+        Write all dirty records to the backend in one batch.
+
+        Returns:
+            int: Number of records written
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._dirty = self._dirty, {}
+                self._dirty_count = 0
+                self._inflight = set(batch)
+            if not batch:
+                return 0
+            try:
+                started = time.perf_counter()
+                puts: Dict[str, Dict[str, Record]] = {}
+                deletes: Dict[str, List[str]] = {}
+                count = 0
+                for namespace, entries in batch.items():
+                    for key, obj in entries.items():
+                        if obj is None:
+                            deletes.setdefault(namespace, []).append(key)
+                        else:
+                            puts.setdefault(namespace, {})[key] = obj.to_dict()
+                        count += 1
+                versions = self.backend.write_batch(puts, deletes)
+                elapsed = time.perf_counter() - started
+            except Exception:
+                # Put the batch back so the next flush retries it; newer
+                # changes to the same keys take precedence.
+                with self._lock:
+                    for namespace, entries in batch.items():
+                        pending = self._dirty.setdefault(namespace, {})
+                        for key, obj in entries.items():
+                            if key not in pending:
+                                pending[key] = obj
+                                self._dirty_count += 1
+                    self._inflight = set()
+                raise
+
+            self.flush_count += 1
+            self.records_flushed += count
+            self.total_flush_seconds += elapsed
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            # Listeners run before the namespaces stop counting as pending so
+            # readers never see the new versions without the matching state.
+            for listener in self._listeners:
+                listener(versions)
+            self._inflight = set()
+            return count
+
+    def is_running(self) -> bool:
+        """Check whether the background flusher is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the background flusher thread."""
+        if self.is_running():
+            return
+        self._stopping.clear()
+
+        def run() -> None:
+            while not self._stopping.is_set():
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                try:
+                    self.flush()
+                except Exception:
+                    # Keep flushing; the failed batch was re-queued.
+                    time.sleep(self.flush_interval)
+
+        self._thread = threading.Thread(target=run, name="write-behind-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flusher and write out everything still dirty."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get flush statistics.
+
+        Returns:
+            Dict with flush count, records written, pending records and
+            flush latency in milliseconds
+        """
+        flushes = self.flush_count
+        return {
+            "flush_count": flushes,
+            "records_flushed": self.records_flushed,
+            "pending_records": self._dirty_count,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 3),
+            "avg_flush_ms": round(self.total_flush_seconds / flushes * 1000, 3) if flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_seconds * 1000, 3)
+        }
@@ -0,0 +1,176 @@
+"""
+Integration tests for authentication and the session store.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.models.session_store import SessionStore
+from app.models.session_token import SessionTokenSigner
+from app.models.user import User
+
+client = TestClient(app)
+
+
+def login() -> str:
+    """Log in with the default credentials and return the session ID."""
+    response = client.post("/auth/login", json={"username": "admin", "password": "password123"})
+    assert response.status_code == 200
+    return response.json()["session_id"]
+
+
+class FakeClock:
+    """Manually advanced clock for expiry tests."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLoginLogout:
+    """Tests for POST /auth/login and /auth/logout."""
+
+    def test_login_session_resolves(self):
+        """Test that a fresh session can be used on protected routes."""
+        session_id = login()
+        response = client.get("/devices", params={"session_id": session_id})
+        assert response.status_code == 200
+
+    def test_invalid_credentials(self):
+        """Test that a wrong password does not create a session."""
+        response = client.post("/auth/login", json={"username": "admin", "password": "wrong"})
+        assert response.status_code == 200
+        assert response.json()["success"] is False
+        assert response.json()["session_id"] is None
+
+    def test_logout_invalidates_session(self):
+        """Test that a session cannot be used after logout."""
+        session_id = login()
+        response = client.post("/auth/logout", params={"session_id": session_id})
+        assert response.json()["success"] is True
+
+        response = client.get("/devices", params={"session_id": session_id})
+        assert response.status_code == 401
+
+        response = client.post("/auth/logout", params={"session_id": session_id})
+        assert response.json()["success"] is False
+
+
+class TestStatelessTokens:
+    """Tests for signed session tokens issued by /auth/login."""
+
+    def test_token_login_and_logout(self):
+        """Test that a signed token authenticates and is rejected after logout."""
+        response = client.post(
+            "/auth/login",
+            json={"username": "admin", "password": "password123", "stateless": True}
+        )
+        token = response.json()["session_id"]
+        assert "." in token
+
+        assert client.get("/devices", params={"session_id": token}).status_code == 200
+        assert client.post("/auth/logout", params={"session_id": token}).json()["success"] is True
+        assert client.get("/devices", params={"session_id": token}).status_code == 401
+
+    def test_tampered_token_rejected(self):
+        """Test that a token with a modified payload fails verification."""
+        signer = SessionTokenSigner(b"secret")
+        token = signer.issue("user1")
+        payload, signature = token.split(".")
+        forged = SessionTokenSigner(b"other").issue("user2").split(".")[0]
+        assert signer.verify(token).user_id == "user1"
+        assert signer.verify(f"{forged}.{signature}") is None
+        assert signer.verify(f"{payload}.{signature[:-2]}") is None
+
+    def test_token_shared_between_signers(self):
+        """Test that any signer with the same secret verifies a token."""
+        token = SessionTokenSigner(b"shared").issue("user1")
+        assert SessionTokenSigner(b"shared").verify(token).user_id == "user1"
+        assert SessionTokenSigner(b"different").verify(token) is None
+
+    def test_token_expiry_and_revocation_pruning(self):
+        """Test that tokens expire and revocations are dropped after expiry."""
+        clock = FakeClock()
+        clock.now = 1000.0
+        signer = SessionTokenSigner(b"secret", ttl=60, clock=clock)
+        token = signer.issue("user1")
+        assert signer.revoke(token) is True
+        assert signer.verify(token) is None
+        assert len(signer.revocations) == 1
+
+        clock.now = 1061.0
+        signer.revoke(signer.issue("user1"))
+        assert len(signer.revocations) == 1
+
+
+class TestSessionStore:
+    """Tests for SessionStore expiry and eviction."""
+
+    @pytest.fixture
+    def user(self):
+        return User("u1", "alice", "secret")
+
+    def test_user_index(self, user):
+        """Test that users are resolvable by user_id."""
+        store = SessionStore()
+        store.register_user(user)
+        assert store.get_user_by_id("u1") is user
+        assert store.get_user_by_id("missing") is None
+
+    def test_idle_expiry_is_refreshed_by_use(self, user):
+        """Test that using a session pushes back its idle deadline."""
+        clock = FakeClock()
+        store = SessionStore(idle_ttl=10, absolute_ttl=1000, clock=clock)
+        session_id = store.create_session(user)
+
+        clock.now = 8
+        assert store.get_user(session_id) is user
+        clock.now = 16
+        assert store.get_user(session_id) is user
+        clock.now = 27
+        assert store.get_user(session_id) is None
+
+    def test_absolute_expiry(self, user):
+        """Test that an active session still expires at its absolute deadline."""
+        clock = FakeClock()
+        store = SessionStore(idle_ttl=10, absolute_ttl=25, clock=clock)
+        session_id = store.create_session(user)
+        for now in (5, 10, 15, 20):
+            clock.now = now
+            assert store.get_user(session_id) is user
+        clock.now = 25
+        assert store.get_user(session_id) is None
+
+    def test_lru_cap(self, user):
+        """Test that the least recently used session is evicted at capacity."""
+        store = SessionStore(max_sessions=2)
+        first = store.create_session(user)
+        second = store.create_session(user)
+        store.get_user(first)
+        third = store.create_session(user)
+
+        assert store.get_user(first) is user
+        assert store.get_user(second) is None
+        assert store.get_user(third) is user
+
+    def test_sweep_expired(self, user):
+        """Test that a sweep removes idle and absolute-expired sessions."""
+        clock = FakeClock()
+        store = SessionStore(idle_ttl=10, absolute_ttl=30, clock=clock)
+        idle = store.create_session(user)
+        clock.now = 5
+        active = store.create_session(user)
+
+        clock.now = 12
+        store.get_user(active)
+        assert store.sweep_expired() == 1
+        assert len(store) == 1
+
+        for now in (20, 28, 34):
+            clock.now = now
+            store.get_user(active)
+        clock.now = 36
+        assert store.sweep_expired() == 1
+        assert len(store) == 0
+        assert store.get_user(idle) is None
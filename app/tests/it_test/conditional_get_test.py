@@ -0,0 +1,86 @@
+"""
+Integration tests for ETag / If-None-Match on polled endpoints.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.api.etag import etag_matches
+
+client = TestClient(app)
+
+
+def login() -> str:
+    """Log in with the default credentials and return the session ID."""
+    response = client.post("/auth/login", json={"username": "admin", "password": "password123"})
+    assert response.status_code == 200
+    return response.json()["session_id"]
+
+
+class TestEtagMatching:
+    """Tests for If-None-Match parsing."""
+
+    def test_matching_rules(self):
+        """Test exact, list, weak and wildcard matches."""
+        assert etag_matches('"a-1"', '"a-1"')
+        assert etag_matches('"x", "a-1"', '"a-1"')
+        assert etag_matches('W/"a-1"', '"a-1"')
+        assert etag_matches("*", '"a-1"')
+        assert not etag_matches('"a-2"', '"a-1"')
+        assert not etag_matches(None, '"a-1"')
+
+
+class TestConditionalGet:
+    """Tests for 304 responses on GET /devices, /schedule and /notifications."""
+
+    @pytest.mark.parametrize("path", ["/devices", "/schedule", "/notifications"])
+    def test_unchanged_returns_304(self, path):
+        """Test that repeating a poll with the returned ETag gets 304."""
+        session_id = login()
+        first = client.get(path, params={"session_id": session_id})
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+
+        second = client.get(path, params={"session_id": session_id}, headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.headers["ETag"] == etag
+        assert second.content == b""
+
+    def test_device_change_invalidates(self):
+        """Test that toggling a device changes the devices ETag."""
+        session_id = login()
+        etag = client.get("/devices", params={"session_id": session_id}).headers["ETag"]
+        client.post("/devices/light1/toggle", params={"session_id": session_id})
+
+        response = client.get("/devices", params={"session_id": session_id}, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_new_notification_invalidates(self):
+        """Test that a new notification changes the notifications ETag."""
+        session_id = login()
+        etag = client.get("/notifications", params={"session_id": session_id}).headers["ETag"]
+        client.post("/devices/light1/toggle", params={"session_id": session_id})
+
+        response = client.get("/notifications", params={"session_id": session_id},
+                              headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+    def test_schedule_change_invalidates(self):
+        """Test that scheduling a task changes the schedule ETag."""
+        session_id = login()
+        etag = client.get("/schedule", params={"session_id": session_id}).headers["ETag"]
+        client.post("/schedule", params={"session_id": session_id}, json={
+            "device_id": "light1",
+            "action": "turn_on",
+            "scheduled_time": "2030-01-01T07:00:00"
+        })
+
+        response = client.get("/schedule", params={"session_id": session_id}, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+    def test_invalid_session_not_revalidated(self):
+        """Test that an ETag does not bypass authentication."""
+        session_id = login()
+        etag = client.get("/devices", params={"session_id": session_id}).headers["ETag"]
+        response = client.get("/devices", params={"session_id": "bogus"}, headers={"If-None-Match": etag})
+        assert response.status_code == 401
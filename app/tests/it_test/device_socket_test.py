@@ -0,0 +1,127 @@
+"""
+Integration tests for the device WebSocket push channel.
+"""
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from main import app
+from app.api.storage import dashboards_db
+from app.models.dashboard import Dashboard
+from app.models.device import Light
+from app.models.device_hub import DeviceHub, RESYNC
+
+client = TestClient(app)
+
+
+def login() -> str:
+    """Log in with the default credentials and return the session ID."""
+    response = client.post("/auth/login", json={"username": "admin", "password": "password123"})
+    assert response.status_code == 200
+    return response.json()["session_id"]
+
+
+class TestDeviceSocket:
+    """Tests for the /devices/ws endpoint."""
+
+    def test_snapshot_then_push(self):
+        """Test that a REST change is pushed to a connected client."""
+        session_id = login()
+        with client.websocket_connect(f"/devices/ws?session_id={session_id}") as ws:
+            snapshot = ws.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert "light1" in {d["device_id"] for d in snapshot["devices"]}
+
+            client.post("/devices/light1/toggle", params={"session_id": session_id})
+            message = ws.receive_json()
+            assert message["type"] == "device"
+            assert message["op"] == "updated"
+            assert message["device"]["device_id"] == "light1"
+            assert message["version"] > snapshot["version"]
+
+    def test_commands(self):
+        """Test toggle and brightness commands sent over the socket."""
+        session_id = login()
+        with client.websocket_connect(f"/devices/ws?session_id={session_id}") as ws:
+            ws.receive_json()
+            ws.send_json({"id": 1, "action": "set_brightness", "device_id": "light2", "brightness": 30})
+            messages = [ws.receive_json(), ws.receive_json()]
+            by_type = {m["type"]: m for m in messages}
+            assert by_type["result"] == {
+                "type": "result", "id": 1, "ok": True, "device": by_type["device"]["device"]
+            }
+            assert by_type["device"]["device"]["brightness"] == 30
+
+            ws.send_json({"id": 2, "action": "set_brightness", "device_id": "light2", "brightness": 300})
+            result = ws.receive_json()
+            assert result["ok"] is False and result["status"] == 400
+
+            ws.send_json({"id": 3, "action": "toggle", "device_id": "missing"})
+            result = ws.receive_json()
+            assert result["ok"] is False and result["status"] == 404
+
+    def test_change_after_eviction_applied(self):
+        """Test that a change to a reloaded dashboard carries its new epoch."""
+        session_id = login()
+        with client.websocket_connect(f"/devices/ws?session_id={session_id}") as ws:
+            snapshot = ws.receive_json()
+
+            # Admitting another dashboard with no room evicts every idle one
+            budget = dashboards_db.max_dashboards
+            dashboards_db.max_dashboards = 0
+            try:
+                dashboards_db["socket-evictor"] = Dashboard("socket-evictor")
+            finally:
+                dashboards_db.max_dashboards = budget
+
+            client.post("/devices/light1/toggle", params={"session_id": session_id})
+            message = ws.receive_json()
+            assert message["epoch"] != snapshot["epoch"]
+            assert message["version"] <= snapshot["version"]
+
+            ws.send_json({"action": "snapshot"})
+            resync = ws.receive_json()
+            assert resync["type"] == "snapshot"
+            assert resync["epoch"] == message["epoch"]
+            light = next(d for d in resync["devices"] if d["device_id"] == "light1")
+            assert light["is_on"] == message["device"]["is_on"]
+
+    def test_invalid_session_rejected(self):
+        """Test that a socket with an invalid session is closed."""
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/devices/ws?session_id=bogus") as ws:
+                ws.receive_json()
+
+
+class TestDeviceHub:
+    """Tests for DeviceHub fan-out."""
+
+    def test_fan_out_and_resync(self):
+        """Test delivery to every subscriber and resync on overflow."""
+        async def scenario():
+            hub = DeviceHub(max_pending=2)
+            dashboard = Dashboard("hub-user")
+            dashboard.add_listener(hub.publish)
+            light = Light("l1", "Lamp")
+            dashboard.add_device(light)
+
+            first = hub.subscribe("hub-user")
+            second = hub.subscribe("hub-user")
+            other = hub.subscribe("someone-else")
+            light.toggle()
+            assert json.loads(first.queue.get_nowait())["device"]["is_on"] is True
+            assert second.queue.qsize() == 1
+            assert other.queue.empty()
+
+            for _ in range(3):
+                light.toggle()
+            assert first.queue.get_nowait() is RESYNC
+            assert first.dropped == 2
+
+            hub.unsubscribe(first)
+            hub.unsubscribe(second)
+            hub.unsubscribe(other)
+            assert hub.subscriber_count() == 0
+
+        asyncio.run(scenario())
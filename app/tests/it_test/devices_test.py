@@ -0,0 +1,442 @@
+"""
+Integration tests for the Devices API endpoints and device models.
+"""
+import json
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.api.models import DeviceResponse
+from app.api.devices import DEVICE_RESPONSE_FIELDS
+from app.models.dashboard import Dashboard
+from app.models.device import Light, Thermostat, SecurityCamera
+from app.models.device_factory import DeviceFactory
+from app.models.device_import import MAX_LINE_BYTES
+
+client = TestClient(app)
+
+
+def login() -> str:
+    """Log in with the default credentials and return the session ID."""
+    response = client.post("/auth/login", json={"username": "admin", "password": "password123"})
+    assert response.status_code == 200
+    return response.json()["session_id"]
+
+
+class TestDeviceModels:
+    """Tests for the compact device classes."""
+
+    @pytest.mark.parametrize("device_class", [Light, Thermostat, SecurityCamera])
+    def test_no_instance_dict(self, device_class):
+        """Test that built-in devices carry no per-instance __dict__."""
+        device = device_class("d1", "Device")
+        assert not hasattr(device, "__dict__")
+
+    def test_configure_and_restore(self):
+        """Test that configure and create_from_dict still set slotted attributes."""
+        light = Light("l1", "Lamp")
+        light.configure({"brightness": 25, "unknown": 1})
+        assert light.brightness == 25
+
+        restored = DeviceFactory.get_instance().create_from_dict(light.to_dict())
+        assert restored.to_dict() == light.to_dict()
+
+
+class TestSerializationCache:
+    """Tests for versioned device serialization."""
+
+    def make_dashboard(self):
+        dashboard = Dashboard("cache-user")
+        dashboard.add_device(Light("l1", "Lamp"))
+        dashboard.add_device(Thermostat("t1", "Hall"))
+        dashboard.add_device(SecurityCamera("c1", "Door"))
+        return dashboard
+
+    def test_mutators_bump_version(self):
+        """Test that state-changing methods bump the device version."""
+        light = Light("l1", "Lamp")
+        light.toggle()
+        light.set_brightness(40)
+        assert light.version == 2
+        assert light.set_brightness(400) is False
+        assert light.version == 2
+
+    def test_matches_response_model(self):
+        """Test that the cached encoding matches DeviceResponse validation."""
+        dashboard = self.make_dashboard()
+        expected = [DeviceResponse(**data).model_dump() for data in dashboard.display_devices()]
+        assert json.loads(dashboard.display_devices_json(DEVICE_RESPONSE_FIELDS)) == expected
+
+    def test_cached_until_change(self):
+        """Test that the encoded list is reused until a device changes."""
+        dashboard = self.make_dashboard()
+        first = dashboard.display_devices_json()
+        assert dashboard.display_devices_json() is first
+
+        dashboard.get_device("l1").turn_on()
+        second = dashboard.display_devices_json()
+        assert second is not first
+        assert json.loads(second)[0]["is_on"] is True
+        assert json.loads(second)[1:] == json.loads(first)[1:]
+
+    def test_replaced_device_is_reencoded(self):
+        """Test that a device replaced under the same ID is not served stale."""
+        dashboard = self.make_dashboard()
+        dashboard.display_devices_json()
+        dashboard.remove_device("l1")
+        dashboard.add_device(Light("l1", "Renamed"))
+        names = [d["device_name"] for d in json.loads(dashboard.display_devices_json())]
+        assert "Renamed" in names
+
+
+class TestChangeFeed:
+    """Tests for Dashboard.changes_since and GET /devices/changes."""
+
+    def test_changes_since(self):
+        """Test that only changed and removed devices are reported."""
+        dashboard = Dashboard("feed-user")
+        for device_id in ("a", "b", "c"):
+            dashboard.add_device(Light(device_id, device_id))
+        version = dashboard.version
+
+        dashboard.get_device("a").toggle()
+        dashboard.get_device("a").set_brightness(10)
+        dashboard.remove_device("b")
+        changed, removed = dashboard.changes_since(version)
+        assert [device.device_id for device in changed] == ["a"]
+        assert removed == ["b"]
+        assert dashboard.changes_since(dashboard.version) == ([], [])
+
+    def test_truncated_log_needs_snapshot(self):
+        """Test that a version older than the log returns None."""
+        dashboard = Dashboard("feed-user", change_log_size=2)
+        light = Light("a", "a")
+        dashboard.add_device(light)
+        for _ in range(3):
+            light.toggle()
+        assert dashboard.changes_since(0) is None
+        assert dashboard.changes_since(dashboard.version - 2) is not None
+        assert dashboard.changes_since(dashboard.version + 1) is None
+
+    def test_endpoint_delta(self):
+        """Test a snapshot followed by an incremental fetch."""
+        session_id = login()
+        snapshot = client.get("/devices/changes", params={"session_id": session_id}).json()
+        assert snapshot["full"] is True
+        assert {d["device_id"] for d in snapshot["devices"]} >= {"light1", "light2"}
+
+        client.post("/devices/light1/toggle", params={"session_id": session_id})
+        delta = client.get("/devices/changes", params={
+            "session_id": session_id,
+            "since": snapshot["version"],
+            "epoch": snapshot["epoch"]
+        }).json()
+        assert delta["full"] is False
+        assert [d["device_id"] for d in delta["devices"]] == ["light1"]
+        assert delta["removed"] == []
+        assert delta["version"] > snapshot["version"]
+
+    def test_endpoint_epoch_mismatch(self):
+        """Test that an unknown epoch gets a full snapshot."""
+        session_id = login()
+        response = client.get("/devices/changes", params={
+            "session_id": session_id, "since": 1, "epoch": "stale"
+        })
+        assert response.status_code == 200
+        assert response.json()["full"] is True
+
+    def test_endpoint_requires_session(self):
+        """Test that the change feed requires a valid session."""
+        response = client.get("/devices/changes", params={"session_id": "bogus"})
+        assert response.status_code == 401
+
+
+class TestBatchCommands:
+    """Tests for POST /devices/batch."""
+
+    def test_batch_runs_each_command(self):
+        """Test per-item results with a mix of valid and invalid commands."""
+        session_id = login()
+        light = client.post("/devices", params={"session_id": session_id},
+                            json={"device_type": "light", "device_name": "Batch Light"}).json()
+        thermostat = client.post("/devices", params={"session_id": session_id},
+                                 json={"device_type": "thermostat", "device_name": "Batch Thermostat"}).json()
+
+        response = client.post("/devices/batch", params={"session_id": session_id}, json={"commands": [
+            {"device_id": light["device_id"], "action": "set_brightness", "brightness": 40},
+            {"device_id": thermostat["device_id"], "action": "turn_on"},
+            {"device_id": thermostat["device_id"], "action": "toggle"},
+            {"device_id": "missing", "action": "turn_off"},
+            {"device_id": light["device_id"], "action": "explode"}
+        ]})
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["succeeded"], data["failed"]) == (2, 3)
+        results = data["results"]
+        assert results[0]["device"]["brightness"] == 40
+        assert results[1]["device"]["status"] == "on"
+        assert results[2]["detail"] == "Device is not a light"
+        assert results[3]["detail"] == "Device not found"
+        assert results[4]["success"] is False
+
+    def test_batch_sends_one_notification(self):
+        """Test that a batch produces a single summary notification."""
+        session_id = login()
+        recent = client.get("/notifications", params={"session_id": session_id, "limit": 1}).json()
+        before = recent[0]["id"] if recent else 0
+        client.post("/devices/batch", params={"session_id": session_id}, json={"commands": [
+            {"device_id": "light1", "action": "turn_on"},
+            {"device_id": "light2", "action": "turn_on"}
+        ]})
+        latest = client.get("/notifications", params={"session_id": session_id, "limit": 5}).json()
+        new = [n for n in latest if n["id"] > before]
+        assert [n["event_type"] for n in new] == ["devices_batch"]
+
+    def test_batch_validation(self):
+        """Test that empty batches and bad brightness values are rejected."""
+        session_id = login()
+        assert client.post("/devices/batch", params={"session_id": session_id},
+                           json={"commands": []}).status_code == 422
+        assert client.post("/devices/batch", params={"session_id": session_id}, json={"commands": [
+            {"device_id": "light1", "action": "set_brightness", "brightness": 101}
+        ]}).status_code == 422
+
+    def test_batch_requires_session(self):
+        """Test that batches require a valid session."""
+        response = client.post("/devices/batch", params={"session_id": "bogus"},
+                               json={"commands": [{"device_id": "light1", "action": "turn_on"}]})
+        assert response.status_code == 401
+
+
+class TestRooms:
+    """Tests for room indexes, rollups and room commands."""
+
+    def test_rollups_follow_mutations(self):
+        """Test that rollups are updated by every kind of change."""
+        dashboard = Dashboard("room-user")
+        lamp = Light("l1", "Lamp")
+        lamp.room = "Den"
+        dashboard.add_device(lamp)
+        dashboard.add_device(Light("l2", "Spot"))
+        dashboard.assign_room("l2", "Den")
+        assert dashboard.get_rooms() == {"Den": {"device_count": 2, "on_count": 0, "average_brightness": None}}
+
+        lamp.set_brightness(40)
+        dashboard.get_device("l2").turn_on()
+        assert dashboard.get_rooms()["Den"] == {"device_count": 2, "on_count": 2, "average_brightness": 70.0}
+
+        dashboard.assign_room("l2", "Hall")
+        assert dashboard.get_rooms()["Den"]["average_brightness"] == 40.0
+        assert [d.device_id for d in dashboard.get_room_devices("Hall")] == ["l2"]
+
+        dashboard.remove_device("l1")
+        assert "Den" not in dashboard.get_rooms()
+        assert dashboard.get_room_devices("Den") == []
+
+    def test_room_endpoints(self):
+        """Test assigning a room, listing rooms and a room-wide command."""
+        session_id = login()
+        params = {"session_id": session_id}
+        created = [
+            client.post("/devices", params=params,
+                        json={"device_type": kind, "device_name": kind, "room": "Studio"}).json()
+            for kind in ("light", "light", "thermostat")
+        ]
+        assert created[0]["room"] == "Studio"
+
+        response = client.post("/devices/rooms/Studio/command", params=params,
+                               json={"action": "set_brightness", "brightness": 30})
+        assert response.status_code == 200
+        assert response.json()["succeeded"] == 2
+
+        rooms = {r["room"]: r for r in client.get("/devices/rooms", params=params).json()}
+        assert rooms["Studio"] == {"room": "Studio", "device_count": 3, "on_count": 2, "average_brightness": 30.0}
+
+        moved = client.put(f"/devices/{created[2]['device_id']}/room", params=params, json={"room": None})
+        assert moved.json()["room"] is None
+        rooms = {r["room"]: r for r in client.get("/devices/rooms", params=params).json()}
+        assert rooms["Studio"]["device_count"] == 2
+
+    def test_unknown_room(self):
+        """Test that commands for an empty room return 404."""
+        session_id = login()
+        response = client.post("/devices/rooms/Nowhere/command", params={"session_id": session_id},
+                               json={"action": "turn_off"})
+        assert response.status_code == 404
+
+
+class TestDeviceQueries:
+    """Tests for secondary indexes and paginated GET /devices."""
+
+    def make_dashboard(self):
+        dashboard = Dashboard("query-user")
+        for i in range(10):
+            dashboard.add_device(Light(f"l{i}", f"Light {i}"))
+        dashboard.add_device(Thermostat("t1", "Hall"))
+        for i in range(0, 10, 2):
+            dashboard.get_device(f"l{i}").turn_on()
+        return dashboard
+
+    def test_filters_follow_mutations(self):
+        """Test that the indexes track status changes and removals."""
+        dashboard = self.make_dashboard()
+        on, _ = dashboard.query_devices(is_on=True)
+        assert [d.device_id for d in on] == ["l0", "l2", "l4", "l6", "l8"]
+
+        dashboard.get_device("l0").turn_off()
+        dashboard.remove_device("l2")
+        on, _ = dashboard.query_devices(status="on", device_type="light")
+        assert [d.device_id for d in on] == ["l4", "l6", "l8"]
+        thermostats, _ = dashboard.query_devices(device_type="thermostat")
+        assert [d.device_id for d in thermostats] == ["t1"]
+
+    def test_cursor_pages(self):
+        """Test that paging visits every match once, in insertion order."""
+        dashboard = self.make_dashboard()
+        seen, cursor = [], 0
+        while cursor is not None:
+            page, cursor = dashboard.query_devices(device_type="light", after=cursor, limit=3)
+            assert len(page) <= 3
+            seen.extend(d.device_id for d in page)
+        assert seen == [f"l{i}" for i in range(10)]
+
+    def test_endpoint_pagination(self):
+        """Test filtered paging through GET /devices."""
+        session_id = login()
+        params = {"session_id": session_id, "device_type": "light", "limit": 1}
+        first = client.get("/devices", params=params)
+        assert first.status_code == 200
+        assert len(first.json()) == 1
+        cursor = first.headers["X-Next-Cursor"]
+
+        second = client.get("/devices", params={**params, "cursor": cursor})
+        assert second.json()[0]["device_id"] != first.json()[0]["device_id"]
+        assert all(d["device_type"] == "light" for d in second.json())
+
+        bad = client.get("/devices", params={**params, "cursor": "stale.1"})
+        assert bad.status_code == 400
+
+    def test_endpoint_filter_without_limit(self):
+        """Test that a filter alone returns every match without a cursor."""
+        session_id = login()
+        response = client.get("/devices", params={"session_id": session_id, "status": "no-such-status"})
+        assert response.status_code == 200
+        assert response.json() == []
+        assert "X-Next-Cursor" not in response.headers
+
+
+class TestDeviceImport:
+    """Tests for streaming bulk import."""
+
+    def test_factory_create_devices(self):
+        """Test that a bad config is reported without stopping the batch."""
+        factory = DeviceFactory()
+        devices, errors = factory.create_devices([
+            {"device_type": "light", "device_name": "A", "device_id": "a", "room": "Hall"},
+            {"device_type": "toaster", "device_name": "B"},
+            {"device_type": "thermostat", "device_name": "C"},
+            {"device_type": "light"},
+        ])
+        assert [d.device_name for d in devices] == ["A", "C"]
+        assert devices[0].device_id == "a" and devices[0].room == "Hall"
+        assert [index for index, _ in errors] == [1, 3]
+
+    def test_import_ndjson(self):
+        """Test an NDJSON import streamed in small chunks."""
+        session_id = login()
+        prefix = uuid.uuid4().hex
+        lines = [json.dumps({"device_type": "light", "device_name": f"L{i}", "device_id": f"{prefix}-{i}"}) for i in range(1200)]
+        lines[5] = "{not json"
+        lines[7] = json.dumps({"device_type": "toaster", "device_name": "T"})
+        body = ("\n".join(lines) + "\n").encode()
+
+        def chunks():
+            for start in range(0, len(body), 1000):
+                yield body[start:start + 1000]
+
+        response = client.post(
+            "/devices/import",
+            params={"session_id": session_id},
+            content=chunks(),
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 1198
+        assert data["failed"] == 2
+        assert [e["line"] for e in data["errors"]] == [6, 8]
+
+        devices = client.get("/devices", params={"session_id": session_id, "device_type": "light"}).json()
+        assert f"{prefix}-0" in {d["device_id"] for d in devices}
+
+        again = client.post(
+            "/devices/import",
+            params={"session_id": session_id, "format": "ndjson"},
+            content=lines[0].encode()
+        )
+        assert again.json()["imported"] == 0
+        assert again.json()["errors"] == [{"line": 1, "detail": "Device already exists"}]
+
+    def test_import_stopped_by_long_line(self):
+        """Test that an unreadable line after the first chunk reports what was added."""
+        session_id = login()
+        prefix = uuid.uuid4().hex
+        lines = [json.dumps({"device_type": "light", "device_name": f"L{i}", "device_id": f"{prefix}-{i}"})
+                 for i in range(600)]
+        lines.append("x" * (MAX_LINE_BYTES + 1))
+        lines.append(json.dumps({"device_type": "light", "device_name": "After", "device_id": f"{prefix}-after"}))
+
+        body = ("\n".join(lines) + "\n").encode()
+
+        def chunks():
+            for start in range(0, len(body), 8192):
+                yield body[start:start + 8192]
+
+        response = client.post(
+            "/devices/import",
+            params={"session_id": session_id, "format": "ndjson"},
+            content=chunks()
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["complete"] is False
+        assert data["imported"] == 600 and data["failed"] == 1
+        assert data["errors"][-1]["line"] == 601
+
+        devices = client.get("/devices", params={"session_id": session_id, "device_type": "light"}).json()
+        ids = {d["device_id"] for d in devices}
+        assert f"{prefix}-599" in ids and f"{prefix}-after" not in ids
+
+    def test_import_csv(self):
+        """Test a CSV import with a header row and optional columns."""
+        session_id = login()
+        body = (
+            "device_type,device_name,room\r\n"
+            "light,\"Desk, left\",Office\r\n"
+            "thermostat,Hall thermostat,\r\n"
+            "light,Short row\r\n"
+        )
+        response = client.post(
+            "/devices/import",
+            params={"session_id": session_id},
+            content=body.encode(),
+            headers={"Content-Type": "text/csv; charset=utf-8"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 2
+        assert data["errors"][0]["line"] == 4
+
+        rooms = client.get("/devices/rooms", params={"session_id": session_id}).json()
+        assert "Office" in {r["room"] for r in rooms}
+
+    def test_import_requires_format(self):
+        """Test that an unknown body type is rejected."""
+        session_id = login()
+        response = client.post(
+            "/devices/import",
+            params={"session_id": session_id},
+            content=b"x",
+            headers={"Content-Type": "application/octet-stream"}
+        )
+        assert response.status_code == 415
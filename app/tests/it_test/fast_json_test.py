@@ -0,0 +1,101 @@
+"""
+Integration tests for the pre-built list encoders.
+"""
+import json
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from main import app
+from app.api.fast_json import ListEncoder
+from app.api.models import DeviceResponse, TaskResponse
+from app.api.integrations import IntegrationResponse
+from app.models.device import Light, Thermostat
+from app.models.integrations import Integration
+from app.models.scheduler import ScheduledTask
+
+client = TestClient(app)
+
+
+def login() -> str:
+    """Log in with the default credentials and return the session ID."""
+    response = client.post("/auth/login", json={"username": "admin", "password": "password123"})
+    assert response.status_code == 200
+    return response.json()["session_id"]
+
+
+def validated(model, items) -> list:
+    """Serialize items the way response_model validation would."""
+    adapter = TypeAdapter(List[model])
+    return json.loads(adapter.dump_json(adapter.validate_python(items, from_attributes=True)))
+
+
+class TestListEncoder:
+    """Tests that encoded lists match validated responses."""
+
+    def test_devices(self):
+        """Test objects missing optional fields and non-ASCII names."""
+        light = Light("l1", "Küche")
+        light.room = "Kitchen"
+        devices = [light, Thermostat("t1", "Hall")]
+        encoder = ListEncoder(DeviceResponse)
+        expected = validated(DeviceResponse, [d.to_dict() for d in devices])
+        assert json.loads(encoder.encode_objects(devices)) == expected
+        assert json.loads(encoder.encode_dicts([d.to_dict() for d in devices])) == expected
+        assert "Küche".encode() in encoder.encode_objects(devices)
+
+    def test_tasks_drop_extra_fields(self):
+        """Test that fields outside the model are not written."""
+        task = ScheduledTask("t1", "d1", "turn_on", "2030-01-01T08:00:00")
+        encoded = json.loads(ListEncoder(TaskResponse).encode_objects([task]))
+        assert encoded == validated(TaskResponse, [task.to_dict()])
+        assert "created_at" not in encoded[0]
+
+    def test_missing_required_field_raises(self):
+        """Test that an item without a required field is rejected, not written as null."""
+        encoder = ListEncoder(TaskResponse)
+        record = ScheduledTask("t1", "d1", "turn_on", "2030-01-01T08:00:00").to_dict()
+        del record["device_id"]
+        with pytest.raises(ValueError, match="device_id"):
+            encoder.encode_dicts([record])
+        with pytest.raises(ValueError, match="task_id"):
+            encoder.encode_objects([Integration(name="Hue", features=[])])
+
+    def test_integrations(self):
+        """Test dataclass items."""
+        integration = Integration(name="Hue", features=["dim"])
+        encoded = json.loads(ListEncoder(IntegrationResponse).encode_objects([integration]))
+        assert encoded == validated(IntegrationResponse, [integration])
+
+
+class TestListEndpoints:
+    """Tests for the list endpoints that use the encoders."""
+
+    def test_openapi_schema_unchanged(self):
+        """Test that list routes still advertise their response models."""
+        paths = client.get("/openapi.json").json()["paths"]
+        for path, model in (("/devices", "DeviceResponse"), ("/schedule", "TaskResponse"), ("/integrations/", "IntegrationResponse")):
+            schema = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+            assert schema["type"] == "array"
+            assert schema["items"]["$ref"].endswith("/" + model)
+
+    def test_filtered_devices_match_model(self):
+        """Test a filtered device page against DeviceResponse."""
+        session_id = login()
+        response = client.get("/devices", params={"session_id": session_id, "device_type": "light"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert "ETag" in response.headers
+        data = response.json()
+        assert data == validated(DeviceResponse, data)
+
+    def test_schedule_and_integrations(self):
+        """Test that the encoded lists parse as their models."""
+        session_id = login()
+        tasks = client.get("/schedule", params={"session_id": session_id})
+        assert tasks.status_code == 200
+        assert "ETag" in tasks.headers
+        assert tasks.json() == validated(TaskResponse, tasks.json())
+
+        integrations = client.get("/integrations/")
+        assert integrations.json() == validated(IntegrationResponse, integrations.json())
@@ -0,0 +1,131 @@
+"""
+Integration tests for snapshot + journal recovery.
+"""
+import os
+import tracemalloc
+from app.models.dashboard import Dashboard
+from app.models.dashboard_repository import DashboardRepository
+from app.models.device import Light
+from app.models.device_factory import DeviceFactory
+from app.models.journal_backend import JournalBackend, JOURNAL_FILE
+from app.models.notification_service import NotificationService
+from app.models.scheduler import Scheduler, ScheduledTask
+
+
+class TestJournalRecovery:
+    """Tests for rebuilding state from the snapshot and journal."""
+
+    def test_journal_replay(self, tmp_path):
+        """Test that writes are recovered from the journal alone."""
+        backend = JournalBackend(str(tmp_path))
+        backend.put("ns", "a", {"x": 1})
+        backend.put_many("ns", {"b": {"x": 2}, "c": {"x": 3}})
+        backend.delete("ns", "b")
+        backend.close()
+
+        recovered = JournalBackend(str(tmp_path))
+        assert recovered.items("ns") == {"a": {"x": 1}, "c": {"x": 3}}
+        assert recovered.version("ns") == 3
+        assert recovered.replayed_entries == 3
+
+    def test_snapshot_plus_tail(self, tmp_path):
+        """Test that only entries after the snapshot are replayed."""
+        backend = JournalBackend(str(tmp_path))
+        for i in range(10):
+            backend.put("ns", f"k{i}", {"i": i})
+        backend.append("events", {"message": "before"})
+        backend.compact()
+        backend.put("ns", "k0", {"i": 100})
+        backend.append("events", {"message": "after"})
+        backend.close()
+
+        recovered = JournalBackend(str(tmp_path))
+        assert recovered.replayed_entries == 2
+        assert recovered.get("ns", "k0") == {"i": 100}
+        assert recovered.get("ns", "k9") == {"i": 9}
+        assert [record["message"] for _, record in recovered.tail("events", 5)] == ["before", "after"]
+        assert recovered.append("events", {"message": "new"}) == 3
+
+    def test_compaction_keeps_undecoded_sections(self, tmp_path):
+        """Test that namespaces never touched survive repeated compaction."""
+        backend = JournalBackend(str(tmp_path))
+        backend.put("cold", "k", {"v": 1})
+        backend.put("hot", "k", {"v": 1})
+        backend.compact()
+        backend.close()
+
+        reopened = JournalBackend(str(tmp_path))
+        reopened.put("hot", "k", {"v": 2})
+        reopened.compact()
+        reopened.close()
+
+        final = JournalBackend(str(tmp_path))
+        assert final.get("cold", "k") == {"v": 1}
+        assert final.get("hot", "k") == {"v": 2}
+        assert final.version("cold") == 1
+
+    def test_torn_tail_is_dropped(self, tmp_path):
+        """Test that a partially written last frame is ignored and truncated."""
+        backend = JournalBackend(str(tmp_path))
+        backend.put("ns", "a", {"x": 1})
+        backend.put("ns", "b", {"x": 2})
+        backend.close()
+        path = os.path.join(str(tmp_path), JOURNAL_FILE)
+        with open(path, "r+b") as journal:
+            journal.truncate(os.path.getsize(path) - 3)
+
+        recovered = JournalBackend(str(tmp_path))
+        assert recovered.items("ns") == {"a": {"x": 1}}
+        recovered.put("ns", "c", {"x": 3})
+        recovered.close()
+        assert JournalBackend(str(tmp_path)).items("ns") == {"a": {"x": 1}, "c": {"x": 3}}
+
+    def test_replay_streams_frames(self, tmp_path):
+        """Test that replay memory does not grow with the journal size."""
+        backend = JournalBackend(str(tmp_path))
+        for i in range(4000):
+            backend.put("ns", "k", {"i": i, "pad": "x" * 1000})
+        backend.close()
+        journal_size = os.path.getsize(os.path.join(str(tmp_path), JOURNAL_FILE))
+
+        tracemalloc.start()
+        recovered = JournalBackend(str(tmp_path))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert recovered.get("ns", "k")["i"] == 3999
+        assert peak < journal_size / 10
+
+
+class TestJournaledState:
+    """Tests for dashboards, tasks and notifications surviving a restart."""
+
+    def test_restart_restores_everything(self, tmp_path):
+        """Test a full restart with devices, tasks and notifications."""
+        factory = DeviceFactory.get_instance()
+        backend = JournalBackend(str(tmp_path))
+        repo = DashboardRepository(backend, factory)
+        scheduler = Scheduler(backend=backend)
+        notifications = NotificationService(backend=backend)
+
+        repo["u1"] = Dashboard("u1")
+        repo["u1"].add_device(Light("l1", "Lamp"))
+        repo["u1"].add_device(Light("l2", "Lamp 2"))
+        repo["u1"].get_device("l1").set_brightness(55)
+        repo["u1"].get_device("l2").toggle()
+        repo["u1"].remove_device("l2")
+        scheduler.schedule_task(ScheduledTask("t1", "l1", "turn_off", "2030-01-01T07:00:00"))
+        scheduler.schedule_task(ScheduledTask("t2", "l1", "turn_on", "2030-01-01T08:00:00"))
+        scheduler.cancel_task("t2")
+        notifications.send_notification("hello", "l1", "test")
+        repo.writer.stop()
+        backend.close()
+
+        backend = JournalBackend(str(tmp_path))
+        repo = DashboardRepository(backend, factory)
+        scheduler = Scheduler(backend=backend)
+        assert scheduler.restore() == 1
+        dashboard = repo["u1"]
+        assert dashboard.get_device_count() == 1
+        assert dashboard.get_device("l1").brightness == 55
+        assert scheduler.get_task("t1").action == "turn_off"
+        assert NotificationService(backend=backend).get_notifications(5)[0]["message"] == "hello"
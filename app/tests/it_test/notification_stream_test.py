@@ -0,0 +1,100 @@
+"""
+Integration tests for notification IDs and the Server-Sent Events stream.
+"""
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.api.notifications import notification_events
+from app.api.storage import notification_service
+from app.models.notification_service import NotificationService, StreamObserver
+from app.models.storage_backend import MemoryBackend
+
+client = TestClient(app)
+
+
+def parse(chunk: str) -> dict:
+    """Decode the data line of one SSE event."""
+    lines = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    data = json.loads(lines["data"])
+    assert int(lines["id"]) == data["id"]
+    return data
+
+
+class TestNotificationIds:
+    """Tests for event IDs and history reads."""
+
+    @pytest.mark.parametrize("backend", [None, MemoryBackend()])
+    def test_events_since(self, backend):
+        """Test that events get increasing IDs and can be read after an ID."""
+        service = NotificationService(backend=backend)
+        for i in range(5):
+            service.send_notification(f"message {i}")
+        ids = [n["id"] for n in service.get_notifications(10)]
+        assert ids == sorted(ids, reverse=True)
+        assert service.latest_event_id() == ids[0]
+
+        after = service.events_since(ids[2], limit=10)
+        assert [n["id"] for n in after] == sorted(ids[:2])
+        assert [n["message"] for n in service.events_since(0, limit=2)] == ["message 0", "message 1"]
+
+    def test_send_notification_reaches_subscribers(self):
+        """Test that send_notification notifies observers."""
+        async def scenario():
+            service = NotificationService()
+            observer = StreamObserver(max_pending=2)
+            service.subscribe(observer)
+            for i in range(3):
+                service.send_notification(f"message {i}")
+            events = await observer.next_events(timeout=0.1)
+            assert [event.message for event in events] == ["message 1", "message 2"]
+            assert observer.dropped == 1
+            assert await observer.next_events(timeout=0.01) == []
+
+        asyncio.run(scenario())
+
+
+class TestNotificationStream:
+    """Tests for GET /notifications/stream."""
+
+    def test_resume_then_live(self):
+        """Test replay after Last-Event-ID followed by live events."""
+        async def scenario():
+            notification_service.send_notification("before stream")
+            seen = notification_service.latest_event_id()
+            notification_service.send_notification("missed while offline")
+
+            stream = notification_events(seen, lambda: True, heartbeat=5.0)
+            assert (await anext(stream)).startswith("retry:")
+            replayed = parse(await anext(stream))
+            assert replayed["message"] == "missed while offline"
+
+            notification_service.send_notification("live")
+            live = parse(await anext(stream))
+            assert live["message"] == "live"
+            assert live["id"] > replayed["id"]
+            await stream.aclose()
+
+        asyncio.run(scenario())
+
+    def test_stream_ends_when_unauthorized(self):
+        """Test that the stream stops once the session is invalid."""
+        async def scenario():
+            stream = notification_events(None, lambda: False, heartbeat=0.01)
+            chunks = [chunk async for chunk in stream]
+            assert len(chunks) == 1
+
+        asyncio.run(scenario())
+
+    def test_requires_session(self):
+        """Test that the stream requires a valid session."""
+        response = client.get("/notifications/stream", params={"session_id": "bogus"})
+        assert response.status_code == 401
+
+    def test_rest_notifications_carry_ids(self):
+        """Test that GET /notifications includes event IDs."""
+        session_id = client.post("/auth/login", json={"username": "admin", "password": "password123"}).json()["session_id"]
+        client.post("/devices/light1/toggle", params={"session_id": session_id})
+        data = client.get("/notifications", params={"session_id": session_id}).json()
+        assert data and all("id" in n for n in data)
@@ -0,0 +1,198 @@
+"""
+Integration tests for retention ring buffers and their archive.
+"""
+from datetime import datetime, timedelta
+import bisect
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.models.retention import RingBuffer, RetentionBuffer
+from app.models.notification_service import NotificationService
+from app.models.scheduler import Scheduler, ScheduledTask
+from app.models.journal_backend import JournalBackend
+from app.models.storage_backend import SQLiteBackend
+
+client = TestClient(app)
+
+BASE = datetime(2030, 1, 1, 8, 0, 0)
+
+
+class Item:
+    """Archivable test item."""
+
+    def __init__(self, value: int, group: str = "a"):
+        self.value = value
+        self.group = group
+
+    def to_dict(self):
+        return {"value": self.value, "group": self.group}
+
+
+def login() -> str:
+    """Log in as the default user and return the session ID."""
+    response = client.post("/auth/login", json={"username": "admin", "password": "password123"})
+    return response.json()["session_id"]
+
+
+class TestRingBuffer:
+    """Tests for the fixed-capacity ring buffer."""
+
+    def test_overwrites_oldest(self):
+        """Test that a full buffer returns the item it overwrites."""
+        ring = RingBuffer(3)
+        assert [ring.append(i) for i in range(5)] == [None, None, None, 0, 1]
+        assert list(ring) == [2, 3, 4]
+        assert ring[0] == 2 and ring[-1] == 4
+        assert ring.popleft() == 2
+        assert len(ring) == 2
+
+    def test_slices_across_wrap(self):
+        """Test slicing and bisecting once items wrap around the end."""
+        ring = RingBuffer(5)
+        for i in range(12):
+            ring.append(i * 10)
+        assert ring.slice(1, 4) == [80, 90, 100]
+        assert ring.slice(-3, 99) == [70, 80, 90, 100, 110]
+        assert bisect.bisect_right(ring, 95) == 3
+
+    def test_invalid_capacity(self):
+        """Test that a buffer needs room for one item."""
+        with pytest.raises(ValueError):
+            RingBuffer(0)
+
+
+class TestRetentionBuffer:
+    """Tests for count and age limits and the archive."""
+
+    def test_count_limit_archives_in_batches(self, tmp_path):
+        """Test that items pushed out are written to the archive in batches."""
+        buffer = RetentionBuffer(4, archive=SQLiteBackend(str(tmp_path / "archive.db")), archive_batch=3)
+        for i in range(9):
+            buffer.append(Item(i))
+        assert [item.value for item in buffer.tail(10)] == [5, 6, 7, 8]
+        stats = buffer.stats()
+        assert stats["resident"] == 4 and stats["evicted"] == 5
+        assert stats["archived"] == 3 and stats["archive_pending"] == 2
+
+        first = buffer.read_archive(limit=3)
+        rest = buffer.read_archive(after_id=first[-1][0], limit=3)
+        assert [record["value"] for _, record in first + rest] == [0, 1, 2, 3, 4]
+
+    def test_age_limit(self):
+        """Test that expire() releases items kept longer than the age limit."""
+        buffer = RetentionBuffer(100, max_age=60)
+        for i in range(5):
+            buffer.append(Item(i), BASE + timedelta(seconds=i * 30))
+        expired = buffer.expire(BASE + timedelta(seconds=150))
+        assert [item.value for item in expired] == [0, 1, 2]
+        assert len(buffer) == 2
+        assert buffer.stats()["archive_enabled"] is False
+
+    def test_partitions(self, tmp_path):
+        """Test that each partition is paged on its own."""
+        buffer = RetentionBuffer(1, archive=SQLiteBackend(str(tmp_path / "archive.db")),
+                                 partition=lambda item: item.group, archive_batch=1)
+        for i in range(6):
+            buffer.append(Item(i, "a" if i % 3 else "b"))
+        assert [record["value"] for _, record in buffer.read_archive(partition="a")] == [1, 2, 4]
+        assert [record["value"] for _, record in buffer.read_archive(partition="b")] == [0, 3]
+
+
+class TestNotificationRetention:
+    """Tests for bounded notification history."""
+
+    def test_history_bounded_and_archived(self, tmp_path):
+        """Test that old events leave history but stay readable from the archive."""
+        service = NotificationService(retention=RetentionBuffer(
+            5, archive=SQLiteBackend(str(tmp_path / "archive.db")), archive_batch=2
+        ))
+        for i in range(8):
+            service.send_notification(f"event {i}")
+
+        assert [n["message"] for n in service.get_notifications(10)] == [f"event {i}" for i in range(7, 2, -1)]
+        assert [n["id"] for n in service.events_since(5)] == [6, 7, 8]
+        archived = service.get_archived_notifications()
+        assert [n["message"] for n in archived] == ["event 0", "event 1", "event 2"]
+        assert service.retention_stats()["resident"] == 5
+        assert not hasattr(service, "notifications")
+
+    def test_shared_log_bounded_and_archived(self, tmp_path):
+        """Test that the count and age limits also trim a shared log."""
+        backend = JournalBackend(str(tmp_path / "journal"))
+        service = NotificationService(backend=backend, retention=RetentionBuffer(
+            10, max_age=3600, archive=SQLiteBackend(str(tmp_path / "archive.db")), archive_batch=1
+        ))
+        for i in range(500):
+            service.send_notification(f"event {i}")
+
+        assert backend.log_size("notifications") <= 11
+        assert service.retention_stats()["resident"] == backend.log_size("notifications")
+        assert service.get_notifications(1)[0]["message"] == "event 499"
+        archived = service.get_archived_notifications(limit=500)
+        assert len(archived) + backend.log_size("notifications") == 500
+        assert archived[0]["message"] == "event 0"
+
+        assert service.trim_log(datetime.now() + timedelta(hours=2)) > 0
+        assert backend.log_size("notifications") == 0
+
+
+class TestSchedulerRetention:
+    """Tests for forgetting and archiving executed tasks."""
+
+    def make_scheduler(self, tmp_path, **limits) -> Scheduler:
+        """Scheduler whose executed tasks go to a per-user SQLite archive."""
+        retention = RetentionBuffer(archive=SQLiteBackend(str(tmp_path / "archive.db")), archive_batch=1,
+                                    partition=lambda task: task.user_id, **limits)
+        return Scheduler(retention=retention)
+
+    def test_count_limit(self, tmp_path):
+        """Test that only the newest executed tasks stay listed."""
+        scheduler = self.make_scheduler(tmp_path, max_count=2)
+        for i in range(4):
+            scheduler.schedule_task(ScheduledTask(f"t{i}", "lamp", "turn_on",
+                                                  (BASE + timedelta(minutes=i)).isoformat(), user_id="u1"))
+        scheduler.schedule_task(ScheduledTask("hourly", "lamp", "turn_on", BASE.isoformat(),
+                                              user_id="u1", recurrence="@hourly"))
+        scheduler.schedule_task(ScheduledTask("later", "lamp", "turn_on", (BASE + timedelta(days=1)).isoformat(),
+                                              user_id="u1"))
+
+        due = scheduler.execute_tasks(BASE + timedelta(hours=1))
+        assert len(due) == 5
+        assert [t.task_id for t in scheduler.get_user_tasks("u1")] == ["t2", "t3", "hourly", "later"]
+        assert [t["task_id"] for t in scheduler.get_archived_tasks("u1")] == ["t0", "t1"]
+        assert scheduler.get_archived_tasks("u2") == []
+        stats = scheduler.retention_stats()
+        assert stats["tasks"] == 4 and stats["pending"] == 2 and stats["executed"]["resident"] == 2
+
+    def test_age_limit(self, tmp_path):
+        """Test that executed tasks are forgotten once past the age limit."""
+        scheduler = self.make_scheduler(tmp_path, max_count=100, max_age=3600)
+        scheduler.schedule_task(ScheduledTask("t1", "lamp", "turn_on", BASE.isoformat(), user_id="u1"))
+        scheduler.execute_tasks(BASE)
+        assert scheduler.get_task("t1") is not None
+        scheduler.execute_tasks(BASE + timedelta(hours=2))
+        assert scheduler.get_task("t1") is None
+        assert [t["task_id"] for t in scheduler.get_archived_tasks("u1")] == ["t1"]
+
+
+class TestRetentionEndpoints:
+    """Tests for the retention statistics and archive endpoints."""
+
+    def test_stats(self):
+        """Test that both services report resident sizes to logged-in users."""
+        assert client.get("/schedule/retention", params={"session_id": "bogus"}).status_code == 401
+        assert client.get("/notifications/retention", params={"session_id": "bogus"}).status_code == 401
+        session_id = login()
+        schedule = client.get("/schedule/retention", params={"session_id": session_id}).json()
+        assert {"tasks", "pending", "executed"} <= schedule.keys()
+        assert schedule["executed"]["max_count"] > 0
+        notifications = client.get("/notifications/retention", params={"session_id": session_id}).json()
+        assert notifications["resident"] <= notifications["max_count"]
+
+    def test_archive_requires_session(self):
+        """Test that archives are paged for logged-in users only."""
+        assert client.get("/schedule/archive", params={"session_id": "bogus"}).status_code == 401
+        session_id = login()
+        assert client.get("/schedule/archive", params={"session_id": session_id}).json() == []
+        response = client.get("/notifications/archive", params={"session_id": session_id, "limit": 5})
+        assert response.status_code == 200
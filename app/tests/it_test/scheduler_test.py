@@ -0,0 +1,441 @@
+"""
+Integration tests for the scheduler's deadline queue and task executor.
+"""
+from datetime import datetime, timedelta, timezone
+import asyncio
+import random
+import time
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.api.storage import dashboards_db, scheduler as app_scheduler
+from app.models.scheduler import HeapTaskQueue, TimingWheelTaskQueue, Scheduler, ScheduledTask, parse_task_time
+from app.models.task_executor import TaskExecutor
+from app.models.recurrence import CronRule
+
+BASE = datetime(2030, 1, 1, 8, 0, 0)
+
+
+def make_task(task_id: str, minutes: int) -> ScheduledTask:
+    """Build a task due some minutes after BASE."""
+    return ScheduledTask(task_id, "light1", "turn_on", (BASE + timedelta(minutes=minutes)).isoformat())
+
+
+class TestParseTaskTime:
+    """Tests for deadline parsing."""
+
+    def test_parses_once_on_creation(self):
+        """Test that tasks carry their parsed deadline."""
+        assert make_task("t1", 5).due_at == BASE + timedelta(minutes=5)
+        assert ScheduledTask("t2", "light1", "turn_on", "tomorrow").due_at is None
+
+    def test_offset_converted_to_local(self):
+        """Test that aware times become naive local times."""
+        aware = datetime(2030, 1, 1, 8, 0, tzinfo=timezone.utc)
+        assert parse_task_time(aware.isoformat()) == aware.astimezone().replace(tzinfo=None)
+
+
+class TestHeapTaskQueue:
+    """Tests for the min-heap queue."""
+
+    def test_pops_due_in_deadline_order(self):
+        """Test that only due tasks come out, earliest first."""
+        queue = HeapTaskQueue()
+        for task_id, minutes in (("c", 30), ("a", 10), ("b", 20), ("d", 40)):
+            queue.push(make_task(task_id, minutes))
+        due = queue.pop_due(BASE + timedelta(minutes=25))
+        assert [task.task_id for task in due] == ["a", "b"]
+        assert len(queue) == 2
+        assert queue.next_due() == BASE + timedelta(minutes=30)
+
+    def test_lazy_cancel(self):
+        """Test that discarded tasks are skipped and compacted away."""
+        queue = HeapTaskQueue()
+        for i in range(1000):
+            queue.push(make_task(f"t{i}", i))
+        for i in range(0, 1000, 2):
+            assert queue.discard(f"t{i}")
+        assert not queue.discard("t0")
+        assert len(queue) == 500
+        assert queue.next_due() == BASE + timedelta(minutes=1)
+        due = queue.pop_due(BASE + timedelta(minutes=9))
+        assert [task.task_id for task in due] == ["t1", "t3", "t5", "t7", "t9"]
+
+
+class TestTimingWheelTaskQueue:
+    """Tests for the hierarchical timing wheel."""
+
+    def test_matches_heap(self):
+        """Test random schedules, cancels and expiries against the heap."""
+        rng = random.Random(3)
+        # A tiny wheel so cascades and the overflow heap get exercised
+        wheel = TimingWheelTaskQueue(tick=1.0, slot_bits=2, levels=2, now=BASE)
+        heap = HeapTaskQueue()
+        now = BASE
+        queued = []
+        for step in range(3000):
+            choice = rng.random()
+            if choice < 0.5:
+                seconds = rng.choice([rng.uniform(-5, 5), rng.uniform(0, 40), rng.uniform(0, 5000)])
+                task = ScheduledTask(f"t{step}", "light1", "turn_on", (now + timedelta(seconds=seconds)).isoformat())
+                wheel.push(task)
+                heap.push(task)
+                queued.append(task.task_id)
+            elif choice < 0.65 and queued:
+                task_id = queued.pop(rng.randrange(len(queued)))
+                assert wheel.discard(task_id) == heap.discard(task_id)
+            else:
+                now += timedelta(seconds=rng.choice([0.3, 1, 7, 90, 3000]))
+                expected = heap.pop_due(now)
+                assert [t.task_id for t in wheel.pop_due(now)] == [t.task_id for t in expected]
+            assert len(wheel) == len(heap)
+            assert wheel.next_due() == heap.next_due()
+
+    def test_not_early_within_tick(self):
+        """Test that a task is not popped before its time inside a tick."""
+        wheel = TimingWheelTaskQueue(tick=60.0, now=BASE)
+        wheel.push(make_task("t1", 0))
+        task = ScheduledTask("t2", "light1", "turn_on", (BASE + timedelta(seconds=30)).isoformat())
+        wheel.push(task)
+        assert [t.task_id for t in wheel.pop_due(BASE + timedelta(seconds=10))] == ["t1"]
+        assert wheel.next_due() == task.due_at
+        assert [t.task_id for t in wheel.pop_due(BASE + timedelta(seconds=30))] == ["t2"]
+
+    def test_scheduler_selects_queue(self):
+        """Test that the scheduler runs on either queue."""
+        for queue in ("heap", "wheel"):
+            scheduler = Scheduler(queue=queue)
+            scheduler.schedule_task(make_task("t1", 1))
+            scheduler.schedule_task(make_task("t2", 2))
+            scheduler.cancel_task("t2")
+            assert [t.task_id for t in scheduler.execute_tasks(BASE + timedelta(days=1))] == ["t1"]
+        with pytest.raises(ValueError):
+            Scheduler(queue="list")
+
+
+class TestScheduler:
+    """Tests for scheduling, cancelling and executing tasks."""
+
+    def test_execute_due_tasks_once(self):
+        """Test that tasks run once, when due, and stay listed."""
+        scheduler = Scheduler()
+        scheduler.schedule_task(make_task("later", 60))
+        scheduler.schedule_task(make_task("soon", 1))
+        scheduler.schedule_task(ScheduledTask("bad", "light1", "turn_on", "not a time"))
+        version = scheduler.version
+
+        assert [t.task_id for t in scheduler.execute_tasks(BASE + timedelta(minutes=5))] == ["soon"]
+        assert scheduler.get_task("soon").executed
+        assert scheduler.version > version
+        assert scheduler.execute_tasks(BASE + timedelta(minutes=5)) == []
+        assert scheduler.pending_count() == 1
+        assert [t.task_id for t in scheduler.get_tasks()] == ["later", "soon", "bad"]
+
+    def test_cancel(self):
+        """Test that a cancelled task never runs."""
+        scheduler = Scheduler()
+        scheduler.schedule_task(make_task("t1", 1))
+        assert scheduler.cancel_task("t1")
+        assert not scheduler.cancel_task("t1")
+        assert scheduler.execute_tasks(BASE + timedelta(days=1)) == []
+        assert scheduler.next_due() is None
+
+
+class TestDeviceTaskIndex:
+    """Tests for per-device task lookup, paging and cancellation."""
+
+    def make_scheduler(self) -> Scheduler:
+        """Scheduler with tasks spread over two devices and two users."""
+        scheduler = Scheduler()
+        for i in range(10):
+            scheduler.schedule_task(ScheduledTask(f"a{i}", "lamp", "turn_on", "2030-01-01T08:00:00", user_id="u1"))
+            scheduler.schedule_task(ScheduledTask(f"b{i}", "fan", "turn_on", "2030-01-01T08:00:00", user_id="u1"))
+        scheduler.schedule_task(ScheduledTask("other", "lamp", "turn_on", "2030-01-01T08:00:00", user_id="u2"))
+        return scheduler
+
+    def test_pages_device_tasks(self):
+        """Test that paging visits one device's tasks once, in order."""
+        scheduler = self.make_scheduler()
+        scheduler.cancel_task("a3")
+        seen, cursor = [], 0
+        while cursor is not None:
+            page, cursor = scheduler.get_device_tasks("lamp", "u1", after=cursor, limit=4)
+            assert len(page) <= 4
+            seen.extend(task.task_id for task in page)
+        assert seen == [f"a{i}" for i in range(10) if i != 3]
+        assert [t.task_id for t in scheduler.get_device_tasks("lamp", "u2")[0]] == ["other"]
+
+    def test_cancel_device_tasks(self):
+        """Test that cancelling a device's tasks leaves the rest."""
+        scheduler = self.make_scheduler()
+        assert scheduler.cancel_device_tasks("lamp", "u1") == 10
+        assert scheduler.cancel_device_tasks("lamp", "u1") == 0
+        assert scheduler.get_task("a0") is None
+        assert scheduler.get_task("other") is not None
+        assert scheduler.pending_count() == 11
+        assert len(scheduler.execute_tasks(BASE)) == 11
+
+    def test_delete_device_cancels_tasks(self):
+        """Test that removing a device through the API cancels its tasks."""
+        client = TestClient(app)
+        session_id = client.post("/auth/login", json={"username": "admin", "password": "password123"}).json()["session_id"]
+        params = {"session_id": session_id}
+        device = client.post("/devices", params=params, json={"device_type": "light", "device_name": "Temp"}).json()
+        for hour in (8, 9, 10):
+            client.post("/schedule", params=params, json={
+                "device_id": device["device_id"], "action": "turn_on", "scheduled_time": f"2030-01-01T{hour:02d}:00:00"
+            })
+
+        first = client.get(f"/schedule/devices/{device['device_id']}", params={**params, "limit": 2})
+        assert len(first.json()) == 2
+        rest = client.get(f"/schedule/devices/{device['device_id']}",
+                          params={**params, "limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+        assert len(rest.json()) == 1 and "X-Next-Cursor" not in rest.headers
+
+        response = client.delete(f"/devices/{device['device_id']}", params=params)
+        assert response.json()["cancelled_tasks"] == 3
+        assert client.get(f"/schedule/devices/{device['device_id']}", params=params).json() == []
+
+
+class TestSchedulerShards:
+    """Tests for per-user scheduler shards."""
+
+    def test_execute_merges_shards(self):
+        """Test that due tasks of all users run together, earliest first."""
+        scheduler = Scheduler()
+        for i, user_id in enumerate(["u1", "u2", "u3"]):
+            for minutes in (i + 1, i + 10):
+                scheduler.schedule_task(ScheduledTask(f"{user_id}-{minutes}", "lamp", "turn_on",
+                                                      (BASE + timedelta(minutes=minutes)).isoformat(), user_id=user_id))
+        assert scheduler.next_due() == BASE + timedelta(minutes=1)
+
+        due = scheduler.execute_tasks(BASE + timedelta(minutes=10))
+        assert [t.task_id for t in due] == ["u1-1", "u2-2", "u3-3", "u1-10"]
+        assert scheduler.next_due() == BASE + timedelta(minutes=11)
+        assert [t.task_id for t in scheduler.get_user_tasks("u2")] == ["u2-2", "u2-11"]
+        assert scheduler.get_user_tasks("nobody") == []
+
+    def test_cancel_head_moves_next_due(self):
+        """Test that cancelling a shard's earliest task exposes the next one."""
+        scheduler = Scheduler()
+        scheduler.schedule_task(ScheduledTask("first", "lamp", "turn_on", BASE.isoformat(), user_id="u1"))
+        scheduler.schedule_task(make_task("second", 5))
+        assert scheduler.next_due() == BASE
+        scheduler.cancel_task("first")
+        assert scheduler.next_due() == BASE + timedelta(minutes=5)
+        assert scheduler.execute_tasks(BASE + timedelta(minutes=1)) == []
+
+    def test_user_version_only_tracks_own_tasks(self):
+        """Test that one user's changes leave another user's version alone."""
+        scheduler = Scheduler()
+        scheduler.schedule_task(ScheduledTask("t1", "lamp", "turn_on", BASE.isoformat(), user_id="u1"))
+        version = scheduler.user_version("u1")
+        scheduler.schedule_task(ScheduledTask("t2", "lamp", "turn_on", BASE.isoformat(), user_id="u2"))
+        assert scheduler.user_version("u1") == version
+        scheduler.execute_tasks(BASE)
+        assert scheduler.user_version("u1") > version
+
+    def test_matches_single_queue(self):
+        """Test that sharded extraction matches one global heap."""
+        rng = random.Random(23)
+        scheduler, heap = Scheduler(), HeapTaskQueue()
+        for i in range(2000):
+            task = ScheduledTask(f"t{i}", "lamp", "turn_on",
+                                 (BASE + timedelta(seconds=rng.randrange(3600))).isoformat(),
+                                 user_id=f"u{rng.randrange(50)}")
+            scheduler.schedule_task(task)
+            heap.push(task)
+            if rng.random() < 0.3:
+                victim = f"t{rng.randrange(i + 1)}"
+                scheduler.cancel_task(victim)
+                heap.discard(victim)
+        for minutes in range(0, 70, 7):
+            now = BASE + timedelta(minutes=minutes)
+            expected = sorted(t.task_id for t in heap.pop_due(now))
+            assert sorted(t.task_id for t in scheduler.execute_tasks(now)) == expected
+            assert scheduler.next_due() == heap.next_due()
+
+    def test_endpoints_only_see_own_tasks(self):
+        """Test that GET /schedule lists, and DELETE cancels, only the caller's tasks."""
+        client = TestClient(app)
+        session_id = client.post("/auth/login", json={"username": "admin", "password": "password123"}).json()["session_id"]
+        app_scheduler.schedule_task(ScheduledTask("someone-elses", "lamp", "turn_on", BASE.isoformat(), user_id="other-user"))
+        try:
+            response = client.get("/schedule", params={"session_id": session_id})
+            assert "someone-elses" not in [task["task_id"] for task in response.json()]
+            response = client.delete("/schedule/someone-elses", params={"session_id": session_id})
+            assert response.status_code == 404
+            assert app_scheduler.get_task("someone-elses") is not None
+        finally:
+            app_scheduler.cancel_task("someone-elses")
+
+
+class TestRecurrence:
+    """Tests for cron rules and recurring tasks."""
+
+    def test_next_after(self):
+        """Test common expressions from a Friday evening."""
+        friday = datetime(2030, 1, 4, 18, 30)
+        assert CronRule("0 7 * * 1-5").next_after(friday) == datetime(2030, 1, 7, 7, 0)
+        assert CronRule("*/15 * * * *").next_after(friday) == datetime(2030, 1, 4, 18, 45)
+        assert CronRule("@daily").next_after(friday) == datetime(2030, 1, 5, 0, 0)
+        assert CronRule("30 18 * * *").next_after(friday) == datetime(2030, 1, 5, 18, 30)
+        assert CronRule("30 18 * * *").next_after(friday, inclusive=True) == friday
+        assert CronRule("0 0 29 2 *").next_after(friday) == datetime(2032, 2, 29, 0, 0)
+        assert CronRule("0 0 30 2 *").next_after(friday) is None
+
+    def test_day_fields_match_either(self):
+        """Test cron's rule that restricted day fields are ORed."""
+        rule = CronRule("0 12 1 * 0")
+        assert rule.next_after(datetime(2030, 1, 1, 13, 0)) == datetime(2030, 1, 6, 12, 0)
+        assert rule.next_after(datetime(2030, 1, 27, 13, 0)) == datetime(2030, 2, 1, 12, 0)
+
+    def test_invalid(self):
+        """Test that malformed expressions are rejected."""
+        for expression in ("* * * *", "60 * * * *", "*/0 * * * *", "a * * * *", "5-1 * * * *"):
+            with pytest.raises(ValueError):
+                CronRule(expression)
+
+    def test_recurring_task_requeued(self):
+        """Test that one stored task fires on each occurrence."""
+        scheduler = Scheduler()
+        task = ScheduledTask("r1", "light1", "turn_on", "2030-01-04T00:00:00", recurrence="0 7 * * 1-5")
+        assert task.due_at == datetime(2030, 1, 4, 7, 0)
+        scheduler.schedule_task(task)
+
+        assert scheduler.execute_tasks(datetime(2030, 1, 4, 7, 0, 5)) == [task]
+        assert task.last_due_at == datetime(2030, 1, 4, 7, 0)
+        assert not task.executed
+        assert task.scheduled_time == "2030-01-07T07:00:00"
+        # Missed occurrences run once, then it moves past now
+        assert scheduler.execute_tasks(datetime(2030, 1, 10, 9, 0)) == [task]
+        assert scheduler.next_due() == datetime(2030, 1, 11, 7, 0)
+        assert len(scheduler.get_tasks()) == 1
+
+        restored = ScheduledTask.from_dict(task.to_dict())
+        assert restored.due_at == task.due_at and restored.last_due_at == task.last_due_at
+
+    def test_endpoint_rejects_bad_rule(self):
+        """Test that an invalid or never matching recurrence is a 400."""
+        client = TestClient(app)
+        session_id = client.post("/auth/login", json={"username": "admin", "password": "password123"}).json()["session_id"]
+        response = client.post(
+            "/schedule",
+            params={"session_id": session_id},
+            json={"device_id": "light1", "action": "turn_on", "scheduled_time": "2030-01-01T08:00:00",
+                  "recurrence": "every day"}
+        )
+        assert response.status_code == 400
+        never = client.post(
+            "/schedule",
+            params={"session_id": session_id},
+            json={"device_id": "light1", "action": "turn_on", "scheduled_time": "2030-01-01T08:00:00",
+                  "recurrence": "0 0 30 2 *"}
+        )
+        assert never.status_code == 400
+        assert "no occurrence" in never.json()["detail"]
+        ok = client.post(
+            "/schedule",
+            params={"session_id": session_id},
+            json={"device_id": "light1", "action": "turn_on", "scheduled_time": "2030-01-01T00:00:00",
+                  "recurrence": "0 7 * * 1-5"}
+        )
+        assert ok.json()["recurrence"] == "0 7 * * 1-5"
+        assert ok.json()["scheduled_time"] == "2030-01-01T07:00:00"
+        client.delete(f"/schedule/{ok.json()['task_id']}", params={"session_id": session_id})
+
+
+class TestTaskExecutor:
+    """Tests for running due tasks."""
+
+    def test_run_due_records_lateness(self):
+        """Test dispatch results and lateness against a fixed clock."""
+        scheduler = Scheduler()
+        scheduler.schedule_task(make_task("ok", 0))
+        scheduler.schedule_task(make_task("bad", 1))
+        scheduler.schedule_task(make_task("later", 10))
+        executor = TaskExecutor(scheduler, lambda task: task.task_id == "ok",
+                                clock=lambda: BASE + timedelta(minutes=2))
+
+        assert [t.task_id for t in executor.run_due()] == ["ok", "bad"]
+        stats = executor.stats()
+        assert stats["executed"] == 1 and stats["failed"] == 1
+        assert stats["max_lateness_seconds"] == 120.0
+        assert stats["mean_lateness_seconds"] == 90.0
+        assert stats["pending"] == 1
+
+    def test_wakes_early_for_earlier_task(self):
+        """Test that scheduling a task interrupts a long sleep."""
+        scheduler = Scheduler()
+        ran = []
+
+        async def scenario() -> float:
+            executor = TaskExecutor(scheduler, lambda task: ran.append(task.task_id) or True, max_sleep=60)
+            executor.start()
+            await asyncio.sleep(0.05)
+            due = datetime.now() + timedelta(milliseconds=100)
+            scheduler.schedule_task(ScheduledTask("soon", "light1", "turn_on", due.isoformat()))
+            started = time.perf_counter()
+            while not ran and time.perf_counter() - started < 5:
+                await asyncio.sleep(0.01)
+            await executor.stop()
+            return time.perf_counter() - started
+
+        assert asyncio.run(scenario()) < 2
+        assert ran == ["soon"]
+
+    def test_executes_against_device(self):
+        """Test that the app's executor applies a due task to the device."""
+        with TestClient(app) as client:
+            session_id = client.post("/auth/login", json={"username": "admin", "password": "password123"}).json()["session_id"]
+            light = dashboards_db["user1"].get_device("light1")
+            light.turn_on()
+
+            response = client.post(
+                "/schedule",
+                params={"session_id": session_id},
+                json={"device_id": "light1", "action": "set_brightness", "brightness": 17,
+                      "scheduled_time": datetime.now().isoformat()}
+            )
+            assert response.status_code == 200
+            assert response.json()["brightness"] == 17
+            task_id = response.json()["task_id"]
+
+            deadline = time.time() + 5
+            while light.brightness != 17 and time.time() < deadline:
+                time.sleep(0.02)
+            assert light.brightness == 17
+
+            tasks = client.get("/schedule", params={"session_id": session_id}).json()
+            assert next(t for t in tasks if t["task_id"] == task_id)["executed"]
+            assert client.get("/schedule/executor/stats", params={"session_id": "bogus"}).status_code == 401
+            stats = client.get("/schedule/executor/stats", params={"session_id": session_id}).json()
+            assert stats["running"] and stats["executed"] >= 1
+
+    def test_set_brightness_requires_level(self):
+        """Test that a brightness task must carry a level."""
+        client = TestClient(app)
+        session_id = client.post("/auth/login", json={"username": "admin", "password": "password123"}).json()["session_id"]
+        response = client.post(
+            "/schedule",
+            params={"session_id": session_id},
+            json={"device_id": "light1", "action": "set_brightness", "scheduled_time": "2030-01-01T08:00:00"}
+        )
+        assert response.status_code == 400
+
+    def test_action_checked_when_scheduled(self):
+        """Test that an action the executor could not run is rejected up front."""
+        client = TestClient(app)
+        session_id = client.post("/auth/login", json={"username": "admin", "password": "password123"}).json()["session_id"]
+        thermostat = client.post("/devices", params={"session_id": session_id},
+                                 json={"device_type": "thermostat", "device_name": "Hall"}).json()
+        for device_id, action, detail in (("light1", "explode", "Unknown action: explode"),
+                                          (thermostat["device_id"], "toggle", "Device is not a light")):
+            response = client.post(
+                "/schedule",
+                params={"session_id": session_id},
+                json={"device_id": device_id, "action": action, "scheduled_time": "2030-01-01T08:00:00"}
+            )
+            assert response.status_code == 400
+            assert response.json()["detail"] == detail
+        client.delete(f"/devices/{thermostat['device_id']}", params={"session_id": session_id})
@@ -0,0 +1,287 @@
+"""
+Integration tests for shared storage backends.
+"""
+import time
+from app.models.dashboard_repository import DashboardRepository
+from app.models.dashboard import Dashboard
+from app.models.journal_backend import JournalBackend
+from app.models.device import Light
+from app.models.device_factory import DeviceFactory
+from app.models.notification_service import NotificationService
+from app.models.storage_backend import CachedBackend, SQLiteBackend, MemoryBackend
+from app.models.write_behind import WriteBehindWriter
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def login() -> str:
+    """Log in with the default credentials and return the session ID."""
+    response = client.post("/auth/login", json={"username": "admin", "password": "password123"})
+    return response.json()["session_id"]
+
+
+def open_worker(path) -> CachedBackend:
+    """Open the database the way a separate worker process would."""
+    return CachedBackend(SQLiteBackend(str(path)))
+
+
+class TestSQLiteBackend:
+    """Tests for the SQLite WAL backend and its read cache."""
+
+    def test_records_and_versions(self, tmp_path):
+        """Test basic reads and writes and version bumps."""
+        backend = SQLiteBackend(str(tmp_path / "state.db"))
+        assert backend.version("ns") == 0
+        assert backend.put("ns", "a", {"x": 1}) == 1
+        assert backend.put_many("ns", {"b": {"x": 2}, "c": {"x": 3}}) == 2
+        assert backend.get("ns", "a") == {"x": 1}
+        assert backend.delete("ns", "a") == 3
+        assert set(backend.items("ns")) == {"b", "c"}
+
+    def test_cache_sees_other_process_writes(self, tmp_path):
+        """Test that a cached reader picks up writes from another connection."""
+        worker_a = open_worker(tmp_path / "state.db")
+        worker_b = open_worker(tmp_path / "state.db")
+        worker_a.put("ns", "k", {"v": 1})
+        assert worker_b.get("ns", "k") == {"v": 1}
+
+        worker_a.put("ns", "k", {"v": 2})
+        assert worker_b.get("ns", "k") == {"v": 2}
+
+        hits = worker_b.hits
+        worker_b.get("ns", "k")
+        assert worker_b.hits == hits + 1
+
+    def test_log_tail(self, tmp_path):
+        """Test that appended log records come back newest last."""
+        backend = open_worker(tmp_path / "state.db")
+        for i in range(5):
+            backend.append("events", {"i": i})
+        assert [record["i"] for _, record in backend.tail("events", 3)] == [2, 3, 4]
+
+    def test_log_read_after(self, tmp_path):
+        """Test reading a log forward from a sequence ID on every backend."""
+        backends = [MemoryBackend(), open_worker(tmp_path / "state.db"), JournalBackend(str(tmp_path / "journal"))]
+        for backend in backends:
+            ids = [backend.append("events", {"i": i}) for i in range(5)]
+            after = backend.read_after("events", ids[1], 2)
+            assert [(log_id, record["i"]) for log_id, record in after] == [(ids[2], 2), (ids[3], 3)]
+            assert backend.read_after("events", ids[-1], 10) == []
+            backend.close()
+
+    def test_log_trim(self, tmp_path):
+        """Test that trimming removes and returns the oldest records once."""
+        backends = [MemoryBackend(), open_worker(tmp_path / "state.db"), JournalBackend(str(tmp_path / "journal"))]
+        for backend in backends:
+            ids = [backend.append("events", {"i": i}) for i in range(5)]
+            removed = backend.trim("events", ids[2])
+            assert [record["i"] for _, record in removed] == [0, 1, 2]
+            assert backend.trim("events", ids[2]) == []
+            assert backend.log_size("events") == 2
+            assert [record["i"] for _, record in backend.read_after("events", 0, 10)] == [3, 4]
+            backend.close()
+
+        recovered = JournalBackend(str(tmp_path / "journal"))
+        assert [record["i"] for _, record in recovered.tail("events", 10)] == [3, 4]
+
+
+class TestDashboardRepository:
+    """Tests for dashboards stored in a shared backend."""
+
+    def test_device_changes_visible_to_other_worker(self, tmp_path):
+        """Test that a brightness change in one worker is seen by another."""
+        factory = DeviceFactory.get_instance()
+        repo_a = DashboardRepository(open_worker(tmp_path / "state.db"), factory)
+        repo_b = DashboardRepository(open_worker(tmp_path / "state.db"), factory)
+
+        repo_a["u1"] = Dashboard("u1")
+        repo_a["u1"].add_device(Light("l1", "Lamp"))
+        repo_a.flush()
+        assert repo_b.get("u1").get_device("l1").brightness == 0
+
+        repo_a["u1"].get_device("l1").set_brightness(40)
+        repo_a.flush()
+        light = repo_b.get("u1").get_device("l1")
+        assert light.brightness == 40
+        assert light.is_on is True
+
+        repo_b["u1"].remove_device("l1")
+        repo_b.flush()
+        assert repo_a.get("u1").get_device_count() == 0
+
+    def test_unflushed_changes_kept_locally(self, tmp_path):
+        """Test that pending local changes are not replaced by a reload."""
+        factory = DeviceFactory.get_instance()
+        repo_a = DashboardRepository(open_worker(tmp_path / "state.db"), factory)
+        repo_b = DashboardRepository(open_worker(tmp_path / "state.db"), factory)
+        repo_a["u1"] = Dashboard("u1")
+        repo_a["u1"].add_device(Light("l1", "Lamp"))
+        repo_a["u1"].add_device(Light("l2", "Lamp"))
+        repo_a.flush()
+
+        repo_b["u1"].get_device("l2").set_brightness(10)
+        repo_b.flush()
+        repo_a["u1"].get_device("l1").set_brightness(70)
+        assert repo_a["u1"].get_device("l1").brightness == 70
+
+        repo_a.flush()
+        dashboard = repo_b["u1"]
+        assert dashboard.get_device("l1").brightness == 70
+        assert dashboard.get_device("l2").brightness == 10
+
+    def test_missing_dashboard(self):
+        """Test that unknown users have no dashboard."""
+        repo = DashboardRepository(MemoryBackend(), DeviceFactory.get_instance())
+        assert repo.get("nobody") is None
+        assert "nobody" not in repo
+
+    def test_cached_object_reused(self):
+        """Test that unchanged dashboards are not rebuilt."""
+        repo = DashboardRepository(MemoryBackend(), DeviceFactory.get_instance())
+        repo["u1"] = Dashboard("u1")
+        dashboard = repo.get("u1")
+        dashboard.add_device(Light("l1", "Lamp"))
+        assert repo.get("u1") is dashboard
+
+
+class TestSharedNotifications:
+    """Tests for notification history in a shared backend."""
+
+    def test_history_shared(self, tmp_path):
+        """Test that notifications sent by one worker are listed by another."""
+        service_a = NotificationService(backend=open_worker(tmp_path / "state.db"))
+        service_b = NotificationService(backend=open_worker(tmp_path / "state.db"))
+        service_a.send_notification("first", "d1", "test")
+        service_a.send_notification("second", "d1", "test")
+        messages = [n["message"] for n in service_b.get_notifications(10)]
+        assert messages == ["second", "first"]
+
+
+class TestWriteBehindWriter:
+    """Tests for batched write-behind flushing."""
+
+    def test_changes_coalesced_into_one_flush(self):
+        """Test that repeated changes to a device are written once."""
+        backend = MemoryBackend()
+        writer = WriteBehindWriter(backend, max_batch=100)
+        light = Light("l1", "Lamp")
+        for level in (10, 20, 30):
+            light.set_brightness(level)
+            writer.mark_dirty("ns", "l1", light)
+        assert backend.get("ns", "l1") is None
+
+        assert writer.flush() == 1
+        assert backend.get("ns", "l1")["brightness"] == 30
+        assert writer.stats()["flush_count"] == 1
+        assert writer.flush() == 0
+
+    def test_size_trigger(self):
+        """Test that reaching max_batch flushes without the background thread."""
+        backend = MemoryBackend()
+        writer = WriteBehindWriter(backend, max_batch=3)
+        for i in range(3):
+            writer.mark_dirty("ns", f"l{i}", Light(f"l{i}", "Lamp"))
+        assert len(backend.items("ns")) == 3
+        assert writer.pending_count() == 0
+
+    def test_deletes_and_stop_flushes(self):
+        """Test that stop() writes out pending deletions."""
+        backend = MemoryBackend()
+        backend.put("ns", "l1", {"device_id": "l1"})
+        writer = WriteBehindWriter(backend, flush_interval=60)
+        writer.start()
+        writer.mark_deleted("ns", "l1")
+        writer.stop()
+        assert backend.get("ns", "l1") is None
+
+    def test_background_flush(self):
+        """Test that the flusher thread writes on its interval."""
+        backend = MemoryBackend()
+        writer = WriteBehindWriter(backend, flush_interval=0.01)
+        writer.start()
+        try:
+            writer.mark_dirty("ns", "l1", Light("l1", "Lamp"))
+            deadline = time.monotonic() + 2
+            while backend.get("ns", "l1") is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert backend.get("ns", "l1") is not None
+        finally:
+            writer.stop()
+
+    def test_stats_endpoint(self):
+        """Test GET /devices/persistence/stats."""
+        assert client.get("/devices/persistence/stats", params={"session_id": "bogus"}).status_code == 401
+        response = client.get("/devices/persistence/stats", params={"session_id": login()})
+        assert response.status_code == 200
+        assert "flush_count" in response.json()
+        assert "avg_flush_ms" in response.json()
+
+
+class TestDashboardResidency:
+    """Tests for lazy loading and LRU eviction of dashboards."""
+
+    def make_repo(self, **budgets) -> DashboardRepository:
+        repo = DashboardRepository(MemoryBackend(), DeviceFactory.get_instance(), **budgets)
+        for i in range(3):
+            repo[f"u{i}"] = Dashboard(f"u{i}")
+            repo[f"u{i}"].add_device(Light(f"l{i}", "Lamp"))
+        return repo
+
+    def test_count_budget_evicts_least_recently_used(self):
+        """Test that the least recently used dashboard is evicted first."""
+        repo = self.make_repo(max_dashboards=2)
+        assert repo.stats()["resident_dashboards"] == 2
+        assert repo.stats()["evictions"] == 1
+
+        repo.get("u1")
+        repo.get("u0")
+        stats = repo.stats()
+        assert stats["misses"] == 1
+        assert stats["evictions"] == 2
+        assert "u2" not in repo._cache
+
+    def test_dirty_dashboard_written_back_before_eviction(self):
+        """Test that unflushed changes survive eviction and reload."""
+        repo = self.make_repo(max_dashboards=1)
+        repo["u2"].get_device("l2").set_brightness(35)
+        repo.get("u0")
+        assert repo["u2"].get_device("l2").brightness == 35
+
+    def test_writes_through_evicted_object_not_lost(self):
+        """Test that changes made through a dashboard held past eviction show up."""
+        repo = self.make_repo(max_dashboards=1)
+        held = repo["u2"]
+        repo.get("u0")
+        held.get_device("l2").set_brightness(35)
+        reloaded = repo["u2"]
+        assert reloaded is not held
+        assert reloaded.get_device("l2").brightness == 35
+
+        held.get_device("l2").set_brightness(60)
+        repo.writer.flush()
+        assert repo["u2"].get_device("l2").brightness == 60
+
+    def test_device_budget(self):
+        """Test that the resident device budget limits residency."""
+        repo = self.make_repo(max_devices=2)
+        assert repo.stats()["resident_devices"] <= 2
+        assert repo.get("u0").get_device("l0") is not None
+
+    def test_contains_does_not_load(self):
+        """Test that membership checks do not make dashboards resident."""
+        repo = self.make_repo(max_dashboards=1)
+        misses = repo.stats()["misses"]
+        assert "u0" in repo
+        assert "missing" not in repo
+        assert repo.stats()["misses"] == misses
+
+    def test_cache_stats_endpoint(self):
+        """Test GET /devices/cache/stats."""
+        assert client.get("/devices/cache/stats", params={"session_id": "bogus"}).status_code == 401
+        response = client.get("/devices/cache/stats", params={"session_id": login()})
+        assert response.status_code == 200
+        assert set(response.json()) == {
+            "hits", "misses", "evictions", "resident_dashboards", "resident_devices"
+        }
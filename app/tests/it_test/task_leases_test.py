@@ -0,0 +1,172 @@
+"""
+Integration tests for leasing scheduled task occurrences across processes.
+"""
+from datetime import datetime, timedelta
+import multiprocessing
+import os
+import time
+from fastapi.testclient import TestClient
+from main import app
+from app.models.scheduler import Scheduler, ScheduledTask
+from app.models.task_executor import TaskExecutor
+from app.models.task_leases import TaskLeaseCoordinator
+
+client = TestClient(app)
+
+BASE = datetime(2030, 1, 1, 8, 0, 0)
+
+
+class FakeClock:
+    """Wall clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_task(task_id: str, minutes: int = 0, **kwargs) -> ScheduledTask:
+    """Build a task due some minutes after BASE."""
+    return ScheduledTask(task_id, "lamp", "turn_on", (BASE + timedelta(minutes=minutes)).isoformat(),
+                         user_id="u1", **kwargs)
+
+
+def run_worker(path: str, results, crash: bool) -> None:
+    """Claim and complete occurrences until none are left, reporting what ran."""
+    coordinator = TaskLeaseCoordinator(path, lease_seconds=0.5, batch_size=20)
+    ran = []
+    while True:
+        leases = coordinator.claim(BASE)
+        if crash and leases:
+            # Dies holding its leases, before running anything
+            os._exit(0)
+        if not leases:
+            if coordinator.next_due() is None and coordinator.stats()["leased"] == 0:
+                break
+            time.sleep(0.05)
+            continue
+        held = [lease for lease in leases if coordinator.holds(lease)]
+        ran.extend(lease.task.task_id for lease in held)
+        coordinator.complete(held, BASE)
+        coordinator.release(leases[len(held):])
+    results.put(ran)
+
+
+class TestTaskLeaseCoordinator:
+    """Tests for offering, claiming and completing occurrences."""
+
+    def test_offers_collapse_and_claims_exclude(self, tmp_path):
+        """Test that one occurrence offered twice is claimed by one worker."""
+        path = str(tmp_path / "leases.db")
+        first = TaskLeaseCoordinator(path, worker_id="a")
+        second = TaskLeaseCoordinator(path, worker_id="b")
+        assert first.offer_many([make_task("t1"), make_task("later", 60)]) == 2
+        assert second.offer_many([make_task("t1")]) == 0
+
+        leases = first.claim(BASE)
+        assert [lease.task.task_id for lease in leases] == ["t1"]
+        assert leases[0].task.last_due_at == BASE
+        assert second.claim(BASE) == []
+        assert first.complete(leases, BASE) == 1
+        assert second.claim(BASE) == []
+        assert second.next_due() == BASE + timedelta(minutes=60)
+
+    def test_expired_lease_reclaimed(self, tmp_path):
+        """Test that a stalled worker's occurrence goes to another worker once."""
+        clock = FakeClock()
+        path = str(tmp_path / "leases.db")
+        stalled = TaskLeaseCoordinator(path, worker_id="a", lease_seconds=10, clock=clock)
+        healthy = TaskLeaseCoordinator(path, worker_id="b", lease_seconds=10, clock=clock)
+        stalled.offer(make_task("t1"))
+        stale = stalled.claim(BASE)
+
+        clock.now += 5
+        assert healthy.claim(BASE) == []
+        clock.now += 10
+        fresh = healthy.claim(BASE)
+        assert len(fresh) == 1 and healthy.reclaimed == 1
+        assert not stalled.holds(stale[0])
+        assert stalled.complete(stale, BASE) == 0 and stalled.lost == 1
+        assert healthy.complete(fresh, BASE) == 1
+
+    def test_recurring_next_occurrence_offered(self, tmp_path):
+        """Test that completing a recurring occurrence offers the next one."""
+        coordinator = TaskLeaseCoordinator(str(tmp_path / "leases.db"))
+        coordinator.offer(make_task("hourly", recurrence="@hourly"))
+        coordinator.complete(coordinator.claim(BASE), BASE)
+        assert coordinator.next_due() == BASE + timedelta(hours=1)
+        leases = coordinator.claim(BASE + timedelta(hours=1))
+        assert leases[0].task.last_due_at == BASE + timedelta(hours=1)
+
+
+    def test_release(self, tmp_path):
+        """Test that a released occurrence can be claimed at once."""
+        path = str(tmp_path / "leases.db")
+        first = TaskLeaseCoordinator(path, worker_id="a")
+        second = TaskLeaseCoordinator(path, worker_id="b")
+        first.offer(make_task("t1"))
+        first.release(first.claim(BASE))
+        assert [lease.task.task_id for lease in second.claim(BASE)] == ["t1"]
+
+
+class TestLeasedExecutors:
+    """Tests for executors of several schedulers sharing a lease file."""
+
+    def test_each_occurrence_runs_once(self, tmp_path):
+        """Test that two executors knowing the same tasks run each one once."""
+        path = str(tmp_path / "leases.db")
+        ran = []
+        executors = []
+        for worker_id in ("a", "b"):
+            scheduler = Scheduler()
+            executor = TaskExecutor(scheduler, lambda task: ran.append(task.task_id) or True,
+                                    clock=lambda: BASE + timedelta(minutes=5),
+                                    leases=TaskLeaseCoordinator(path, worker_id=worker_id))
+            for i in range(10):
+                scheduler.schedule_task(make_task(f"t{i}", i))
+            executors.append(executor)
+
+        for executor in executors:
+            executor.run_due()
+        assert sorted(ran) == [f"t{i}" for i in range(6)]
+        assert executors[0].scheduler.get_task("t0").executed
+
+    def test_cancel_withdraws_occurrence(self, tmp_path):
+        """Test that a cancelled task is not run by any worker."""
+        scheduler = Scheduler()
+        coordinator = TaskLeaseCoordinator(str(tmp_path / "leases.db"))
+        TaskExecutor(scheduler, lambda task: True, leases=coordinator)
+        scheduler.schedule_task(make_task("t1"))
+        scheduler.cancel_task("t1")
+        assert coordinator.claim(BASE) == []
+
+    def test_stats_endpoint_disabled(self):
+        """Test that lease statistics need a session and are not found without a lease file."""
+        assert client.get("/schedule/leases/stats", params={"session_id": "bogus"}).status_code == 401
+        session_id = client.post("/auth/login", json={"username": "admin", "password": "password123"}).json()["session_id"]
+        assert client.get("/schedule/leases/stats", params={"session_id": session_id}).status_code == 404
+
+
+class TestLeaseProcesses:
+    """Tests for lease coordination across real processes."""
+
+    def test_no_duplicates_with_crashed_worker(self, tmp_path):
+        """Test that 4 processes, one crashing, run every occurrence exactly once."""
+        path = str(tmp_path / "leases.db")
+        TaskLeaseCoordinator(path).offer_many(make_task(f"t{i}") for i in range(400))
+
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        crashed = context.Process(target=run_worker, args=(path, results, True))
+        crashed.start()
+        crashed.join(10)
+        workers = [context.Process(target=run_worker, args=(path, results, False)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        ran = [task_id for _ in workers for task_id in results.get(timeout=30)]
+        for worker in workers:
+            worker.join(10)
+
+        assert len(ran) == 400
+        assert sorted(ran) == sorted(f"t{i}" for i in range(400))
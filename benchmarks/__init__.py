@@ -0,0 +1 @@
+"""Micro-benchmarks for the backend. Run with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,51 @@
+"""
+Benchmark 1,000 light commands sent one by one versus as one batch.
+
+Runs in-process against the app with TestClient, so the figures include
+routing, validation and session resolution but not network round-trips,
+which would widen the gap further.
+
+    python -m benchmarks.bench_batch_commands --commands 1000
+"""
+import argparse
+import time
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.api.storage import dashboards_db
+from app.models.device import Light
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commands", type=int, default=1000)
+    args = parser.parse_args()
+
+    dashboard = dashboards_db["user1"]
+    device_ids = [f"bench-light{i}" for i in range(args.commands)]
+    for device_id in device_ids:
+        dashboard.add_device(Light(device_id, device_id))
+
+    client = TestClient(app)
+    session_id = client.post("/auth/login", json={"username": "admin", "password": "password123"}).json()["session_id"]
+    params = {"session_id": session_id}
+
+    started = time.perf_counter()
+    for device_id in device_ids:
+        client.put(f"/devices/{device_id}/light/brightness", params=params, json={"brightness": 40})
+    individual = time.perf_counter() - started
+
+    commands = [{"device_id": device_id, "action": "set_brightness", "brightness": 60} for device_id in device_ids]
+    started = time.perf_counter()
+    response = client.post("/devices/batch", params=params, json={"commands": commands})
+    batched = time.perf_counter() - started
+    assert response.json()["succeeded"] == args.commands
+
+    print(f"{'mode':<12} {'total ms':>10} {'us/command':>12}")
+    print(f"{'individual':<12} {individual * 1e3:>10.1f} {individual / args.commands * 1e6:>12.1f}")
+    print(f"{'batch':<12} {batched * 1e3:>10.1f} {batched / args.commands * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark unchanged polls with and without If-None-Match.
+
+Fills the default user's dashboard, the scheduler and the notification
+history, then polls each endpoint in-process: once as a plain GET that
+serializes the full body, and once revalidating with the ETag from the
+previous response, which is answered with 304.
+
+    python -m benchmarks.bench_conditional_get --devices 500
+"""
+import argparse
+import time
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.api.storage import dashboards_db, scheduler, notification_service
+from app.models.device import Light
+from app.models.scheduler import ScheduledTask
+
+PATHS = ["/devices", "/schedule", "/notifications"]
+
+
+def polls_per_second(client: TestClient, path: str, params: dict, headers: dict, polls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(polls):
+        client.get(path, params=params, headers=headers)
+    return polls / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--polls", type=int, default=500)
+    args = parser.parse_args()
+
+    dashboard = dashboards_db["user1"]
+    for i in range(args.devices):
+        dashboard.add_device(Light(f"bench-light{i}", f"Bench Light {i}"))
+    for i in range(args.tasks):
+        scheduler.schedule_task(ScheduledTask(f"bench-task{i}", "light1", "turn_on", "2030-01-01T07:00:00"))
+    for i in range(100):
+        notification_service.send_notification(f"Bench notification {i}", "light1")
+
+    client = TestClient(app)
+    session_id = client.post("/auth/login", json={"username": "admin", "password": "password123"}).json()["session_id"]
+    params = {"session_id": session_id, "limit": 100}
+
+    print(f"{'endpoint':<16} {'full GET (req/s)':>18} {'304 (req/s)':>14}")
+    for path in PATHS:
+        etag = client.get(path, params=params).headers["ETag"]
+        full = polls_per_second(client, path, params, {}, args.polls)
+        revalidated = polls_per_second(client, path, params, {"If-None-Match": etag}, args.polls)
+        print(f"{path:<16} {full:>18.0f} {revalidated:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
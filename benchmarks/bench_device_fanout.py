@@ -0,0 +1,71 @@
+"""
+Benchmark pushing device changes to thousands of WebSocket clients.
+
+Runs DeviceHub in one event loop with one consumer task per simulated
+client, as /devices/ws does, and measures how long it takes until every
+client has dequeued each change. The socket write is replaced by a no-op
+so the figures are the server-side fan-out cost only.
+
+    python -m benchmarks.bench_device_fanout --clients 5000 --users 100
+"""
+import argparse
+import asyncio
+import time
+
+from app.models.dashboard import Dashboard
+from app.models.device import Light
+from app.models.device_hub import DeviceHub
+
+
+async def client(subscription, received: list) -> None:
+    while True:
+        await subscription.queue.get()
+        received[0] += 1
+
+
+async def run(clients: int, users: int, changes: int) -> None:
+    hub = DeviceHub(max_pending=changes + 1)
+    dashboards = []
+    for u in range(users):
+        dashboard = Dashboard(f"user{u}")
+        dashboard.add_listener(hub.publish)
+        dashboard.add_device(Light(f"light{u}", f"Light {u}"))
+        dashboards.append(dashboard)
+
+    received = [0]
+    tasks = [
+        asyncio.create_task(client(hub.subscribe(f"user{i % users}"), received))
+        for i in range(clients)
+    ]
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    for n in range(changes):
+        dashboards[n % users].get_device(f"light{n % users}").toggle()
+    # Publishing on the loop queues synchronously, so this is the total
+    expected = hub.delivered
+    while received[0] < expected:
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+
+    for task in tasks:
+        task.cancel()
+    print(f"{clients:>8} {users:>6} {changes:>8} {expected:>10} "
+          f"{elapsed * 1e3:>10.1f} {expected / elapsed:>14.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--changes", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} {'users':>6} {'changes':>8} {'deliveries':>10} {'total ms':>10} {'deliveries/s':>14}")
+    for clients in sorted({1000, args.clients, 10_000}):
+        asyncio.run(run(clients, args.users, args.changes))
+    asyncio.run(run(args.clients, 1, 100))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark streaming bulk device import at growing file sizes.
+
+Parser memory is measured with tracemalloc over the parse alone and should
+stay flat as the file grows, since only the current partial line is held.
+The end-to-end run posts a streamed NDJSON body through TestClient.
+
+    python -m benchmarks.bench_device_import --devices 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import AsyncIterator, Iterator
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.models.device_import import FORMAT_NDJSON, parse_records
+
+CHUNK_SIZE = 64 * 1024
+
+
+def ndjson_chunks(count: int, prefix: str) -> Iterator[bytes]:
+    """Generate an NDJSON body in CHUNK_SIZE pieces without building it whole."""
+    pending = []
+    size = 0
+    for i in range(count):
+        line = json.dumps({"device_type": "light", "device_name": f"Light {i}", "device_id": f"{prefix}{i}"}) + "\n"
+        pending.append(line.encode())
+        size += len(pending[-1])
+        if size >= CHUNK_SIZE:
+            yield b"".join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b"".join(pending)
+
+
+async def as_async(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def parse_all(count: int) -> int:
+    parsed = 0
+    async for _, record, _ in parse_records(as_async(ndjson_chunks(count, "p")), FORMAT_NDJSON):
+        parsed += record is not None
+    return parsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--devices", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'lines':>10} {'parse ms':>10} {'peak KiB':>10}")
+    for count in (args.devices // 100, args.devices // 10, args.devices):
+        tracemalloc.start()
+        started = time.perf_counter()
+        assert asyncio.run(parse_all(count)) == count
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{count:>10} {elapsed * 1e3:>10.1f} {peak / 1024:>10.1f}")
+
+    client = TestClient(app)
+    session_id = client.post("/auth/login", json={"username": "admin", "password": "password123"}).json()["session_id"]
+    started = time.perf_counter()
+    response = client.post(
+        "/devices/import",
+        params={"session_id": session_id},
+        content=ndjson_chunks(args.devices, "bench-import"),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    elapsed = time.perf_counter() - started
+    assert response.json()["imported"] == args.devices, response.json()
+    print(f"\nimported {args.devices} devices in {elapsed:.2f}s "
+          f"({args.devices / elapsed:,.0f} devices/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark serving an unchanged device list, as every GET /devices poll does.
+
+Compares rebuilding every device dict and validating it into DeviceResponse
+(the previous route) with Dashboard.display_devices_json, which reuses the
+cached encoding and re-encodes only devices that changed.
+
+    python -m benchmarks.bench_device_list
+"""
+import json
+import timeit
+
+from app.api.devices import DEVICE_RESPONSE_FIELDS
+from app.api.models import DeviceResponse
+from app.models.dashboard import Dashboard
+from app.models.device import Light
+
+DEVICE_COUNTS = [10, 100, 1_000, 10_000]
+POLLS = 50
+
+
+def legacy_poll(dashboard: Dashboard) -> bytes:
+    """Build dicts, validate them and encode, like the pre-cache route."""
+    models = [DeviceResponse(**data) for data in dashboard.display_devices()]
+    return json.dumps([model.model_dump() for model in models], separators=(",", ":")).encode("utf-8")
+
+
+def main() -> None:
+    print(f"{'devices':>8} {'legacy (ms/poll)':>18} {'unchanged (ms/poll)':>20} {'1 changed (ms/poll)':>20}")
+    for count in DEVICE_COUNTS:
+        dashboard = Dashboard("bench")
+        for i in range(count):
+            dashboard.add_device(Light(f"light{i}", f"Light {i}"))
+        light = dashboard.get_device("light0")
+
+        legacy = timeit.timeit(lambda: legacy_poll(dashboard), number=POLLS)
+        dashboard.display_devices_json(DEVICE_RESPONSE_FIELDS)
+        cached = timeit.timeit(lambda: dashboard.display_devices_json(DEVICE_RESPONSE_FIELDS), number=POLLS)
+
+        def changed_poll() -> bytes:
+            light.toggle()
+            return dashboard.display_devices_json(DEVICE_RESPONSE_FIELDS)
+
+        changed = timeit.timeit(changed_poll, number=POLLS)
+        print(f"{count:>8} {legacy / POLLS * 1e3:>18.3f} {cached / POLLS * 1e3:>20.4f} {changed / POLLS * 1e3:>20.3f}")
+
+
+if __name__ == "__main__":
+    main()
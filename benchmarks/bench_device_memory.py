@@ -0,0 +1,86 @@
+"""
+Benchmark memory per device for the slotted device classes.
+
+The ``Legacy*`` classes hold the same attributes as the current devices in
+a per-instance ``__dict__``, as devices did before they declared
+``__slots__``, so the two can be compared like for like in one run.
+
+    python -m benchmarks.bench_device_memory [--devices 200000]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from app.models.device import DeviceStatus, Light, Thermostat, SecurityCamera
+
+
+class LegacyLight:
+    def __init__(self, device_id: str, device_name: str):
+        self.device_id = device_id
+        self.device_name = device_name
+        self.device_type = "light"
+        self.status = DeviceStatus.OFF.value
+        self.room = None
+        self.version = 0
+        self._on_change = None
+        self.brightness = 0
+        self.is_on = False
+
+
+class LegacyThermostat:
+    def __init__(self, device_id: str, device_name: str):
+        self.device_id = device_id
+        self.device_name = device_name
+        self.device_type = "thermostat"
+        self.status = DeviceStatus.OFF.value
+        self.room = None
+        self.version = 0
+        self._on_change = None
+        self.temperature = 20.0
+        self.target_temperature = 22.0
+
+
+class LegacySecurityCamera:
+    def __init__(self, device_id: str, device_name: str):
+        self.device_id = device_id
+        self.device_name = device_name
+        self.device_type = "security_camera"
+        self.status = DeviceStatus.OFF.value
+        self.room = None
+        self.version = 0
+        self._on_change = None
+        self.recording = False
+        self.resolution = "1080p"
+
+
+def bytes_per_device(cls, count: int, ids, names) -> float:
+    """Measure allocated bytes per instance, excluding the shared id/name strings."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    devices = [cls(ids[i], names[i]) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Subtract the list holding the instances
+    per_device = (after - before - (devices.__sizeof__())) / count
+    del devices
+    return per_device
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Device memory benchmark")
+    parser.add_argument("--devices", type=int, default=200_000)
+    args = parser.parse_args()
+    ids = [f"device-{i:08d}" for i in range(args.devices)]
+    names = [f"Device {i}" for i in range(args.devices)]
+
+    print(f"{'class':<16} {'legacy (B/dev)':>15} {'slots (B/dev)':>15} {'saved':>8}")
+    for legacy, slotted in ((LegacyLight, Light), (LegacyThermostat, Thermostat),
+                            (LegacySecurityCamera, SecurityCamera)):
+        old = bytes_per_device(legacy, args.devices, ids, names)
+        new = bytes_per_device(slotted, args.devices, ids, names)
+        print(f"{slotted.__name__:<16} {old:>15.1f} {new:>15.1f} {1 - new / old:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark list endpoints with response_model validation versus ListEncoder.
+
+Builds a throwaway app with two routes per list type: one returns items and
+lets FastAPI validate them against the response model, as the routes used
+to; the other returns the pre-encoded bytes the routes use now. Both run
+through TestClient so the figures include routing and the HTTP layer.
+
+    python -m benchmarks.bench_list_encoding --sizes 10 1000 100000
+"""
+import argparse
+import time
+from typing import Any, Callable, List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.fast_json import ListEncoder, json_response
+from app.api.integrations import IntegrationResponse
+from app.api.models import DeviceResponse, TaskResponse
+from app.models.device import Light, Thermostat
+from app.models.integrations import Integration
+from app.models.scheduler import ScheduledTask
+
+
+def make_items(kind: str, count: int) -> List[Any]:
+    if kind == "devices":
+        return [Light(f"l{i}", f"Light {i}") if i % 2 else Thermostat(f"t{i}", f"Thermostat {i}") for i in range(count)]
+    if kind == "tasks":
+        return [ScheduledTask(f"task{i}", f"l{i}", "turn_on", "2030-01-01T08:00:00") for i in range(count)]
+    return [Integration(name=f"Integration {i}", features=["a", "b"], commands=["on"]) for i in range(count)]
+
+
+def build_app(kind: str, model: type, items: List[Any]) -> FastAPI:
+    app = FastAPI()
+    encoder = ListEncoder(model)
+
+    if kind == "integrations":
+        @app.get("/validated", response_model=List[model])
+        def validated():
+            return [model.model_validate(item) for item in items]
+    else:
+        @app.get("/validated", response_model=List[model])
+        def validated():
+            return [item.to_dict() for item in items]
+
+    @app.get("/encoded", response_model=List[model])
+    def encoded():
+        return json_response(encoder.encode_objects(items))
+
+    return app
+
+
+def timed(request: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        request()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    args = parser.parse_args()
+
+    models = {"devices": DeviceResponse, "tasks": TaskResponse, "integrations": IntegrationResponse}
+    print(f"{'list':<13} {'items':>7} {'validated ms':>13} {'encoded ms':>11} {'speedup':>8}")
+    for kind, model in models.items():
+        for size in args.sizes:
+            client = TestClient(build_app(kind, model, make_items(kind, size)))
+            assert client.get("/validated").json() == client.get("/encoded").json()
+            repeat = 3 if size >= 100000 else 20
+            validated = timed(lambda: client.get("/validated"), repeat)
+            encoded = timed(lambda: client.get("/encoded"), repeat)
+            print(f"{kind:<13} {size:>7} {validated * 1e3:>13.2f} {encoded * 1e3:>11.2f} {validated / encoded:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark crash recovery of the snapshot + journal store.
+
+Builds a store with N devices spread over households, compacts it into a
+snapshot, appends a journal tail of brightness changes and then measures
+how long a restart takes before the first request can be served. Full
+journal replay (no snapshot) is measured for comparison.
+
+    python -m benchmarks.bench_recovery [--devices 1000000] [--per-user 100] [--tail 10000]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from app.models.dashboard_repository import DashboardRepository
+from app.models.device import Light
+from app.models.device_factory import DeviceFactory
+from app.models.journal_backend import JournalBackend
+
+
+def populate(directory: str, devices: int, per_user: int) -> None:
+    """Write all devices, one batch per household."""
+    backend = JournalBackend(directory)
+    users = devices // per_user
+    for u in range(users):
+        records = {}
+        for d in range(per_user):
+            light = Light(f"u{u}-l{d}", f"Light {d}")
+            records[light.device_id] = light.to_dict()
+        backend.write_batch({f"dashboard:user{u}": records}, {})
+        backend.put("dashboards", f"user{u}", {"user_id": f"user{u}"})
+    backend.close()
+
+
+def append_tail(directory: str, tail: int, users: int) -> None:
+    """Append brightness changes on top of the snapshot."""
+    backend = JournalBackend(directory)
+    for i in range(tail):
+        u = i % users
+        light = Light(f"u{u}-l0", "Light 0")
+        light.set_brightness(i % 101)
+        backend.put(f"dashboard:user{u}", light.device_id, light.to_dict())
+    backend.close()
+
+
+def timed(label: str, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"{label:<44} {time.perf_counter() - started:8.3f} s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Snapshot + journal recovery benchmark")
+    parser.add_argument("--devices", type=int, default=1_000_000)
+    parser.add_argument("--per-user", type=int, default=100)
+    parser.add_argument("--tail", type=int, default=10_000)
+    args = parser.parse_args()
+    users = args.devices // args.per_user
+    directory = tempfile.mkdtemp(prefix="bench_recovery_")
+    try:
+        timed(f"write {args.devices} devices to journal", lambda: populate(directory, args.devices, args.per_user))
+        timed("recover by replaying the full journal", lambda: JournalBackend(directory).close())
+
+        backend = JournalBackend(directory)
+        timed("compact into snapshot", backend.compact)
+        backend.close()
+        append_tail(directory, args.tail, users)
+
+        backend = timed(f"recover from snapshot + {args.tail}-entry tail", lambda: JournalBackend(directory))
+        repo = DashboardRepository(backend, DeviceFactory.get_instance())
+        timed("first dashboard request after restart", lambda: repo.get("user0"))
+        timed("decode every dashboard (full warm-up)", lambda: [backend.items(f"dashboard:user{u}") for u in range(users)])
+        backend.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark next-occurrence computation for recurring tasks.
+
+Computes the next occurrence of 100k mixed cron rules, then compares the
+memory of storing recurring tasks once against expanding each rule into a
+year of one-shot tasks up front.
+
+    python -m benchmarks.bench_recurrence --rules 100000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from app.models.recurrence import CronRule
+from app.models.scheduler import ScheduledTask
+
+START = datetime(2030, 1, 4, 18, 30)
+
+
+def random_expression(rng: random.Random) -> str:
+    minute, hour = rng.randrange(60), rng.randrange(24)
+    return rng.choice([
+        f"{minute} {hour} * * 1-5",
+        f"{minute} {hour} * * *",
+        f"*/{rng.choice([5, 10, 15, 30])} * * * *",
+        f"{minute} {hour} * * {rng.randrange(7)}",
+        f"{minute} {hour} {rng.randrange(1, 29)} * *",
+        f"{minute} {hour} 1,15 */3 *",
+    ])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rules", type=int, default=100000)
+    parser.add_argument("--expanded-rules", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    expressions = [random_expression(rng) for _ in range(args.rules)]
+
+    started = time.perf_counter()
+    rules = [CronRule(expression) for expression in expressions]
+    parse = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for rule in rules:
+        rule.next_after(START)
+    compute = time.perf_counter() - started
+    print(f"{args.rules} rules: parse {parse / args.rules * 1e6:.1f} us/rule, "
+          f"next occurrence {compute / args.rules * 1e6:.1f} us/rule")
+
+    sample = expressions[:args.expanded_rules]
+    tracemalloc.start()
+    recurring = [ScheduledTask(f"r{i}", "light1", "turn_on", START.isoformat(), recurrence=expression)
+                 for i, expression in enumerate(sample)]
+    recurring_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    expanded = []
+    year_end = START + timedelta(days=365)
+    for i, rule in enumerate(rules[:args.expanded_rules]):
+        when = rule.next_after(START, inclusive=True)
+        while when is not None and when < year_end:
+            expanded.append(ScheduledTask(f"e{i}-{len(expanded)}", "light1", "turn_on", when.isoformat()))
+            when = rule.next_after(when)
+    expanded_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{len(sample)} rules stored once:     {len(recurring):>9} tasks {recurring_bytes / len(sample) / 1024:>10.1f} KiB/rule")
+    print(f"{len(sample)} rules expanded 1 year: {len(expanded):>9} tasks {expanded_bytes / len(sample) / 1024:>10.1f} KiB/rule")
+
+
+if __name__ == "__main__":
+    main()
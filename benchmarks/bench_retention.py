@@ -0,0 +1,76 @@
+"""
+Benchmark notification memory under sustained traffic.
+
+Sends many notifications through the previous history (an unbounded list
+plus a Queue nothing drained) and through a bounded RetentionBuffer, with
+and without a SQLite archive, and reports per-event cost and the memory
+still held afterwards.
+
+    python -m benchmarks.bench_retention --events 200000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from queue import Queue
+from typing import Callable
+
+from app.models.notification_service import Event, NotificationService
+from app.models.retention import RetentionBuffer
+from app.models.storage_backend import SQLiteBackend
+
+
+class UnboundedHistory:
+    """History as it used to be kept: every event, twice."""
+
+    def __init__(self):
+        self.notifications: Queue = Queue()
+        self.history = []
+
+    def send_notification(self, message: str) -> None:
+        event = Event("general", "", message)
+        self.notifications.put(event)
+        self.history.append(event)
+
+
+def measure(name: str, make: Callable[[], object], events: int) -> None:
+    """Send events through one history and print its cost and residue."""
+    tracemalloc.start()
+    service = make()
+    started = time.perf_counter()
+    for i in range(events):
+        service.send_notification(f"Device light{i % 100} turned on")
+    elapsed = time.perf_counter() - started
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<24} {elapsed / events * 1e6:>8.2f} us/event  held {held / 2**20:>8.1f} MiB  "
+          f"peak {peak / 2**20:>8.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--keep", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = SQLiteBackend(os.path.join(directory, "archive.db"))
+        print(f"{args.events} notifications, {args.keep} kept in memory")
+        measure("unbounded list + queue", UnboundedHistory, args.events)
+        measure("ring buffer", lambda: NotificationService(retention=RetentionBuffer(args.keep)), args.events)
+        measure("ring buffer + archive",
+                lambda: NotificationService(retention=RetentionBuffer(args.keep, archive=archive)), args.events)
+        started = time.perf_counter()
+        pages = after_id = 0
+        while True:
+            page = archive.read_after("archive", after_id, 100)
+            if not page:
+                break
+            after_id = page[-1][0]
+            pages += 1
+        print(f"archive read back in {pages} pages of 100: {(time.perf_counter() - started) * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark finding due tasks among many pending ones.
+
+Compares the heap-backed Scheduler with the previous approach, which
+scanned every task and re-parsed its ISO time on each pass. Each pass
+makes a small slice of the tasks due, as a periodic executor would. Also
+times the per-device index: paging one device's tasks and cancelling them.
+
+    python -m benchmarks.bench_scheduler --tasks 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from app.models.scheduler import Scheduler, ScheduledTask
+
+BASE = datetime(2030, 1, 1)
+
+
+def scan_pass(tasks: List[ScheduledTask], now: datetime) -> int:
+    """One execute_tasks pass as it used to run: a full scan with parsing."""
+    due = 0
+    for task in tasks:
+        if not task.executed:
+            task_time = datetime.fromisoformat(task.scheduled_time)
+            if task_time <= now:
+                task.executed = True
+                due += 1
+    return due
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--passes", type=int, default=10)
+    parser.add_argument("--cancels", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    horizon = 24 * 3600
+    tasks = [
+        ScheduledTask(f"task{i}", f"light{i % 1000}", "turn_on", (BASE + timedelta(seconds=rng.randrange(horizon))).isoformat())
+        for i in range(args.tasks)
+    ]
+
+    scheduler = Scheduler()
+    started = time.perf_counter()
+    for task in tasks:
+        scheduler.schedule_task(task)
+    schedule = time.perf_counter() - started
+
+    step = timedelta(seconds=horizon // 1000)
+    started = time.perf_counter()
+    heap_due = sum(len(scheduler.execute_tasks(BASE + step * (i + 1))) for i in range(args.passes))
+    heap_pass = (time.perf_counter() - started) / args.passes
+
+    for task in tasks:
+        task.executed = False
+    started = time.perf_counter()
+    scan_due = sum(scan_pass(tasks, BASE + step * (i + 1)) for i in range(args.passes))
+    scan_pass_time = (time.perf_counter() - started) / args.passes
+    assert heap_due == scan_due
+
+    cancel_ids = [f"task{i}" for i in rng.sample(range(args.tasks), min(args.cancels, args.tasks))]
+    started = time.perf_counter()
+    for task_id in cancel_ids:
+        scheduler.cancel_task(task_id)
+    cancel = (time.perf_counter() - started) / max(1, len(cancel_ids))
+
+    started = time.perf_counter()
+    page, _ = scheduler.get_device_tasks("light7", limit=100)
+    device_page = time.perf_counter() - started
+    started = time.perf_counter()
+    device_cancelled = scheduler.cancel_device_tasks("light7")
+    device_cancel = time.perf_counter() - started
+
+    print(f"{args.tasks} pending tasks, ~{heap_due // args.passes} due per pass")
+    print(f"schedule           {schedule / args.tasks * 1e6:>10.2f} us/task")
+    print(f"scan pass          {scan_pass_time * 1e3:>10.2f} ms")
+    print(f"heap pass          {heap_pass * 1e3:>10.3f} ms")
+    print(f"cancel             {cancel * 1e6:>10.2f} us/task")
+    print(f"device page of {len(page)}  {device_page * 1e3:>10.3f} ms")
+    print(f"device cancel-all  {device_cancel * 1e3:>10.3f} ms ({device_cancelled} tasks)")
+
+
+if __name__ == "__main__":
+    main()
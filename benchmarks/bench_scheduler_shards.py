@@ -0,0 +1,72 @@
+"""
+Benchmark per-user scheduler shards.
+
+Times what GET /schedule serializes for one user now that tasks are
+sharded (only that user's tasks) against the previous global list (every
+user's tasks). Also compares due-task passes through the heap of shard
+heads with one global deadline heap, which is the cost of the merge.
+
+    python -m benchmarks.bench_scheduler_shards --users 10000 --tasks-per-user 100
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.api.fast_json import ListEncoder
+from app.api.models import TaskResponse
+from app.models.scheduler import HeapTaskQueue, Scheduler, ScheduledTask
+
+BASE = datetime(2030, 1, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--tasks-per-user", type=int, default=100)
+    parser.add_argument("--passes", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(23)
+    horizon = 24 * 3600
+    scheduler, heap = Scheduler(), HeapTaskQueue()
+    total = args.users * args.tasks_per_user
+    started = time.perf_counter()
+    for i in range(total):
+        user_id = f"user{i % args.users}"
+        task = ScheduledTask(f"task{i}", f"light{i % 7}", "turn_on",
+                             (BASE + timedelta(seconds=rng.randrange(horizon))).isoformat(), user_id=user_id)
+        scheduler.schedule_task(task)
+    schedule = time.perf_counter() - started
+
+    # The global heap gets its own copies so both start with every task pending
+    for task in scheduler.get_tasks():
+        heap.push(ScheduledTask(task.task_id, task.device_id, task.action, task.scheduled_time))
+
+    encoder = ListEncoder(TaskResponse)
+    started = time.perf_counter()
+    own = encoder.encode_objects(scheduler.get_user_tasks("user7"))
+    shard_list = time.perf_counter() - started
+    started = time.perf_counter()
+    everyone = encoder.encode_objects(scheduler.get_tasks())
+    global_list = time.perf_counter() - started
+
+    step = timedelta(seconds=horizon // 1000)
+    started = time.perf_counter()
+    shard_due = sum(len(scheduler.execute_tasks(BASE + step * (i + 1))) for i in range(args.passes))
+    shard_pass = (time.perf_counter() - started) / args.passes
+    started = time.perf_counter()
+    heap_due = sum(len(heap.pop_due(BASE + step * (i + 1))) for i in range(args.passes))
+    heap_pass = (time.perf_counter() - started) / args.passes
+    assert shard_due == heap_due
+
+    print(f"{args.users} users x {args.tasks_per_user} tasks, ~{shard_due // args.passes} due per pass")
+    print(f"schedule                {schedule / total * 1e6:>10.2f} us/task")
+    print(f"list one user's shard   {shard_list * 1e3:>10.3f} ms ({len(own) / 1024:.0f} KiB)")
+    print(f"list every task         {global_list * 1e3:>10.3f} ms ({len(everyone) / 1024:.0f} KiB)")
+    print(f"due pass, shard heads   {shard_pass * 1e3:>10.3f} ms")
+    print(f"due pass, global heap   {heap_pass * 1e3:>10.3f} ms (marks nothing executed)")
+
+
+if __name__ == "__main__":
+    main()
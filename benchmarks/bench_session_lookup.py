@@ -0,0 +1,48 @@
+"""
+Benchmark session resolution cost as the number of users grows.
+
+Compares the original lookup (session_id -> user_id, then a scan over every
+user) with SessionStore, which resolves straight to the User object.
+
+    python -m benchmarks.bench_session_lookup
+"""
+import timeit
+from typing import Dict, Optional
+
+from app.models.session_store import SessionStore
+from app.models.user import User
+
+USER_COUNTS = [100, 1_000, 10_000, 100_000]
+LOOKUPS = 2_000
+
+
+def linear_lookup(users_db: Dict[str, User], sessions: Dict[str, str], session_id: str) -> Optional[User]:
+    """The pre-SessionStore implementation of get_user_from_session."""
+    user_id = sessions.get(session_id)
+    if user_id:
+        for user in users_db.values():
+            if user.user_id == user_id:
+                return user
+    return None
+
+
+def main() -> None:
+    print(f"{'users':>8} {'linear (us/lookup)':>20} {'store (us/lookup)':>20}")
+    for count in USER_COUNTS:
+        users_db = {f"name{i}": User(f"user{i}", f"name{i}", "pw") for i in range(count)}
+        store = SessionStore()
+        for user in users_db.values():
+            store.register_user(user)
+
+        # Worst case for the scan: the session belongs to the last user added
+        last_user = users_db[f"name{count - 1}"]
+        sessions = {"legacy-session": last_user.user_id}
+        session_id = store.create_session(last_user)
+
+        linear = timeit.timeit(lambda: linear_lookup(users_db, sessions, "legacy-session"), number=LOOKUPS)
+        indexed = timeit.timeit(lambda: store.get_user(session_id), number=LOOKUPS)
+        print(f"{count:>8} {linear / LOOKUPS * 1e6:>20.2f} {indexed / LOOKUPS * 1e6:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark scheduled task execution spread over worker processes with leases.
+
+Offers a backlog of due task occurrences to a shared lease file, then lets
+1, 2, 4, ... processes claim, run and complete them in batches. Running a
+task is simulated by a short sleep, standing in for a device command. One
+extra process per round claims a batch and dies without running it, so
+its leases have to expire and be reclaimed. Reports throughput and checks
+that every occurrence ran exactly once.
+
+    python -m benchmarks.bench_task_leases --tasks 20000 --processes 1 2 4 8 16
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+from app.models.scheduler import ScheduledTask
+from app.models.task_leases import TaskLeaseCoordinator
+
+NOW = datetime(2030, 1, 1, 8, 0, 0)
+
+
+def worker(path: str, results, work_seconds: float, lease_seconds: float, batch: int, crash: bool) -> None:
+    """Claim, run and complete occurrences until the backlog is empty."""
+    coordinator = TaskLeaseCoordinator(path, lease_seconds=lease_seconds, batch_size=batch)
+    ran = []
+    while True:
+        leases = coordinator.claim(NOW)
+        if crash and leases:
+            os._exit(0)
+        if not leases:
+            if coordinator.next_due() is None and coordinator.stats()["leased"] == 0:
+                break
+            time.sleep(0.05)
+            continue
+        done = []
+        for lease in leases:
+            if not coordinator.holds(lease):
+                break
+            time.sleep(work_seconds)
+            ran.append(lease.task.task_id)
+            done.append(lease)
+        coordinator.complete(done, NOW)
+        coordinator.release(leases[len(done):])
+    results.put((ran, coordinator.reclaimed))
+
+
+def run(processes: int, args) -> None:
+    """Drain one backlog with a number of processes and print the result."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "leases.db")
+        TaskLeaseCoordinator(path).offer_many(
+            ScheduledTask(f"task{i}", f"light{i % 100}", "turn_on", NOW.isoformat()) for i in range(args.tasks)
+        )
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        crasher = context.Process(target=worker, args=(path, results, 0.0, args.lease, args.batch, True))
+        crasher.start()
+        crasher.join()
+
+        started = time.perf_counter()
+        workers = [
+            context.Process(target=worker, args=(path, results, args.work_ms / 1000, args.lease, args.batch, False))
+            for _ in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        outcomes = [results.get() for _ in workers]
+        elapsed = time.perf_counter() - started
+        for process in workers:
+            process.join()
+
+    counts = Counter(task_id for ran, _ in outcomes for task_id in ran)
+    duplicates = sum(count - 1 for count in counts.values())
+    reclaimed = sum(reclaimed for _, reclaimed in outcomes)
+    print(f"{processes:>3} processes  {args.tasks / elapsed:>9.0f} tasks/s  {elapsed:>6.2f} s  "
+          f"ran {len(counts)}/{args.tasks}  duplicates {duplicates}  reclaimed {reclaimed}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--work-ms", type=float, default=0.5, help="simulated time to run one task")
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--lease", type=float, default=1.0, help="lease length in seconds")
+    args = parser.parse_args()
+
+    print(f"{args.tasks} due occurrences, {args.work_ms} ms each, batches of {args.batch}")
+    for processes in args.processes:
+        run(processes, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark task queues under churn of short-horizon tasks.
+
+Schedules N tasks due within five minutes ("turn off in 5 minutes" per
+motion event), cancels half of them, then advances the clock one second
+at a time and expires the rest. Compares the timing wheel, the min-heap,
+and the original list that was scanned (re-parsing every time) on each
+pass; the list is measured on a smaller set because its cancel and
+expiry scale with the number of tasks.
+
+    python -m benchmarks.bench_timing_wheel --tasks 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from app.models.scheduler import HeapTaskQueue, ScheduledTask, TimingWheelTaskQueue
+
+BASE = datetime(2030, 1, 1)
+HORIZON_SECONDS = 300
+
+
+class ListTaskQueue:
+    """The scheduler's original list: append, filter to cancel, scan to expire."""
+
+    def __init__(self):
+        self.tasks: List[ScheduledTask] = []
+
+    def push(self, task: ScheduledTask) -> None:
+        self.tasks.append(task)
+
+    def discard(self, task_id: str) -> bool:
+        initial_length = len(self.tasks)
+        self.tasks = [t for t in self.tasks if t.task_id != task_id]
+        return len(self.tasks) < initial_length
+
+    def pop_due(self, now: datetime) -> List[ScheduledTask]:
+        due = []
+        for task in self.tasks:
+            if not task.executed and datetime.fromisoformat(task.scheduled_time) <= now:
+                task.executed = True
+                due.append(task)
+        return due
+
+
+def make_tasks(count: int, rng: random.Random) -> List[ScheduledTask]:
+    return [
+        ScheduledTask(f"task{i}", f"light{i % 1000}", "turn_off",
+                      (BASE + timedelta(seconds=rng.uniform(1, HORIZON_SECONDS))).isoformat())
+        for i in range(count)
+    ]
+
+
+def run(name: str, queue, tasks: List[ScheduledTask], cancels: List[str], passes: int) -> None:
+    started = time.perf_counter()
+    for task in tasks:
+        queue.push(task)
+    insert = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for task_id in cancels:
+        queue.discard(task_id)
+    cancel = time.perf_counter() - started
+
+    started = time.perf_counter()
+    expired = 0
+    for second in range(1, passes + 1):
+        expired += len(queue.pop_due(BASE + timedelta(seconds=second)))
+    expiry = time.perf_counter() - started
+
+    print(f"{name:<6} {len(tasks):>9} {len(tasks) / insert:>13,.0f} {len(cancels) / cancel:>13,.0f} "
+          f"{expiry / passes * 1e3:>12.2f} {expired:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--list-tasks", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    print(f"{'queue':<6} {'tasks':>9} {'inserts/s':>13} {'cancels/s':>13} {'ms/1s tick':>12} {'expired':>9}")
+    for name, factory, count, cancel_share, passes in (
+        ("wheel", lambda: TimingWheelTaskQueue(tick=1.0, now=BASE), args.tasks, 0.5, HORIZON_SECONDS),
+        ("heap", HeapTaskQueue, args.tasks, 0.5, HORIZON_SECONDS),
+        ("list", ListTaskQueue, args.list_tasks, 0.01, 30),
+    ):
+        tasks = make_tasks(count, rng)
+        cancels = [task.task_id for task in rng.sample(tasks, int(count * cancel_share))]
+        run(name, factory(), tasks, cancels, passes)
+
+
+if __name__ == "__main__":
+    main()
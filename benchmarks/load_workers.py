@@ -0,0 +1,106 @@
+"""
+Load test: one uvicorn worker against N workers sharing a SQLite backend.
+
+Starts the API with ``--workers 1`` and then ``--workers N`` (both using
+STORAGE_URL=sqlite and signed session tokens), drives a mix of device and
+notification requests from a thread pool, and reports requests per second.
+
+    python -m benchmarks.load_workers [--workers 4] [--seconds 10] [--clients 32]
+"""
+import argparse
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+HOST = "127.0.0.1"
+
+
+def wait_for_server(base_url: str, timeout: float = 20.0) -> None:
+    """Poll the health endpoint until the server answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(base_url + "/", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def run_clients(base_url: str, token: str, seconds: float, clients: int) -> int:
+    """Issue requests from several threads for a fixed time; return the count."""
+    stop_at = time.monotonic() + seconds
+    counts = [0] * clients
+
+    def client_loop(index: int) -> None:
+        params = {"session_id": token}
+        with httpx.Client(base_url=base_url, timeout=10.0) as http:
+            i = 0
+            while time.monotonic() < stop_at:
+                if i % 4 == 0:
+                    http.put("/devices/light1/light/brightness", params=params, json={"brightness": i % 101})
+                elif i % 4 == 1:
+                    http.get("/notifications", params=params)
+                else:
+                    http.get("/devices", params=params)
+                i += 1
+            counts[index] = i
+
+    threads = [threading.Thread(target=client_loop, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts)
+
+
+def measure(workers: int, port: int, seconds: float, clients: int) -> float:
+    """Start a server with the given worker count and return requests/second."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.update({
+            "STORAGE_URL": f"sqlite:///{tmp}/state.db",
+            "SESSION_TOKENS": "1",
+            "SESSION_SECRET": secrets.token_hex(16),
+        })
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", HOST, "--port", str(port),
+             "--workers", str(workers), "--log-level", "warning"],
+            env=env
+        )
+        try:
+            base_url = f"http://{HOST}:{port}"
+            wait_for_server(base_url)
+            token = httpx.post(
+                base_url + "/auth/login", json={"username": "admin", "password": "password123"}
+            ).json()["session_id"]
+            total = run_clients(base_url, token, seconds, clients)
+            return total / seconds
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    single = measure(1, args.port, args.seconds, args.clients)
+    print(f"1 worker:  {single:8.0f} req/s")
+    multi = measure(args.workers, args.port, args.seconds, args.clients)
+    print(f"{args.workers} workers: {multi:8.0f} req/s  ({multi / single:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
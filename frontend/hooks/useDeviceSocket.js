@@ -0,0 +1,92 @@
+import { useEffect, useRef, useState } from "react";
+import { devicesAPI } from "../src/services/api";
+
+const RECONNECT_DELAY_MS = 2000;
+
+// Keeps the device list in sync through the /devices/ws push channel.
+// Returns the same shape as usePollingFetch so callers can switch over.
+const useDeviceSocket = () => {
+  const [data, setData] = useState([]);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState("");
+  const versionRef = useRef(0);
+  const epochRef = useRef("");
+  const socketRef = useRef(null);
+
+  const applyMessage = (message) => {
+    if (message.type === "snapshot") {
+      epochRef.current = message.epoch;
+      versionRef.current = message.version;
+      setData(message.devices);
+      setLoading(false);
+      return;
+    }
+    if (message.type !== "device") {
+      return;
+    }
+    if (message.epoch !== epochRef.current) {
+      // The dashboard was reloaded on the server and its version restarted:
+      // apply this change and ask for a snapshot to catch up on the rest
+      epochRef.current = message.epoch;
+      versionRef.current = 0;
+      socketRef.current?.send(JSON.stringify({ action: "snapshot" }));
+    }
+    if (message.version <= versionRef.current) {
+      return;
+    }
+    versionRef.current = message.version;
+    setData((devices) => {
+      if (message.op === "removed") {
+        return devices.filter((d) => d.device_id !== message.device_id);
+      }
+      const index = devices.findIndex((d) => d.device_id === message.device.device_id);
+      if (index === -1) {
+        return [...devices, message.device];
+      }
+      const next = [...devices];
+      next[index] = message.device;
+      return next;
+    });
+  };
+
+  // One-off REST fetch, e.g. while the socket is reconnecting
+  const refetch = async () => {
+    try {
+      setData(await devicesAPI.getDevices());
+      setError("");
+    } catch (err) {
+      setError(err.detail || "Failed to fetch data");
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  useEffect(() => {
+    let socket;
+    let reconnectTimer;
+    let closed = false;
+
+    const connect = () => {
+      socket = new WebSocket(devicesAPI.socketUrl());
+      socketRef.current = socket;
+      socket.onmessage = (event) => applyMessage(JSON.parse(event.data));
+      socket.onopen = () => setError("");
+      socket.onclose = () => {
+        if (!closed) {
+          reconnectTimer = setTimeout(connect, RECONNECT_DELAY_MS);
+        }
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
+      socket.close();
+    };
+  }, []);
+
+  return { data, loading, error, setError, refetch };
+};
+
+export default useDeviceSocket;
@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState } from "react";
 import { devicesAPI, authAPI } from "../services/api";
 import DeviceCard from "./DeviceCard";
 import LightControl from "./LightControl";
@@ -7,7 +7,7 @@ import Notifications from "./Notifications";
 import Integrations from "./Integrations";
 import "../styles/Dashboard.css";
 import AddDeviceForm from "./AddDeviceForm";
-import usePollingFetch from "../../hooks/usePollingFetch";
+import useDeviceSocket from "../../hooks/useDeviceSocket";
 
 function Dashboard({ onLogout }) {
   const [selectedDevice, setSelectedDevice] = useState(null);
@@ -17,23 +17,14 @@ function Dashboard({ onLogout }) {
   const [showNotifications, setShowNotifications] = useState(false);
   const [showIntegrations, setShowIntegrations] = useState(false);
 
-  const DEVICE_POLL_INTERVAL_MS = 5000;
-  // Fetch devices
+  // Devices are pushed over a WebSocket; fetchDevices is a REST refresh
   const {
     data: devices,
     loading,
     error,
     setError,
     refetch: fetchDevices,
-  } = usePollingFetch(devicesAPI.getDevices, DEVICE_POLL_INTERVAL_MS);
-
-  useEffect(() => {
-    fetchDevices();
-
-    const interval = setInterval(fetchDevices, DEVICE_POLL_INTERVAL_MS);
-
-    return () => clearInterval(interval);
-  }, []);
+  } = useDeviceSocket();
 
   const handleLogout = async () => {
     try {
@@ -4,7 +4,6 @@ import { notificationsAPI } from '../services/api';
 import '../styles/Notifications.css';
 
 // C1: Extract constants to module scope for better maintainability
-const POLL_INTERVAL = 10000; // 10 seconds
 const DEFAULT_FETCH_LIMIT = 20;
 
 // C2: Extract event icon mapping to a separate constant object
@@ -12,7 +11,13 @@ const EVENT_ICONS = {
   device_added: '➕',
   device_toggled: '🔄',
   brightness_changed: '💡',
+  devices_batch: '📦',
+  room_command: '🏠',
+  devices_import_progress: '📥',
+  devices_imported: '📥',
   task_scheduled: '⏰',
+  task_executed: '✅',
+  task_failed: '⚠️',
   integration_created: '🔌',
   integration_toggled: '🔗',
   integration_activated: '✅',
@@ -41,23 +46,40 @@ function Notifications({ isVisible }) {
       const data = await notificationsAPI.getNotifications(DEFAULT_FETCH_LIMIT);
       setNotifications(data);
       setError('');
+      return data;
     } catch (err) {
       // C5: Improved error handling with fallback message
       setError(err?.detail || err?.message || 'Failed to fetch notifications');
+      return [];
     } finally {
       setLoading(false);
     }
   }, []);
 
   useEffect(() => {
-    if (isVisible) {
-      fetchNotifications();
-
-      // Poll for new notifications every 10 seconds
-      const interval = setInterval(fetchNotifications, POLL_INTERVAL);
-
-      return () => clearInterval(interval);
-    }
+    if (!isVisible) return undefined;
+
+    let source;
+    let cancelled = false;
+
+    // Load recent history once, then receive new notifications as they
+    // happen. EventSource reconnects by itself and resumes from the last
+    // event ID it saw.
+    fetchNotifications().then((data) => {
+      if (cancelled) return;
+      source = new EventSource(notificationsAPI.streamUrl(data[0]?.id));
+      source.onmessage = (event) => {
+        const notification = JSON.parse(event.data);
+        setNotifications((current) =>
+          [notification, ...current.filter((n) => n.id !== notification.id)].slice(0, DEFAULT_FETCH_LIMIT)
+        );
+      };
+    });
+
+    return () => {
+      cancelled = true;
+      if (source) source.close();
+    };
   }, [isVisible, fetchNotifications]);
 
   // C6: Memoize empty state component to prevent unnecessary re-renders
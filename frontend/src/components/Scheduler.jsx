@@ -19,6 +19,7 @@ function Scheduler({ devices, onTaskCreated }) {
   const [selectedAction, setSelectedAction] = useState('turn_on');
   const [scheduledDate, setScheduledDate] = useState('');
   const [scheduledTime, setScheduledTime] = useState('');
+  const [brightness, setBrightness] = useState(50);
 
   const fetchTasks = async () => {
     try {
@@ -50,6 +51,7 @@ function Scheduler({ devices, onTaskCreated }) {
     setSelectedAction('turn_on');
     setScheduledDate('');
     setScheduledTime('');
+    setBrightness(50);
     setShowAddTask(false);
   };
 
@@ -59,7 +61,8 @@ function Scheduler({ devices, onTaskCreated }) {
 
     try {
       const scheduledDateTime = combineDateTimeToISO(scheduledDate, scheduledTime);
-      await schedulerAPI.createTask(selectedDevice, selectedAction, scheduledDateTime);
+      const taskBrightness = selectedAction === 'set_brightness' ? Number(brightness) : null;
+      await schedulerAPI.createTask(selectedDevice, selectedAction, scheduledDateTime, taskBrightness);
 
       resetTaskForm();
       fetchTasks();
@@ -161,6 +164,19 @@ function Scheduler({ devices, onTaskCreated }) {
               </select>
             </div>
 
+            {selectedAction === 'set_brightness' && (
+              <div className="form-group">
+                <label>Brightness: {brightness}%</label>
+                <input
+                  type="range"
+                  min="0"
+                  max="100"
+                  value={brightness}
+                  onChange={(e) => setBrightness(e.target.value)}
+                />
+              </div>
+            )}
+
             <div className="form-row">
               <div className="form-group">
                 <label>Date:</label>
@@ -228,10 +244,17 @@ function Scheduler({ devices, onTaskCreated }) {
 
                 <div className="task-body">
                   <h4>{getDeviceName(task.device_id)}</h4>
-                  <p className="task-action">{getActionLabel(task.action)}</p>
+                  <p className="task-action">
+                    {getActionLabel(task.action)}
+                    {task.brightness != null && ` (${task.brightness}%)`}
+                  </p>
                   <p className="task-time">
+                    {task.recurrence && 'Next: '}
                     {formatDateTime(task.scheduled_time)}
                   </p>
+                  {task.recurrence && (
+                    <p className="task-recurrence">🔁 {task.recurrence}</p>
+                  )}
 
                   <div className="task-status">
                     <span className={`status-badge ${task.executed ? 'executed' : 'pending'}`}>
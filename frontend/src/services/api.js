@@ -102,6 +102,10 @@ export const devicesAPI = {
     }
   },
 
+  // WebSocket URL for pushed device updates (see useDeviceSocket)
+  socketUrl: () =>
+    `${API_BASE_URL.replace(/^http/, 'ws')}/devices/ws?session_id=${encodeURIComponent(sessionId)}`,
+
   deleteDevice: async (deviceId) => {
     try {
       const response = await api.delete(`/devices/${deviceId}`, {
@@ -127,13 +131,14 @@ export const schedulerAPI = {
     }
   },
 
-  createTask: async (deviceId, action, scheduledTime) => {
+  createTask: async (deviceId, action, scheduledTime, brightness = null) => {
     try {
       const response = await api.post('/schedule',
         {
           device_id: deviceId,
           action: action,
-          scheduled_time: scheduledTime
+          scheduled_time: scheduledTime,
+          brightness: brightness
         },
         { params: { session_id: sessionId } }
       );
@@ -170,6 +175,15 @@ export const notificationsAPI = {
       throw error.response?.data || { detail: 'Failed to fetch notifications' };
     }
   },
+
+  // Server-Sent Events URL; the stream starts after lastEventId
+  streamUrl: (lastEventId) => {
+    const params = new URLSearchParams({ session_id: sessionId });
+    if (lastEventId) {
+      params.set('last_event_id', lastEventId);
+    }
+    return `${API_BASE_URL}/notifications/stream?${params}`;
+  },
 };
 
 // Integrations API
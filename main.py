@@ -1,11 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import integrations, auth, devices, scheduler, notifications
+from app.api.storage import (
+    session_store,
+    persistence_writer,
+    storage_backend,
+    notification_service,
+    scheduler as task_scheduler,
+    SESSION_SWEEP_INTERVAL_SECONDS
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background services with the application."""
+    session_store.start_sweeper(SESSION_SWEEP_INTERVAL_SECONDS)
+    storage_backend.start()
+    persistence_writer.start()
+    scheduler.task_executor.start()
+    yield
+    await scheduler.task_executor.stop()
+    # Writes tasks and notifications still waiting for the archive
+    task_scheduler.retention.flush()
+    notification_service.notification_history.flush()
+    # Flushes whatever device changes are still pending
+    persistence_writer.stop()
+    storage_backend.stop()
+    session_store.stop_sweeper()
+
 
 app = FastAPI(
     title="SE In-Class Activity API",
     description="Backend API for Smart Home IoT System with device control and scheduling",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -15,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Include routers